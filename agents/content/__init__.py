@@ -4,8 +4,13 @@ Content creation agents and pipeline.
 
 from agents.content.pipeline import (
     run_content_pipeline,
+    arun_content_pipeline,
     create_content_team,
     check_api_keys,
     create_facts_prompt,
-    extract_gap_analysis
-) 
\ No newline at end of file
+    extract_gap_analysis,
+    pipeline_request_key,
+    agent_pool
+)
+from agents.content.agent_pool import AgentPool, brand_voice_fingerprint
+from agents.content.batch import arun_content_pipeline_batch, run_content_pipeline_batch
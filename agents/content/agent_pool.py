@@ -0,0 +1,163 @@
+"""
+Process-level pool of pre-built content agent sets.
+
+Building the four pipeline agents (and their model clients) on every workflow is
+wasted work. The pool keeps idle agent sets keyed by a fingerprint of the brand
+voice they were built with; workflows check a set out, run, and hand it back.
+Model objects cache their HTTP clients, so reusing agents also reuses connections.
+"""
+
+import json
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Optional, Tuple
+
+logger = logging.getLogger("content_creation.agent_pool")
+
+DEFAULT_FINGERPRINT = "default"
+
+
+def brand_voice_fingerprint(brand_voice: Optional[Dict[str, Any]] = None) -> str:
+    """Return a stable fingerprint for a brand voice configuration.
+
+    Args:
+        brand_voice: Brand voice parameters, or None for the default voice
+
+    Returns:
+        Short hex digest that is identical for equal brand voice dicts
+    """
+    if not brand_voice:
+        return DEFAULT_FINGERPRINT
+
+    canonical = json.dumps(brand_voice, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()[:16]
+
+
+def reset_agent(agent: Any):
+    """Clear per-run state so an agent can serve the next workflow.
+
+    A fresh session id keeps runs from different workflows apart in storage, and
+    clearing memory stops run history from growing across workflows.
+    """
+    if getattr(agent, "memory", None) is not None:
+        agent.memory.clear()
+    agent.agent_session = None
+    agent.session_id = None
+    agent.run_id = None
+    agent.run_response = None
+    # agno keeps stream=True on the agent after a streamed run
+    agent.stream = None
+
+
+class AgentPool:
+    """
+    Pool of warmed agent sets shared by all workflows in the process.
+    """
+
+    def __init__(self,
+                 factory: Callable[[Optional[Dict[str, Any]]], Tuple],
+                 max_idle_per_voice: int = 8,
+                 max_voices: int = 64):
+        """
+        Initialize the pool.
+
+        Args:
+            factory: Callable that builds a new agent set for a brand voice
+            max_idle_per_voice: Idle agent sets kept for each brand voice
+            max_voices: Brand voices kept in the pool before the least recently used is dropped
+        """
+        self._factory = factory
+        self.max_idle_per_voice = max_idle_per_voice
+        self.max_voices = max_voices
+        self._idle: "OrderedDict[str, list]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {"created": 0, "reused": 0, "discarded": 0}
+
+    def acquire_idle(self, brand_voice: Optional[Dict[str, Any]] = None) -> Optional[Tuple]:
+        """Check out an idle agent set for the brand voice, or None if none is idle.
+
+        Never builds agents, so it is safe to call on an event loop; see acquire().
+        """
+        fingerprint = brand_voice_fingerprint(brand_voice)
+
+        with self._lock:
+            idle = self._idle.get(fingerprint)
+            if idle:
+                self._idle.move_to_end(fingerprint)
+                self.stats["reused"] += 1
+                return idle.pop()
+        return None
+
+    def acquire(self, brand_voice: Optional[Dict[str, Any]] = None) -> Tuple:
+        """Check out an agent set for the brand voice, building one if none is idle."""
+        agents = self.acquire_idle(brand_voice)
+        if agents is not None:
+            return agents
+
+        fingerprint = brand_voice_fingerprint(brand_voice)
+        agents = self._factory(brand_voice)
+        with self._lock:
+            self.stats["created"] += 1
+        logger.debug(f"Built new agent set for brand voice {fingerprint}")
+        return agents
+
+    def release(self, agents: Tuple, brand_voice: Optional[Dict[str, Any]] = None):
+        """Return a checked-out agent set to the pool."""
+        fingerprint = brand_voice_fingerprint(brand_voice)
+
+        for agent in agents:
+            reset_agent(agent)
+
+        with self._lock:
+            idle = self._idle.setdefault(fingerprint, [])
+            self._idle.move_to_end(fingerprint)
+
+            if len(idle) >= self.max_idle_per_voice:
+                self.stats["discarded"] += 1
+                return
+            idle.append(agents)
+
+            while len(self._idle) > self.max_voices:
+                _, dropped = self._idle.popitem(last=False)
+                self.stats["discarded"] += len(dropped)
+
+    @contextmanager
+    def checkout(self, brand_voice: Optional[Dict[str, Any]] = None):
+        """Context manager that acquires an agent set and always returns it."""
+        agents = self.acquire(brand_voice)
+        try:
+            yield agents
+        finally:
+            self.release(agents, brand_voice)
+
+    def warm(self, brand_voice: Optional[Dict[str, Any]] = None, count: int = 1) -> int:
+        """Pre-build agent sets so the first workflows don't pay the setup cost.
+
+        Returns:
+            Number of idle agent sets now available for the brand voice
+        """
+        fingerprint = brand_voice_fingerprint(brand_voice)
+
+        with self._lock:
+            missing = count - len(self._idle.get(fingerprint, []))
+
+        for _ in range(max(missing, 0)):
+            self.release(self._factory(brand_voice), brand_voice)
+            with self._lock:
+                self.stats["created"] += 1
+
+        with self._lock:
+            return len(self._idle.get(fingerprint, []))
+
+    def idle_count(self, brand_voice: Optional[Dict[str, Any]] = None) -> int:
+        """Number of idle agent sets for the brand voice."""
+        with self._lock:
+            return len(self._idle.get(brand_voice_fingerprint(brand_voice), []))
+
+    def clear(self):
+        """Drop all idle agent sets."""
+        with self._lock:
+            self._idle.clear()
@@ -0,0 +1,237 @@
+"""
+Batch execution of the content pipeline over many topics.
+
+Topics run concurrently on one event loop. Every model call takes a slot from the
+semaphore of its provider, so each provider is kept busy up to its own limit while
+the others work, and results are yielded as soon as each topic finishes. Similar
+topics are clustered first, so research and brief run once per cluster.
+"""
+
+import queue
+import asyncio
+import logging
+import threading
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, Iterable, Iterator, Optional, Tuple
+
+from agents.content.pipeline import arun_content_pipeline
+from agents.utils.topic_index import DEFAULT_REUSE_THRESHOLD
+
+logger = logging.getLogger("content_creation.batch")
+
+# Concurrent in-flight calls allowed per provider
+DEFAULT_PROVIDER_LIMITS = {
+    "openrouter": 8,
+    "deepseek": 8,
+    "xai": 4,
+    "anthropic": 4,
+}
+
+
+class ProviderConcurrency:
+    """
+    Per-provider concurrency caps shared by every pipeline in a batch.
+    """
+
+    def __init__(self, limits: Optional[Dict[str, int]] = None):
+        """
+        Initialize the caps.
+
+        Args:
+            limits: Maximum concurrent calls per provider, merged over DEFAULT_PROVIDER_LIMITS
+        """
+        self.limits = dict(DEFAULT_PROVIDER_LIMITS)
+        if limits:
+            self.limits.update(limits)
+        self._semaphores: Dict[str, asyncio.Semaphore] = {}
+        self.in_flight: Dict[str, int] = {provider: 0 for provider in self.limits}
+        self.peak_in_flight: Dict[str, int] = {provider: 0 for provider in self.limits}
+
+    @asynccontextmanager
+    async def slot(self, provider: str):
+        """Hold one concurrency slot for the provider while the block runs."""
+        if provider not in self._semaphores:
+            self._semaphores[provider] = asyncio.Semaphore(self.limits.get(provider, 1))
+
+        async with self._semaphores[provider]:
+            self.in_flight[provider] = self.in_flight.get(provider, 0) + 1
+            self.peak_in_flight[provider] = max(self.peak_in_flight.get(provider, 0), self.in_flight[provider])
+            try:
+                yield
+            finally:
+                self.in_flight[provider] -= 1
+
+
+async def arun_content_pipeline_batch(topics: Iterable[str],
+                                      brand_voice: Optional[Dict[str, Any]] = None,
+                                      word_count: int = 500,
+                                      save_results: bool = True,
+                                      speculative_facts: bool = True,
+                                      use_cache: bool = True,
+                                      provider_limits: Optional[Dict[str, int]] = None,
+                                      max_in_flight: Optional[int] = None,
+                                      reuse_threshold: Optional[float] = DEFAULT_REUSE_THRESHOLD,
+                                      n_clusters: Optional[int] = None
+                                      ) -> AsyncIterator[Dict[str, Any]]:
+    """Run the content pipeline for many topics, yielding results as each topic finishes.
+
+    Args:
+        topics: Topics (keywords) to create content for
+        brand_voice: Brand voice parameters applied to every topic
+        word_count: Target word count for each piece of content
+        save_results: Whether to append each topic's results to the result log
+        speculative_facts: Pre-fetch topic facts while research and brief run
+        use_cache: Serve repeated agent calls from the stage cache
+        provider_limits: Maximum concurrent calls per provider
+        max_in_flight: Maximum topics in progress at once; defaults to the sum of provider limits
+        reuse_threshold: Similarity at which topics are clustered (see
+            agents.content.clustering) and at which a topic reuses a similar topic's cached
+            research; None runs every topic independently
+        n_clusters: Cluster the topics with k-means into this many clusters instead
+
+    Yields:
+        Pipeline results for each topic in completion order. A topic that fails yields
+        a dict with "topic" and "error" keys instead. Topics that shared a cluster
+        representative's research and brief have "cluster": {"representative", "score"}.
+    """
+    slots = ProviderConcurrency(provider_limits)
+    if max_in_flight is None:
+        max_in_flight = sum(slots.limits.values())
+
+    topics = list(topics)
+
+    # Research and brief run once per cluster, for its representative; the other
+    # members wait for it and are queued after all representatives
+    leaders: Dict[int, Tuple[int, float]] = {}
+    if reuse_threshold is not None or n_clusters:
+        # NumPy is only loaded once a batch needs clustering
+        from agents.content.clustering import cluster_keywords
+        threshold = DEFAULT_REUSE_THRESHOLD if reuse_threshold is None else reuse_threshold
+        clusters = await asyncio.to_thread(
+            cluster_keywords, topics, threshold=threshold, n_clusters=n_clusters
+        )
+        for cluster in clusters:
+            for position, score in zip(cluster.indices[1:], cluster.scores[1:]):
+                leaders[position] = (cluster.indices[0], score)
+        logger.info(f"Planned {len(topics)} topics as {len(clusters)} clusters")
+    done = [asyncio.Event() for _ in topics]
+    outcomes: Dict[int, Dict[str, Any]] = {}
+
+    pending: "asyncio.Queue[int]" = asyncio.Queue()
+    for position in sorted(range(len(topics)), key=lambda position: position in leaders):
+        pending.put_nowait(position)
+    total = pending.qsize()
+    finished: "asyncio.Queue[Dict[str, Any]]" = asyncio.Queue()
+
+    logger.info(f"Starting batch of {total} topics with limits {slots.limits}")
+
+    async def worker():
+        while True:
+            try:
+                position = pending.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            topic = topics[position]
+            upstream = None
+            if position in leaders:
+                leader, score = leaders[position]
+                await done[leader].wait()
+                if "error" not in outcomes[leader]:
+                    upstream = outcomes[leader]
+            try:
+                result = await arun_content_pipeline(
+                    topic,
+                    brand_voice=brand_voice,
+                    word_count=word_count,
+                    save_results=save_results,
+                    # With the brief at hand, facts are collected in one gap-driven call
+                    speculative_facts=speculative_facts and upstream is None,
+                    use_cache=use_cache,
+                    provider_slots=slots,
+                    reuse_threshold=reuse_threshold,
+                    upstream=upstream,
+                    # Clustering already merged duplicate topics, and a coalesced run
+                    # would outlive this worker being cancelled
+                    coalesce=False
+                )
+                if upstream is not None:
+                    result["cluster"] = {"representative": upstream["topic"], "score": score}
+            except Exception as e:
+                logger.error(f"Batch topic '{topic}' failed: {str(e)}")
+                result = {"topic": topic, "error": str(e)}
+            outcomes[position] = result
+            done[position].set()
+            await finished.put(result)
+
+    workers = [asyncio.create_task(worker()) for _ in range(min(max_in_flight, total))]
+    try:
+        for _ in range(total):
+            yield await finished.get()
+    finally:
+        for task in workers:
+            task.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
+
+    logger.info(f"Batch of {total} topics completed")
+
+
+def run_content_pipeline_batch(topics: Iterable[str], **kwargs) -> Iterator[Dict[str, Any]]:
+    """Blocking generator over arun_content_pipeline_batch.
+
+    The batch runs on an event loop in a background thread; results are yielded to
+    the caller as each topic finishes. Closing the generator early cancels the batch:
+    topics in progress are cancelled and no new ones are started.
+
+    Args:
+        topics: Topics (keywords) to create content for
+        **kwargs: Options accepted by arun_content_pipeline_batch
+
+    Yields:
+        Pipeline results for each topic in completion order
+    """
+    items: "queue.Queue" = queue.Queue()
+    started = threading.Event()
+    done = object()
+    running: Dict[str, Any] = {}
+
+    async def consume():
+        running["loop"], running["task"] = asyncio.get_running_loop(), asyncio.current_task()
+        started.set()
+        batch = arun_content_pipeline_batch(topics, **kwargs)
+        try:
+            async for result in batch:
+                items.put(result)
+        finally:
+            await batch.aclose()
+
+    def run_loop():
+        try:
+            asyncio.run(consume())
+        except BaseException as e:
+            items.put(e)
+        finally:
+            # Unblocks the cancel below if the loop failed before consume() ran
+            started.set()
+            items.put(done)
+
+    thread = threading.Thread(target=run_loop, name="content-batch", daemon=True)
+    thread.start()
+
+    try:
+        while True:
+            item = items.get()
+            if item is done:
+                break
+            if isinstance(item, BaseException):
+                raise item
+            yield item
+    finally:
+        # Cancel the batch on its loop instead of letting workers start more topics
+        started.wait()
+        if thread.is_alive() and "task" in running:
+            try:
+                running["loop"].call_soon_threadsafe(running["task"].cancel)
+            except RuntimeError:
+                # The loop has already finished
+                pass
+        thread.join()
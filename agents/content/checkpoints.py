@@ -0,0 +1,110 @@
+"""
+Per-stage checkpoints for content workflows.
+
+Each completed stage of a workflow is written to disk as soon as it finishes, so a
+workflow that fails or is interrupted can be resumed from its last good stage
+instead of paying for every upstream model call again.
+"""
+
+import os
+import json
+import shutil
+import logging
+import datetime
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger("content_creation.checkpoints")
+
+REQUEST_FILE = "request.json"
+
+
+class CheckpointStore:
+    """
+    Stores workflow requests and completed stage results under one directory per workflow.
+    """
+
+    def __init__(self, directory: str = "storage/checkpoints"):
+        """
+        Initialize the store.
+
+        Args:
+            directory: Root directory for checkpoint files
+        """
+        self.directory = directory
+
+    def _workflow_dir(self, workflow_id: str) -> str:
+        # Workflow ids are used as directory names; keep them from escaping the root
+        safe_id = os.path.basename(workflow_id)
+        return os.path.join(self.directory, safe_id)
+
+    def _write(self, path: str, data: Dict[str, Any]):
+        """Write JSON atomically so a crash never leaves a partial checkpoint."""
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(data, f)
+        os.replace(tmp_path, path)
+
+    def _read(self, path: str) -> Optional[Dict[str, Any]]:
+        try:
+            with open(path, "r") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def save_request(self, workflow_id: str, request: Dict[str, Any]):
+        """Persist the request that started a workflow so it can be resumed after a restart."""
+        self._write(os.path.join(self._workflow_dir(workflow_id), REQUEST_FILE), request)
+
+    def load_request(self, workflow_id: str) -> Optional[Dict[str, Any]]:
+        """Load the request of a workflow, or None if it was never checkpointed."""
+        return self._read(os.path.join(self._workflow_dir(workflow_id), REQUEST_FILE))
+
+    def save_stage(self, workflow_id: str, stage: str, step: Dict[str, Any]):
+        """
+        Persist the result of a completed stage.
+
+        Args:
+            workflow_id: Workflow the stage belongs to
+            stage: Stage name
+            step: The stage's entry in results["steps"]
+        """
+        record = {
+            "stage": stage,
+            "saved_at": datetime.datetime.now().isoformat(),
+            "step": step
+        }
+        self._write(os.path.join(self._workflow_dir(workflow_id), f"stage_{stage}.json"), record)
+        logger.debug(f"Checkpointed stage '{stage}' of workflow {workflow_id}")
+
+    def load_stages(self, workflow_id: str) -> Dict[str, Dict[str, Any]]:
+        """Load every checkpointed stage of a workflow, keyed by stage name."""
+        workflow_dir = self._workflow_dir(workflow_id)
+        if not os.path.isdir(workflow_dir):
+            return {}
+
+        stages = {}
+        for name in sorted(os.listdir(workflow_dir)):
+            if not (name.startswith("stage_") and name.endswith(".json")):
+                continue
+            record = self._read(os.path.join(workflow_dir, name))
+            if record and "stage" in record and "step" in record:
+                stages[record["stage"]] = record["step"]
+        return stages
+
+    def list_workflows(self) -> List[str]:
+        """Ids of workflows that have checkpoints."""
+        if not os.path.isdir(self.directory):
+            return []
+        return sorted(
+            name for name in os.listdir(self.directory)
+            if os.path.isdir(os.path.join(self.directory, name))
+        )
+
+    def clear(self, workflow_id: str):
+        """Remove all checkpoints of a workflow."""
+        shutil.rmtree(self._workflow_dir(workflow_id), ignore_errors=True)
+
+
+# Global instance shared by the pipeline and the API
+checkpoint_store = CheckpointStore()
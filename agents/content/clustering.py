@@ -0,0 +1,207 @@
+"""
+Keyword clustering for batch planning.
+
+Large SEO campaigns bring thousands of keywords, many of them paraphrases of
+each other. Clustering them first lets research and brief run once per cluster
+(for its representative) while content still runs per keyword.
+
+Keywords are vectorised like topics in agents.utils.topic_index (stemmed words
+and their trigrams), with the hashed features folded into a fixed number of
+dense columns so similarities are computed with NumPy matrix products:
+
+- threshold clustering (the default) groups every keyword with the most central
+  unassigned keyword it is at least `threshold` similar to, so each member is
+  close to its representative, not merely to some other member;
+- k-means (spherical, on cosine similarity) is used when a number of clusters is
+  given, for campaigns that should be planned at a fixed research budget.
+
+    python -m agents.content.clustering keywords.txt [threshold]
+
+prints the clusters of a file with one keyword per line.
+"""
+
+import sys
+import logging
+from dataclasses import asdict, dataclass, field
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+from agents.utils.topic_index import DEFAULT_REUSE_THRESHOLD, topic_vector
+
+logger = logging.getLogger("content_creation.clustering")
+
+# Dense columns the hashed keyword features are folded into
+DEFAULT_DIMENSIONS = 2048
+
+# Rows of the similarity matrix computed at once, bounding memory to block_size x keywords
+DEFAULT_BLOCK_SIZE = 1024
+
+
+@dataclass
+class KeywordCluster:
+    """Keywords planned together, and the one whose research and brief they share."""
+    representative: str
+    keywords: List[str] = field(default_factory=list)
+    # Similarity of each keyword to the representative, in the order of keywords
+    scores: List[float] = field(default_factory=list)
+    # Positions of the keywords in the clustered list
+    indices: List[int] = field(default_factory=list)
+
+    def to_dict(self) -> Dict[str, object]:
+        return asdict(self)
+
+
+def keyword_matrix(keywords: Sequence[str], dimensions: int = DEFAULT_DIMENSIONS) -> np.ndarray:
+    """
+    Unit-length keyword vectors as rows of a dense float32 matrix.
+
+    Args:
+        keywords: Keywords to vectorise
+        dimensions: Columns the hashed features are folded into
+
+    Returns:
+        Matrix of shape (len(keywords), dimensions)
+    """
+    rows, columns, values = [], [], []
+    for row, keyword in enumerate(keywords):
+        for feature, value in topic_vector(keyword).items():
+            rows.append(row)
+            columns.append(feature % dimensions)
+            values.append(value)
+    matrix = np.zeros((len(keywords), dimensions), dtype=np.float32)
+    # add.at, because folded features of one keyword may land in the same column
+    np.add.at(matrix, (np.asarray(rows, dtype=np.intp), np.asarray(columns, dtype=np.intp)),
+              np.asarray(values, dtype=np.float32))
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    np.divide(matrix, norms, out=matrix, where=norms > 0)
+    return matrix
+
+
+def _threshold_clusters(matrix: np.ndarray, threshold: float, block_size: int) -> List[List[int]]:
+    """Greedy clustering around the keywords with the most neighbours above threshold."""
+    count = matrix.shape[0]
+    neighbours: List[np.ndarray] = []
+    for start in range(0, count, block_size):
+        similarities = matrix[start:start + block_size] @ matrix.T
+        for row in similarities:
+            neighbours.append(np.flatnonzero(row >= threshold))
+    degrees = np.fromiter((len(row) for row in neighbours), dtype=np.int64, count=count)
+
+    assigned = np.zeros(count, dtype=bool)
+    clusters = []
+    # Most central first; ties keep the input order
+    for seed in np.argsort(-degrees, kind="stable"):
+        if assigned[seed]:
+            continue
+        members = neighbours[seed][~assigned[neighbours[seed]]]
+        members = members[members != seed]
+        assigned[seed] = True
+        assigned[members] = True
+        clusters.append([int(seed)] + sorted(int(member) for member in members))
+    return clusters
+
+
+def _kmeans_clusters(matrix: np.ndarray, n_clusters: int, iterations: int, seed: int) -> List[List[int]]:
+    """Spherical k-means with k-means++ seeding; the representative is the member nearest the centroid."""
+    count = matrix.shape[0]
+    n_clusters = min(n_clusters, count)
+    rng = np.random.default_rng(seed)
+
+    centroids = np.empty((n_clusters, matrix.shape[1]), dtype=np.float32)
+    centroids[0] = matrix[rng.integers(count)]
+    distances = 1.0 - matrix @ centroids[0]
+    for index in range(1, n_clusters):
+        weights = np.clip(distances, 0.0, None) ** 2
+        total = weights.sum()
+        choice = rng.choice(count, p=weights / total) if total > 0 else rng.integers(count)
+        centroids[index] = matrix[choice]
+        distances = np.minimum(distances, 1.0 - matrix @ centroids[index])
+
+    labels = np.full(count, -1)
+    for _ in range(iterations):
+        similarities = matrix @ centroids.T
+        new_labels = similarities.argmax(axis=1)
+        if np.array_equal(new_labels, labels):
+            break
+        labels = new_labels
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, labels, matrix)
+        sizes = np.bincount(labels, minlength=n_clusters)
+        for empty in np.flatnonzero(sizes == 0):
+            # Re-seed an empty cluster with the keyword worst served by its centroid
+            worst = similarities[np.arange(count), labels].argmin()
+            sums[empty] = matrix[worst]
+            similarities[worst, labels[worst]] = np.inf
+        norms = np.linalg.norm(sums, axis=1, keepdims=True)
+        centroids = np.divide(sums, norms, out=np.zeros_like(sums), where=norms > 0)
+
+    clusters = []
+    for label in range(n_clusters):
+        members = np.flatnonzero(labels == label)
+        if not len(members):
+            continue
+        representative = members[(matrix[members] @ centroids[label]).argmax()]
+        clusters.append([int(representative)] + [int(member) for member in members if member != representative])
+    return clusters
+
+
+def cluster_keywords(keywords: Sequence[str],
+                     threshold: float = DEFAULT_REUSE_THRESHOLD,
+                     n_clusters: Optional[int] = None,
+                     dimensions: int = DEFAULT_DIMENSIONS,
+                     block_size: int = DEFAULT_BLOCK_SIZE,
+                     iterations: int = 25,
+                     seed: int = 0) -> List[KeywordCluster]:
+    """
+    Group keywords into clusters that can share research and brief.
+
+    Args:
+        keywords: Keywords to cluster; duplicates end up in the same cluster
+        threshold: Similarity to the representative a keyword needs to join its
+            cluster (threshold clustering)
+        n_clusters: Use k-means with this many clusters instead of a threshold
+        dimensions: Columns of the keyword vectors
+        block_size: Rows of the similarity matrix computed at once
+        iterations: Maximum k-means iterations
+        seed: Random seed for k-means initialisation
+
+    Returns:
+        Clusters, largest first; the representative is the first keyword of each
+    """
+    keywords = list(keywords)
+    if not keywords:
+        return []
+    matrix = keyword_matrix(keywords, dimensions)
+    if n_clusters:
+        groups = _kmeans_clusters(matrix, n_clusters, iterations, seed)
+    else:
+        groups = _threshold_clusters(matrix, threshold, block_size)
+
+    clusters = []
+    for group in groups:
+        scores = matrix[group] @ matrix[group[0]]
+        clusters.append(KeywordCluster(
+            representative=keywords[group[0]],
+            keywords=[keywords[index] for index in group],
+            scores=[round(float(score), 4) for score in scores],
+            indices=group
+        ))
+    clusters.sort(key=lambda cluster: (-len(cluster.keywords), cluster.indices[0]))
+    logger.info(f"Clustered {len(keywords)} keywords into {len(clusters)} clusters")
+    return clusters
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("Usage: python -m agents.content.clustering KEYWORDS_FILE [THRESHOLD]")
+        sys.exit(1)
+    with open(sys.argv[1]) as f:
+        lines = [line.strip() for line in f if line.strip()]
+    threshold = float(sys.argv[2]) if len(sys.argv) > 2 else DEFAULT_REUSE_THRESHOLD
+    found = cluster_keywords(lines, threshold=threshold)
+    for cluster in found:
+        print(f"{cluster.representative} ({len(cluster.keywords)})")
+        for keyword, score in zip(cluster.keywords[1:], cluster.scores[1:]):
+            print(f"  {score:.2f}  {keyword}")
+    print(f"{len(lines)} keywords, {len(found)} clusters")
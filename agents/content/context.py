@@ -0,0 +1,183 @@
+"""
+Token-budgeted context assembly for the Content Creator prompt.
+
+The upstream outputs (research, brief, facts) are pasted into the content prompt,
+and they grow with every verbose model answer. The assembler fits them into a
+per-model token budget, filling it in priority order:
+
+    1. the brief outline
+    2. the gap analysis
+    3. facts lines carrying statistics (numbers, percentages, years)
+    4. the remaining facts
+    5. the research
+
+Each section is cut at line boundaries and kept in its original order, so the
+same inputs always produce the same prompt (and the same stage cache key).
+"""
+
+import re
+import logging
+from typing import Any, Dict, List, Optional, Tuple
+
+from agents.utils.token_tracker import TokenTracker
+from agents.content.sections import index_markdown
+
+logger = logging.getLogger("content_creation.context")
+
+# Tokens of upstream context allowed in the content prompt, per content model
+CONTEXT_TOKEN_BUDGETS = {
+    "claude-3-sonnet-20240229": 2500,
+    "claude-3-opus": 2000,
+    "claude-3.5-sonnet": 2500,
+    "claude-3.7-sonnet": 2500,
+}
+
+DEFAULT_CONTEXT_TOKEN_BUDGET = 4000
+
+TRUNCATION_MARKER = "[...]"
+
+_STATISTIC = re.compile(r"\d")
+
+
+def get_context_budget(model: str) -> int:
+    """Token budget for the upstream context sent to a content model."""
+    return CONTEXT_TOKEN_BUDGETS.get(model, DEFAULT_CONTEXT_TOKEN_BUDGET)
+
+
+def split_brief(brief: str) -> Tuple[str, str]:
+    """
+    Split a brief into its outline and its gap analysis section.
+
+    Args:
+        brief: Output of the Brief Creator
+
+    Returns:
+        Tuple of (outline, gap analysis section); the gap analysis is empty when
+        the brief has no labelled section
+    """
+    index = index_markdown(brief or "")
+    section = index.find("Gap Analysis", prefix=True)
+    if section is not None:
+        start, end = section.start, section.content_end
+    else:
+        label = index.labels.get("gap analysis")
+        if label is None:
+            return (brief or "").strip(), ""
+        start, end = label.start, label.end
+
+    outline = (index.text[:start] + index.text[end:]).strip()
+    gap_section = index.text[start:end].strip()
+    return outline, gap_section
+
+
+def _non_empty_lines(text: str) -> List[str]:
+    return [line for line in (text or "").splitlines() if line.strip()]
+
+
+def assemble_content_context(research: str,
+                             brief: str,
+                             facts: str,
+                             model: str,
+                             tracker: Optional[TokenTracker] = None,
+                             budget: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Fit the upstream outputs into the content model's context budget.
+
+    Args:
+        research: Output of the Research Engine
+        brief: Output of the Brief Creator
+        facts: Output of the Facts Collector
+        model: Content model name, used for the budget and token estimates
+        tracker: Tracker whose estimate_tokens is used; a new one by default
+        budget: Token budget; defaults to get_context_budget(model)
+
+    Returns:
+        Dict with the "research", "brief" and "facts" text to put in the prompt and a
+        "stats" dict (budget, original_tokens, tokens, dropped_lines, trimmed)
+    """
+    if tracker is None:
+        tracker = TokenTracker()
+    if budget is None:
+        budget = get_context_budget(model)
+
+    outline, gap_section = split_brief(brief)
+    sections = {
+        "outline": _non_empty_lines(outline),
+        "gap": _non_empty_lines(gap_section),
+        "facts": _non_empty_lines(facts),
+        "research": _non_empty_lines(research),
+    }
+    costs = {
+        name: [tracker.estimate_tokens(line, model) for line in lines]
+        for name, lines in sections.items()
+    }
+    original_tokens = sum(sum(values) for values in costs.values())
+
+    if original_tokens <= budget:
+        return {
+            "research": research,
+            "brief": brief,
+            "facts": facts,
+            "stats": {
+                "budget": budget,
+                "original_tokens": original_tokens,
+                "tokens": original_tokens,
+                "dropped_lines": 0,
+                "trimmed": False
+            }
+        }
+
+    facts_stats = [i for i, line in enumerate(sections["facts"]) if _STATISTIC.search(line)]
+    facts_other = [i for i, line in enumerate(sections["facts"]) if not _STATISTIC.search(line)]
+
+    # (section, line indices) in the order the budget is handed out
+    priorities = [
+        ("outline", list(range(len(sections["outline"])))),
+        ("gap", list(range(len(sections["gap"])))),
+        ("facts", facts_stats),
+        ("facts", facts_other),
+        ("research", list(range(len(sections["research"])))),
+    ]
+
+    kept = {name: set() for name in sections}
+    remaining = budget
+    for name, indices in priorities:
+        for index in indices:
+            cost = costs[name][index]
+            if cost > remaining:
+                # Stop this group at the first line that doesn't fit so it stays contiguous
+                break
+            kept[name].add(index)
+            remaining -= cost
+
+    def rebuild(name):
+        lines = sections[name]
+        text = "\n".join(line for i, line in enumerate(lines) if i in kept[name])
+        if len(kept[name]) < len(lines):
+            text = f"{text}\n{TRUNCATION_MARKER}" if text else TRUNCATION_MARKER
+        return text
+
+    brief_text = rebuild("outline")
+    if sections["gap"]:
+        brief_text = f"{brief_text}\n\n{rebuild('gap')}"
+
+    total_lines = sum(len(lines) for lines in sections.values())
+    kept_lines = sum(len(indices) for indices in kept.values())
+    stats = {
+        "budget": budget,
+        "original_tokens": original_tokens,
+        "tokens": budget - remaining,
+        "dropped_lines": total_lines - kept_lines,
+        "trimmed": True
+    }
+    logger.info(
+        f"Content context trimmed from {original_tokens} to {stats['tokens']} tokens "
+        f"(budget {budget}, {stats['dropped_lines']} lines dropped)"
+    )
+
+    return {
+        "research": rebuild("research"),
+        "brief": brief_text,
+        "facts": rebuild("facts"),
+        "stats": stats
+    }
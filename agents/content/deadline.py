@@ -0,0 +1,113 @@
+"""
+Deadline propagation for content workflows.
+
+A workflow's overall deadline is split into per-stage time budgets when each
+stage starts. A stage gets its share of the time that is actually left, weighed
+against the stages still ahead of it on the critical path, so time saved by a
+fast stage flows to the later ones and a slow stage squeezes them.
+"""
+
+import time
+import logging
+from typing import Callable, Dict, Optional
+
+logger = logging.getLogger("content_creation.deadline")
+
+# Relative share of the workflow's time for each stage
+STAGE_TIME_SHARES = {
+    "research": 0.25,
+    "brief": 0.15,
+    # Runs alongside research and brief, so it may use their combined share
+    "facts_prefetch": 0.4,
+    "facts": 0.2,
+    # Only runs when the facts JSON can't be repaired locally
+    "facts_fix": 0.1,
+    "content": 0.4,
+}
+
+# Stages that still have to run after each stage on the critical path
+DOWNSTREAM_STAGES = {
+    "research": ("brief", "facts", "content"),
+    "brief": ("facts", "content"),
+    "facts_prefetch": ("facts", "content"),
+    "facts": ("content",),
+    "facts_fix": ("content",),
+    "content": (),
+}
+
+# Upper bound for any stage, so a hung provider call can't hold a workflow forever
+DEFAULT_STAGE_TIMEOUT = 300.0
+
+
+class DeadlineExceeded(TimeoutError):
+    """A stage ran out of its share of the workflow deadline."""
+
+    def __init__(self, stage: str, budget: float):
+        super().__init__(f"Stage '{stage}' exceeded its time budget of {budget:.1f}s")
+        self.stage = stage
+        self.budget = budget
+
+
+class Deadline:
+    """
+    Overall time budget of one workflow.
+    """
+
+    def __init__(self,
+                 seconds: Optional[float] = None,
+                 shares: Optional[Dict[str, float]] = None,
+                 max_stage_timeout: float = DEFAULT_STAGE_TIMEOUT,
+                 clock: Callable[[], float] = time.monotonic):
+        """
+        Start the clock.
+
+        Args:
+            seconds: Seconds the workflow may take; None only applies max_stage_timeout
+            shares: Relative time share per stage, merged over STAGE_TIME_SHARES
+            max_stage_timeout: Longest any single stage may run
+            clock: Monotonic time source
+        """
+        self.seconds = seconds
+        self.shares = dict(STAGE_TIME_SHARES)
+        if shares:
+            self.shares.update(shares)
+        self.max_stage_timeout = max_stage_timeout
+        self.clock = clock
+        self.started = clock()
+
+    def elapsed(self) -> float:
+        return self.clock() - self.started
+
+    def remaining(self) -> Optional[float]:
+        """Seconds left, or None without a deadline."""
+        if self.seconds is None:
+            return None
+        return max(self.seconds - self.elapsed(), 0.0)
+
+    def stage_timeout(self, stage: str) -> float:
+        """
+        Time budget for a stage that is starting now.
+
+        Args:
+            stage: Stage name
+
+        Returns:
+            Seconds the stage may run
+        """
+        remaining = self.remaining()
+        if remaining is None:
+            return self.max_stage_timeout
+
+        share = self.shares.get(stage, 0.0)
+        pending = share + sum(self.shares.get(name, 0.0) for name in DOWNSTREAM_STAGES.get(stage, ()))
+        budget = remaining * share / pending if pending > 0 else remaining
+        return min(budget, self.max_stage_timeout)
+
+    def report(self) -> Dict[str, Optional[float]]:
+        """Summary for the workflow results."""
+        elapsed = self.elapsed()
+        return {
+            "seconds": self.seconds,
+            "elapsed": round(elapsed, 3),
+            "met": None if self.seconds is None else elapsed <= self.seconds
+        }
@@ -0,0 +1,354 @@
+"""
+Structured parsing of the Facts Collector's answer.
+
+The facts prompt asks for JSON with 'stats', 'social_insights' and 'summary',
+but models wrap it in prose or code fences, use single quotes or Python
+literals, leave trailing commas, or stop mid-object at max_tokens. The parser
+finds the JSON block in one scan, repairs those defects, and validates the
+result into typed records. Only when a JSON block is present but beyond repair
+is it worth asking the model for a fix (see create_facts_fix_prompt).
+"""
+
+import re
+import json
+import logging
+from dataclasses import asdict, dataclass, field
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger("content_creation.facts")
+
+_FENCED_JSON = re.compile(r"```(?:json|JSON)?\s*\n?(\{.*?)```", re.DOTALL)
+
+_SMART_QUOTES = str.maketrans({"“": '"', "”": '"', "‘": "'", "’": "'"})
+
+_LITERALS = {"True": "true", "False": "false", "None": "null"}
+
+# Accepted spellings of record fields, first match wins
+_STAT_TEXT_KEYS = ("fact", "stat", "statistic", "text", "value", "description")
+_INSIGHT_TEXT_KEYS = ("trend", "insight", "topic", "text", "description")
+
+
+class FactsParseError(ValueError):
+    """The facts answer has no usable JSON, or it doesn't match the expected shape."""
+
+
+@dataclass
+class FactStat:
+    """One statistic or fact with its provenance."""
+    fact: str
+    source: Optional[str] = None
+    date: Optional[str] = None
+
+
+@dataclass
+class SocialInsight:
+    """One trend or discussion seen on a social platform."""
+    trend: str
+    platform: Optional[str] = None
+    sentiment: Optional[str] = None
+    examples: List[str] = field(default_factory=list)
+
+
+@dataclass
+class FactsReport:
+    """Validated Facts Collector output."""
+    stats: List[FactStat] = field(default_factory=list)
+    social_insights: List[SocialInsight] = field(default_factory=list)
+    summary: str = ""
+    repaired: bool = False
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "FactsReport":
+        return cls(
+            stats=[FactStat(**stat) for stat in data.get("stats", [])],
+            social_insights=[SocialInsight(**insight) for insight in data.get("social_insights", [])],
+            summary=data.get("summary", ""),
+            repaired=data.get("repaired", False)
+        )
+
+    def to_prompt(self) -> str:
+        """
+        Compact plain-text rendering for the content prompt, one line per record.
+        """
+        lines = []
+        for stat in self.stats:
+            provenance = ", ".join(part for part in (stat.source, stat.date) if part)
+            lines.append(f"- {stat.fact}" + (f" ({provenance})" if provenance else ""))
+        for insight in self.social_insights:
+            details = ", ".join(part for part in (insight.platform, insight.sentiment) if part)
+            line = f"- Trend: {insight.trend}" + (f" [{details}]" if details else "")
+            if insight.examples:
+                line += f" e.g. {'; '.join(insight.examples[:2])}"
+            lines.append(line)
+        if self.summary:
+            lines.append(f"Summary: {self.summary}")
+        return "\n".join(lines)
+
+
+def extract_json_block(text: str) -> Optional[str]:
+    """
+    Find the JSON object in a model answer.
+
+    A fenced ```json block wins; otherwise the first balanced {...} is taken,
+    skipping braces inside strings. An object that never closes (a truncated
+    answer) is returned up to the end of the text, for repair_json to close.
+
+    Args:
+        text: Model output
+
+    Returns:
+        The JSON text, or None if the answer has no object at all
+    """
+    if not text:
+        return None
+    fenced = _FENCED_JSON.search(text)
+    if fenced:
+        return fenced.group(1).strip()
+
+    start = text.find("{")
+    if start == -1:
+        return None
+    depth = 0
+    quote = None
+    escaped = False
+    for index in range(start, len(text)):
+        char = text[index]
+        if quote:
+            if escaped:
+                escaped = False
+            elif char == "\\":
+                escaped = True
+            elif char == quote:
+                quote = None
+        elif char in "\"'":
+            quote = char
+        elif char == "{":
+            depth += 1
+        elif char == "}":
+            depth -= 1
+            if depth == 0:
+                return text[start:index + 1]
+    return text[start:]
+
+
+def repair_json(text: str) -> str:
+    """
+    Fix common defects in model-written JSON in a single pass.
+
+    Handles smart quotes, single-quoted strings, unquoted keys, Python literals
+    (True/False/None), trailing commas, // comments, and objects, arrays or
+    strings left open by a truncated answer.
+
+    Args:
+        text: JSON-like text
+
+    Returns:
+        Text that json.loads is much more likely to accept
+    """
+    text = text.translate(_SMART_QUOTES)
+    out: List[str] = []
+    stack: List[str] = []
+    quote = None
+    escaped = False
+    index = 0
+    length = len(text)
+
+    def strip_trailing_comma():
+        while out and out[-1].isspace():
+            out.pop()
+        if out and out[-1] == ",":
+            out.pop()
+
+    while index < length:
+        char = text[index]
+        if quote:
+            if escaped:
+                escaped = False
+                out.append(char)
+            elif char == "\\":
+                escaped = True
+                out.append(char)
+            elif char == quote:
+                quote = None
+                out.append('"')
+            elif char == '"':
+                # A double quote inside a single-quoted string
+                out.append('\\"')
+            elif char == "\n":
+                out.append("\\n")
+            else:
+                out.append(char)
+            index += 1
+            continue
+
+        if char in "\"'":
+            quote = char
+            out.append('"')
+        elif char in "{[":
+            stack.append("}" if char == "{" else "]")
+            out.append(char)
+        elif char in "}]":
+            strip_trailing_comma()
+            if stack:
+                stack.pop()
+            out.append(char)
+        elif char == "/" and text.startswith("//", index):
+            end = text.find("\n", index)
+            index = length if end == -1 else end
+            continue
+        elif char.isalpha() or char == "_":
+            end = index
+            while end < length and (text[end].isalnum() or text[end] == "_"):
+                end += 1
+            word = text[index:end]
+            rest = text[end:].lstrip()
+            if rest.startswith(":"):
+                out.append(f'"{word}"')
+            else:
+                out.append(_LITERALS.get(word, word))
+            index = end
+            continue
+        else:
+            out.append(char)
+        index += 1
+
+    # Close whatever a truncated answer left open
+    if quote:
+        out.append('"')
+    strip_trailing_comma()
+    if out and out[-1] == ":":
+        out.append("null")
+    while stack:
+        out.append(stack.pop())
+    return "".join(out)
+
+
+def _text(value: Any) -> Optional[str]:
+    if value is None:
+        return None
+    text = str(value).strip()
+    return text or None
+
+
+def _first(record: Dict[str, Any], keys) -> Optional[str]:
+    for key in keys:
+        if _text(record.get(key)):
+            return _text(record[key])
+    return None
+
+
+def _as_list(value: Any, name: str) -> List[Any]:
+    if value is None:
+        return []
+    if isinstance(value, list):
+        return value
+    if isinstance(value, (dict, str)):
+        return [value]
+    raise FactsParseError(f"'{name}' must be a list, got {type(value).__name__}")
+
+
+def validate_facts(data: Any) -> FactsReport:
+    """
+    Validate parsed JSON into a FactsReport.
+
+    Records may be plain strings or objects using common alternative keys
+    (e.g. 'stat' or 'statistic' for 'fact'); records without any text are dropped.
+
+    Args:
+        data: Result of json.loads
+
+    Returns:
+        The validated report
+
+    Raises:
+        FactsParseError: If the data is not an object or holds no facts at all
+    """
+    if not isinstance(data, dict):
+        raise FactsParseError(f"Expected a JSON object, got {type(data).__name__}")
+
+    stats = []
+    for item in _as_list(data.get("stats"), "stats"):
+        if isinstance(item, dict):
+            text = _first(item, _STAT_TEXT_KEYS)
+            if text:
+                stats.append(FactStat(text, _text(item.get("source")), _text(item.get("date"))))
+        elif _text(item):
+            stats.append(FactStat(_text(item)))
+
+    insights = []
+    for item in _as_list(data.get("social_insights"), "social_insights"):
+        if isinstance(item, dict):
+            text = _first(item, _INSIGHT_TEXT_KEYS)
+            if text:
+                examples = [_text(example) for example in _as_list(item.get("examples"), "examples")]
+                insights.append(SocialInsight(
+                    text, _text(item.get("platform")), _text(item.get("sentiment")),
+                    [example for example in examples if example]
+                ))
+        elif _text(item):
+            insights.append(SocialInsight(_text(item)))
+
+    summary = data.get("summary")
+    summary = _text(summary if not isinstance(summary, (dict, list)) else json.dumps(summary)) or ""
+
+    if not stats and not insights and not summary:
+        raise FactsParseError("No stats, social insights or summary in the facts JSON")
+    return FactsReport(stats=stats, social_insights=insights, summary=summary)
+
+
+def parse_facts(text: str) -> FactsReport:
+    """
+    Extract, repair if needed, and validate the facts JSON in a model answer.
+
+    Args:
+        text: Facts Collector output
+
+    Returns:
+        The validated report; `repaired` is True if the JSON had to be fixed
+
+    Raises:
+        FactsParseError: If there is no JSON block, or it can't be repaired or validated
+    """
+    block = extract_json_block(text)
+    if block is None:
+        raise FactsParseError("No JSON object in the facts answer")
+    try:
+        return validate_facts(json.loads(block))
+    except json.JSONDecodeError:
+        pass
+    try:
+        data = json.loads(repair_json(block))
+    except json.JSONDecodeError as e:
+        raise FactsParseError(f"Facts JSON could not be repaired: {e}") from e
+    report = validate_facts(data)
+    report.repaired = True
+    logger.info("Facts JSON repaired")
+    return report
+
+
+def has_json_block(text: str) -> bool:
+    """Whether the answer attempted JSON at all (prose-only answers aren't worth a fix request)."""
+    return extract_json_block(text) is not None
+
+
+def create_facts_fix_prompt(output: str, error: str) -> str:
+    """
+    Prompt asking the Facts Collector to fix its own malformed JSON.
+
+    Args:
+        output: The answer that failed to parse
+        error: Why it failed
+
+    Returns:
+        Formatted fix prompt
+    """
+    return f"""Your previous answer could not be parsed as JSON ({error}):
+
+---BEGIN ANSWER---
+{output}
+---END ANSWER---
+
+Return the same facts as one valid JSON object with fields 'stats' (list of objects with 'fact', 'source' and 'date'), 'social_insights' (list of objects with 'trend', 'platform', 'sentiment' and 'examples') and 'summary' (text). Return only the JSON, with no other text."""
@@ -0,0 +1,221 @@
+"""
+Hedged requests for pipeline stages.
+
+A stage's primary model occasionally takes far longer than usual, and that one
+slow call sets the workflow's tail latency. When the primary hasn't answered
+within a percentile of its own recent latency, the same prompt is sent to a
+secondary model through OpenRouter; whichever answers first wins and the other
+call is cancelled.
+"""
+
+import os
+import math
+import asyncio
+import logging
+import threading
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Deque, Dict, Optional, Tuple
+
+from agents.utils.rate_limiter import is_rate_limit_error
+
+logger = logging.getLogger("content_creation.hedging")
+
+
+@dataclass
+class HedgePolicy:
+    """When and where to hedge one stage.
+
+    Attributes:
+        secondary_model: OpenRouter model id that receives the hedged request
+        percentile: Percentile of the primary's recent latency to wait before hedging
+        min_samples: Latency samples needed before hedging starts
+        min_delay: Never hedge sooner than this many seconds
+        failover: Also send calls whose primary failed to the secondary (see failover_worthwhile)
+    """
+    secondary_model: str
+    percentile: float = 95.0
+    min_samples: int = 20
+    min_delay: float = 2.0
+    failover: bool = False
+
+
+# Secondary models per stage; HEDGE_PERCENTILE overrides the percentile for all of them,
+# and HEDGE_FAILOVER=1 turns failover on for all of them
+DEFAULT_HEDGE_POLICIES = {
+    "research": HedgePolicy("openai/gpt-4o-mini"),
+    "brief": HedgePolicy("deepseek/deepseek-chat"),
+    "facts": HedgePolicy("x-ai/grok-2-1212"),
+    "content": HedgePolicy("anthropic/claude-3-sonnet"),
+}
+
+
+def hedge_policies_from_env() -> Dict[str, HedgePolicy]:
+    """Default policies with the percentile from HEDGE_PERCENTILE and failover from HEDGE_FAILOVER, if set."""
+    percentile = os.getenv("HEDGE_PERCENTILE")
+    failover = os.getenv("HEDGE_FAILOVER", "").strip().lower() in ("1", "true", "yes", "on")
+    policies = {}
+    for stage, policy in DEFAULT_HEDGE_POLICIES.items():
+        policies[stage] = HedgePolicy(
+            secondary_model=policy.secondary_model,
+            percentile=float(percentile) if percentile else policy.percentile,
+            min_samples=policy.min_samples,
+            min_delay=policy.min_delay,
+            failover=failover or policy.failover
+        )
+    return policies
+
+
+def failover_worthwhile(error: Exception) -> bool:
+    """
+    Whether a failed primary call is worth sending to the secondary.
+
+    Rate limits are left to the limiter's backoff, and other client errors (bad
+    request, context too long, ...) would fail on the secondary too; server errors,
+    timeouts and errors without a status are failed over.
+    """
+    if is_rate_limit_error(error):
+        return False
+    status = getattr(error, "status_code", None)
+    return not (isinstance(status, int) and 400 <= status < 500 and status != 408)
+
+
+class LatencyHistory:
+    """
+    Rolling window of recent call latencies per key (e.g. pipeline step).
+    """
+
+    def __init__(self, window: int = 200):
+        """
+        Initialize the history.
+
+        Args:
+            window: Samples kept per key
+        """
+        self.window = window
+        self._samples: Dict[str, Deque[float]] = {}
+        self._lock = threading.Lock()
+
+    def record(self, key: str, seconds: float):
+        """Add a latency sample."""
+        with self._lock:
+            samples = self._samples.setdefault(key, deque(maxlen=self.window))
+            samples.append(seconds)
+
+    def count(self, key: str) -> int:
+        with self._lock:
+            return len(self._samples.get(key, ()))
+
+    def percentile(self, key: str, q: float) -> Optional[float]:
+        """
+        Latency at percentile q (0-100) using nearest-rank, or None without samples.
+        """
+        with self._lock:
+            samples = sorted(self._samples.get(key, ()))
+        if not samples:
+            return None
+        rank = math.ceil(q / 100.0 * len(samples))
+        return samples[min(max(rank, 1), len(samples)) - 1]
+
+    def clear(self):
+        with self._lock:
+            self._samples.clear()
+
+
+def hedge_delay(history: LatencyHistory, key: str, policy: Optional[HedgePolicy]) -> Optional[float]:
+    """
+    Seconds to wait for the primary before hedging, or None if it shouldn't be hedged yet.
+
+    Args:
+        history: Latency history of primary calls
+        key: History key of the call
+        policy: Hedge policy of the stage, if any
+    """
+    if policy is None or history.count(key) < policy.min_samples:
+        return None
+    return max(history.percentile(key, policy.percentile), policy.min_delay)
+
+
+async def race_with_hedge(primary: Awaitable[Any],
+                          start_secondary: Optional[Callable[[], Awaitable[Any]]],
+                          delay: Optional[float],
+                          failover: bool = False) -> Tuple[Any, bool]:
+    """
+    Await the primary call, hedging with a secondary call if it is slow.
+
+    The secondary is started once the primary has run for `delay` seconds. The first
+    call to succeed wins and the other is cancelled; if one fails, the other is still
+    awaited. With failover, a primary that fails before it was hedged is retried on
+    the secondary, unless the error wouldn't be helped by it (see failover_worthwhile).
+    When every call fails, the primary's error is raised.
+
+    Args:
+        primary: Awaitable of the primary call
+        start_secondary: Zero-argument callable that starts the secondary call;
+            None disables hedging and failover
+        delay: Seconds to wait before hedging; None only allows failover
+        failover: Send the call to the secondary when the primary fails (off by default,
+            as each failover is an extra paid call)
+
+    Returns:
+        Tuple of (result, secondary_won) where secondary_won is True if the secondary answered
+    """
+    primary_task = asyncio.ensure_future(primary)
+    if start_secondary is None:
+        return await primary_task, False
+
+    secondary_task = None
+    try:
+        if delay is not None:
+            done, _ = await asyncio.wait({primary_task}, timeout=delay)
+            if not done:
+                logger.info(f"Primary call still running after {delay:.2f}s; sending hedged request")
+                secondary_task = asyncio.ensure_future(start_secondary())
+
+        pending = {task for task in (primary_task, secondary_task) if task is not None}
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in (primary_task, secondary_task):
+                if task in done and task.exception() is None:
+                    return task.result(), task is secondary_task
+
+        error = primary_task.exception()
+        if secondary_task is None and failover and failover_worthwhile(error):
+            logger.warning(f"Primary call failed ({error}); failing over to secondary")
+            secondary_task = asyncio.ensure_future(start_secondary())
+            try:
+                return await secondary_task, True
+            except Exception as e:
+                logger.error(f"Failover call failed too: {str(e)}")
+        raise error
+    finally:
+        for task in (primary_task, secondary_task):
+            if task is not None and not task.done():
+                task.cancel()
+        # Let cancelled calls run their cleanup before returning
+        leftovers = [task for task in (primary_task, secondary_task) if task is not None]
+        await asyncio.gather(*leftovers, return_exceptions=True)
+
+
+def create_hedge_agent(agent: Any, model_id: str) -> Any:
+    """
+    Copy an agent with its model replaced by an OpenRouter model.
+
+    Args:
+        agent: Primary agent of the stage
+        model_id: OpenRouter model id
+
+    Returns:
+        Agent with the same instructions and tools, answering through OpenRouter
+    """
+    from agno.models.openrouter import OpenRouter
+    from agents.utils.fake_llm import maybe_fake
+
+    primary_model = getattr(agent, "model", None)
+    max_tokens = getattr(primary_model, "max_tokens", None)
+    model = OpenRouter(id=model_id, max_tokens=max_tokens, api_key=os.getenv("OPENROUTER_API_KEY"))
+    return agent.deep_copy(update={"model": maybe_fake(model, role=getattr(primary_model, "role", None))})
+
+
+# Global latency history of primary calls shared by every workflow in the process
+latency_history = LatencyHistory()
@@ -5,40 +5,77 @@ to create high-quality content following a multi-stage process.
 """
 
 import os
+import copy
+import time
+import asyncio
+import contextlib
 import logging
-import datetime
 import re
-import json
-from textwrap import dedent
 from dotenv import load_dotenv
 
-from agno.agent import Agent
-from agno.team import Team
-from agno.models.openai import OpenAIChat
-from agno.models.anthropic import Claude
-from agno.models.deepseek import DeepSeek
-from agno.models.xai import xAI
-from agno.models.openrouter import OpenRouter
-from agno.storage.json import JsonStorage
-from agno.tools.duckduckgo import DuckDuckGoTools
 
 # Import the token tracker
-from agents.utils.token_tracker import token_tracker
+from agents.utils.token_tracker import TokenTracker, token_tracker
+from agents.utils.stage_cache import make_cache_key, normalize_prompt, stage_cache
+from agents.utils.rate_limiter import rate_limiter, is_rate_limit_error, retry_after_seconds
+from agents.utils.result_log import result_log
+from agents.utils.topic_index import DEFAULT_REUSE_THRESHOLD, topic_key
+from agents.utils.single_flight import SingleFlight
+from agents.utils.logging_config import configure_logging
+from agents.utils.timing import StageTimer, stage_timer, timed
+from agents.utils.tracing import tracer
+from agents.utils.metrics import provider_calls, stage_latency
+from agents.content.agent_pool import AgentPool, brand_voice_fingerprint
+from agents.content.checkpoints import checkpoint_store as default_checkpoint_store
+from agents.content.context import assemble_content_context
+from agents.content.deadline import Deadline, DeadlineExceeded
+from agents.content.facts import (
+    FactsParseError, FactsReport, create_facts_fix_prompt, has_json_block, parse_facts
+)
+from agents.content.hedging import (
+    create_hedge_agent, hedge_delay, hedge_policies_from_env, latency_history, race_with_hedge
+)
+from agents.content.scheduler import Stage, StageGraph
+from agents.content.prompts import content_instructions, facts_prompt, formatted_date, prompts
+from agents.content.sections import index_markdown
 
 # Load environment variables from .env file
 load_dotenv()
 
-# Configure logging
-logging.basicConfig(
-    level=logging.DEBUG,
-    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
-)
-
 logger = logging.getLogger("content_creation")
 
+# Provider and model used for each stage, as reported to the token tracker
+STAGE_MODELS = {
+    "research": ("openrouter", "o3-mini"),
+    "brief": ("deepseek", "deepseek-chat"),
+    "facts": ("xai", "grok-beta"),
+    "content": ("anthropic", "claude-3-sonnet-20240229"),
+}
+
+# Output tokens reserved against rate limits when a model has no max_tokens set
+DEFAULT_OUTPUT_TOKEN_ESTIMATE = 1024
+
+# Directory agent sessions are stored in; resolved when the storage is first built
+DEFAULT_CONTENT_STORAGE_DIR = "./content_storage"
+
+_content_storage = None
+
+def get_content_storage():
+    """Get the JSON storage shared by all content agents in the process
+    
+    Sessions go to CONTENT_STORAGE_DIR, or ./content_storage by default. The path is
+    made absolute once so later changes of working directory don't move the writes.
+    """
+    global _content_storage
+    if _content_storage is None:
+        from agents.content.providers import TimedJsonStorage
+        directory = os.getenv("CONTENT_STORAGE_DIR") or DEFAULT_CONTENT_STORAGE_DIR
+        _content_storage = TimedJsonStorage(dir_path=os.path.abspath(directory))
+    return _content_storage
+
 def get_formatted_date():
     """Get current date formatted as Month Day, Year"""
-    return datetime.datetime.now().strftime("%B %d, %Y")
+    return formatted_date()
 
 def create_facts_prompt(topic, gap_analysis=None):
     """Create a structured system prompt for fetching real-time facts
@@ -50,31 +87,72 @@ def create_facts_prompt(topic, gap_analysis=None):
     Returns:
         str: Formatted system prompt
     """
-    current_date = get_formatted_date()
-    
-    prompt = f"""Fetch real-time data as of {current_date}, related to '{topic}' for an SEO-optimized blog. Include:
-1. The latest statistics or facts from credible web sources (e.g., travel reports, news articles, industry blogs).
-2. Trending discussions or insights from X posts, YouTube videos/comments, Reddit threads, Hacker News posts, and other relevant social platforms (e.g., hashtags, sentiments, key topics).
-3. A concise summary linking the data to the keyword and suggesting how it can enhance SEO relevance.
-"""
+    return facts_prompt(topic, gap_analysis)
 
-    # Add gap analysis if provided
-    if gap_analysis:
-        prompt += f"""If a content gap analysis is provided below, incorporate it to identify unique angles or underserved topics competitors may have missed. 
+def create_facts_topup_prompt(topic, gap_analysis, prefetched_facts):
+    """Create a short follow-up prompt that tops up pre-fetched facts using the gap analysis
+    
+    Args:
+        topic (str): The topic being researched
+        gap_analysis (str): Gap analysis from the Brief Creator
+        prefetched_facts (str): Facts collected for the topic before the brief was ready
+        
+    Returns:
+        str: Formatted top-up prompt
+    """
+    return prompts.render("facts_topup", topic=topic, gap_analysis=gap_analysis,
+                          prefetched_facts=prefetched_facts)
 
----BEGIN GAP ANALYSIS---
-{gap_analysis}
----END GAP ANALYSIS---
-"""
+def create_research_prompt(topic):
+    """Create the prompt sent to the Research Engine
+    
+    Args:
+        topic (str): The topic to research
+        
+    Returns:
+        str: Formatted research prompt
+    """
+    return prompts.render("research", topic=topic)
 
-    prompt += """Return the response in JSON format with fields: 'stats' (list of facts with sources and dates), 'social_insights' (list of trends with platform, sentiment, and examples), and 'summary' (text tying it to the keyword and SEO goals).
+def create_brief_prompt(research_result):
+    """Create the prompt sent to the Brief Creator
+    
+    Args:
+        research_result (str): Output of the Research Engine
+        
+    Returns:
+        str: Formatted brief prompt
+    """
+    return prompts.render("brief", research_result=research_result)
 
-Keep your response concise, with 3-5 stats and 2-3 social insights at most."""
+def create_content_prompt(topic, word_count, research_result, brief_result, facts_result):
+    """Create the prompt sent to the Content Creator
+    
+    Args:
+        topic (str): The topic for content creation
+        word_count (int): Target word count for the content
+        research_result (str): Output of the Research Engine
+        brief_result (str): Output of the Brief Creator
+        facts_result (str): Output of the Facts Collector
+        
+    Returns:
+        str: Formatted content prompt
+    """
+    return prompts.render("content", topic=topic, word_count=word_count, research_result=research_result,
+                          brief_result=brief_result, facts_result=facts_result)
 
-    return prompt
+def get_response_text(response):
+    """Extract the text content from an agent run response"""
+    return response.content if hasattr(response, 'content') else str(response)
 
 def check_api_keys():
     """Check if required API keys are set"""
+    from agents.utils.fake_llm import fake_llm_enabled
+    
+    if fake_llm_enabled():
+        logger.info("FAKE_LLM is set; using offline fake models instead of provider APIs")
+        return True
+    
     missing_keys = []
     
     # Check for OpenRouter API key (for o3-mini)
@@ -105,28 +183,26 @@ def extract_gap_analysis(brief_content):
     Returns:
         str: Extracted gap analysis or default message if not found
     """
-    # Try to extract gap analysis section with heading
-    gap_section_pattern = r"(?i)(?:^|\n)#+\s*Gap Analysis\s*(?:\n|$)(.*?)(?=(?:^|\n)#+\s*|\Z)"
-    match = re.search(gap_section_pattern, brief_content, re.DOTALL | re.MULTILINE)
-    
-    if match:
-        gap_analysis = match.group(1).strip()
-        logger.info(f"Gap Analysis extracted ({len(gap_analysis)} chars)")
-        return gap_analysis
+    # Look up the section in the brief's index (one parse, shared with later stages)
+    index = index_markdown(brief_content)
+    section = index.find("Gap Analysis", prefix=True)
+    if section:
+        gap_analysis = index.section_text(section)
+        if gap_analysis:
+            logger.debug(f"Gap Analysis extracted ({len(gap_analysis)} chars)")
+            return gap_analysis
     
     # Try more lenient extraction with label
-    gap_pattern = r"(?i)Gap Analysis:?\s*(.*?)(?:\n\n|\n#|\Z)"
-    match = re.search(gap_pattern, brief_content, re.DOTALL)
-    if match:
-        gap_analysis = match.group(1).strip()
-        logger.info(f"Gap Analysis extracted with fallback method ({len(gap_analysis)} chars)")
+    gap_analysis = index.label("Gap Analysis")
+    if gap_analysis:
+        logger.debug(f"Gap Analysis extracted with fallback method ({len(gap_analysis)} chars)")
         return gap_analysis
     
     # Try to find any mentions of gaps or opportunities
     sentences = re.findall(r'[^.!?]*(?:gap|opportunity|missing|underserved)[^.!?]*[.!?]', brief_content, re.IGNORECASE)
     if sentences:
         gap_analysis = " ".join(sentences)
-        logger.info(f"Generic gap analysis extracted ({len(gap_analysis)} chars)")
+        logger.debug(f"Generic gap analysis extracted ({len(gap_analysis)} chars)")
         return gap_analysis
     
     # Default message if no gap analysis found
@@ -141,378 +217,726 @@ def create_content_team(brand_voice=None):
             Can include tone, style, taboo_words, sentence_structure, etc.
             
     Returns:
-        Team: Configured content creation team
+        tuple: The research, brief, facts and content agents
     """
     # Check API keys first
     if not check_api_keys():
         logger.error("Missing API keys. Please set all required API keys in the .env file.")
         raise ValueError("Missing API keys for one or more required services")
     
+    # Provider SDKs are imported on first use, keeping them out of API startup
+    from agno.agent import Agent
+    from agno.models.anthropic import Claude
+    from agno.models.deepseek import DeepSeek
+    from agno.models.openrouter import OpenRouter
+    from agno.models.xai import xAI
+    from agents.content.providers import TimedDuckDuckGoTools
+    from agents.utils.fake_llm import maybe_fake
+    
     # Get API keys
     openrouter_api_key = os.getenv("OPENROUTER_API_KEY")
     anthropic_api_key = os.getenv("ANTHROPIC_API_KEY")
     deepseek_api_key = os.getenv("DEEPSEEK_API_KEY")
     xai_api_key = os.getenv("XAI_API_KEY")
-    openai_api_key = os.getenv("OPENAI_API_KEY")  # Still needed for coordinator
     
-    # Create storage
-    storage = JsonStorage(dir_path="./content_storage")
+    # Shared storage for all agent sets in the process
+    storage = get_content_storage()
     
     # 1. Research & Analysis Engine (O3Mini via OpenRouter)
     research_agent = Agent(
         name="Research Engine",
         role="Analyze content to identify trends and patterns",
-        model=OpenRouter(
+        model=maybe_fake(OpenRouter(
             id="openai/o3-mini",  # Specify the o3-mini model
             max_tokens=1000,  # Increased token limit for research output
             temperature=0.7,
             api_key=openrouter_api_key  # Explicitly pass the API key
-        ),
+        ), role="research"),
         storage=storage,
-        tools=[DuckDuckGoTools()],
+        tools=[TimedDuckDuckGoTools()],
         markdown=True,
-        instructions=dedent("""
-            You are a content research specialist.
-            
-            When given a topic:
-            1. Search for top-ranking content on this topic
-            2. Analyze their structure, style, and coverage
-            3. Identify common topics, subtopics, and patterns
-            4. Determine content styles that perform well
-            5. Provide a comprehensive analysis summary
-            
-            Your output should be a detailed analysis report that includes:
-            - Key topics covered by top-performing content
-            - Common content structures and formats
-            - Typical tone and style elements
-            - Depth of coverage in successful content
-            - Notable authority signals used
-        """),
+        instructions=prompts.render("research_instructions"),
     )
     
     # 2. Gap Analysis & Brief Creation (DeepSeek)
     brief_agent = Agent(
         name="Brief Creator",
         role="Create content briefs based on research analysis",
-        model=DeepSeek(id="deepseek-chat", api_key=deepseek_api_key),  # Updated model ID with explicit API key
+        model=maybe_fake(DeepSeek(id="deepseek-chat", api_key=deepseek_api_key), role="brief"),  # Updated model ID with explicit API key
         storage=storage,
-        instructions=dedent("""
-            You are a content strategy specialist.
-            
-            When given a research analysis:
-            1. Identify content gaps and opportunities
-            2. Create a detailed content brief that includes:
-               - Recommended structure and outline
-               - Key topics to cover thoroughly
-               - Content differentiation strategy
-               - E-E-A-T signals to include
-               - Target word count and depth
-            
-            Your brief should provide clear direction for content creation
-            that will outperform existing content.
-            
-            IMPORTANT: Include a section clearly labeled "Gap Analysis" that summarizes the key content gaps
-            and opportunities you've identified. This section will be used by the Facts Collector agent
-            to gather targeted real-time data. Be specific about underserved topics, angles, or questions
-            that competitors are not addressing adequately.
-        """),
+        instructions=prompts.render("brief_instructions"),
     )
     
     # 3. Facts & Figures Acquisition (Grok3)
     facts_agent = Agent(
         name="Facts Collector",
         role="Research current facts and figures for content",
-        model=xAI(id="grok-beta", api_key=xai_api_key, base_url="https://api.x.ai/v1"),  # Added base_url with explicit API key
+        model=maybe_fake(xAI(id="grok-beta", api_key=xai_api_key, base_url="https://api.x.ai/v1"), role="facts"),  # Added base_url with explicit API key
         storage=storage,
-        tools=[DuckDuckGoTools()],
+        tools=[TimedDuckDuckGoTools()],
         instructions=create_facts_prompt(""),  # Initialize with empty prompt - will be populated by team at runtime
     )
     
-    # Prepare brand voice instructions if provided
-    content_instructions = dedent("""
-        You are an expert content creator.
-        
-        When given a content brief and supporting facts:
-        1. Create engaging, high-quality content that:
-           - Follows the structure in the brief
-           - Addresses all required topics thoroughly
-           - Incorporates facts and figures naturally
-           - Maintains a consistent, appropriate tone
-           - Sounds authentically human, not AI-generated
-           - Demonstrates expertise and authority
-        
-        Your content should be publication-ready and exceed
-        the quality of competing content on the same topic.
-    """)
-    
-    # Add brand voice customization if provided
-    if brand_voice:
-        brand_voice_details = dedent(f"""
-            BRAND VOICE GUIDELINES:
-            
-            Tone: {brand_voice.get('tone', 'Professional and authoritative')}
-            
-            Style: {brand_voice.get('style', 'Clear, concise, and engaging')}
-            
-            Sentence Structure: {brand_voice.get('sentence_structure', 'Varied sentence length with a mix of simple and complex structures')}
-            
-            Language: {brand_voice.get('language', 'Use industry terminology appropriately, but explain complex concepts clearly')}
-            
-            Taboo Words/Phrases: {', '.join(brand_voice.get('taboo_words', ['clearly', 'obviously', 'simply', 'just']))}
-            
-            Persuasion Techniques: {brand_voice.get('persuasion', 'Use evidence-based arguments, social proof, and specific examples')}
-            
-            Content Format: {brand_voice.get('format', 'Use clear headings, bullet points for lists, and short paragraphs')}
-            
-            YOU MUST STRICTLY ADHERE TO THESE BRAND VOICE GUIDELINES IN ALL CONTENT YOU CREATE.
-        """)
-        
-        content_instructions += "\n\n" + brand_voice_details
-    
     # 4. Content Generation (Claude 3.7)
     content_agent = Agent(
         name="Content Creator",
         role="Create high-quality, human-sounding content",
-        model=Claude(id="claude-3-sonnet-20240229", api_key=anthropic_api_key),  # Using Claude 3 Sonnet that we know works
-        storage=storage,
-        instructions=content_instructions,
-    )
-    
-    # Improved team instructions with better gap analysis extraction logic
-    team_instructions = [
-        "You are the coordinator of a content creation team.",
-        "Your job is to manage the entire content creation workflow:",
-        "1. First, have the Research Engine analyze top content for the topic",
-        "2. Next, have the Brief Creator develop a strategy based on the research and identify content gaps",
-        "3. Then, have the Facts Collector gather supporting facts and figures, focused on the identified gaps",
-        "4. Finally, have the Content Creator produce the final content",
-        "Each step must build on the previous one's output.",
-        "",
-        "IMPORTANT: When delegating to the Facts Collector, you MUST follow these exact steps:",
-        "1. Extract the Gap Analysis section from the Brief Creator's output using the extract_gap_analysis function",
-        "2. Create a new message for the Facts Collector using the EXACT format below:",
-        "",
-        "```",
-        "import datetime",
-        "from content_creation_team import create_facts_prompt, extract_gap_analysis",  # Using the correct module path
-        "",
-        "# Get topic from the current context",
-        "topic = '[INSERT MAIN TOPIC HERE]'",
-        "",
-        "# Extract gap analysis from the Brief Creator's output",
-        "brief_content = '''",
-        "[INSERT BRIEF CREATOR'S FULL OUTPUT HERE]",
-        "'''",
-        "",
-        "# Extract gap analysis using the helper function",
-        "gap_analysis = extract_gap_analysis(brief_content)",
-        "",
-        "# Generate the structured prompt",
-        "structured_prompt = create_facts_prompt(topic, gap_analysis)",
-        "",
-        "# The prompt below ensures consistent formatting with dynamic date handling",
-        "structured_prompt",
-        "```",
-        "",
-        "This approach ensures the Facts Collector receives a properly structured prompt with real-time date information and the gap analysis from the Brief Creator."
-    ]
-    
-    # Create the coordinated team
-    content_team = Team(
-        name="Content Creation Team",
-        mode="coordinate",  # Use coordinate mode for sequential workflow
-        model=OpenAIChat(id="gpt-4-turbo", api_key=openai_api_key),  # Added explicit API key
-        members=[research_agent, brief_agent, facts_agent, content_agent],
+        model=maybe_fake(Claude(id="claude-3-sonnet-20240229", api_key=anthropic_api_key), role="content"),  # Using Claude 3 Sonnet that we know works
         storage=storage,
-        instructions=team_instructions,
-        success_criteria="High-quality, comprehensive content that follows the brief and incorporates all necessary facts and figures",
-        debug_mode=True,
-        show_members_responses=True,
-        share_member_interactions=True,  # Updated from send_team_context_to_members
-        markdown=True
+        instructions=content_instructions(brand_voice),
     )
     
     logger.info("Content creation team initialized")
     return (research_agent, brief_agent, facts_agent, content_agent)
 
-def run_content_pipeline(topic, brand_voice=None, word_count=500, save_results=True):
+# Process-wide pool of warmed agent sets, keyed by brand voice. The factory is looked
+# up at call time so create_content_team can be swapped out (e.g. in tests).
+agent_pool = AgentPool(lambda brand_voice: create_content_team(brand_voice))
+
+# Per-stage hedge policies, and the factory for the OpenRouter agents that answer hedged
+# requests (looked up at call time so both can be swapped out, e.g. in tests)
+hedge_policies = hedge_policies_from_env()
+hedge_agent_factory = create_hedge_agent
+
+# Identical pipeline runs in flight in this process share one execution
+pipeline_flights = SingleFlight()
+
+def pipeline_request_key(topic, brand_voice=None, word_count=500, speculative_facts=True, use_cache=True,
+                         reuse_threshold=DEFAULT_REUSE_THRESHOLD, deadline=None, save_results=True):
+    """Build the key under which identical pipeline requests are coalesced.
+    
+    Topics that only differ in case or whitespace produce the same key. Requests with
+    different deadlines never share a run, so a tight deadline is never left waiting
+    on a run without one.
+    
+    Args:
+        topic (str): The topic for content creation
+        brand_voice (dict, optional): Brand voice parameters
+        word_count (int, optional): Target word count for the content
+        speculative_facts (bool, optional): Whether facts are pre-fetched
+        use_cache (bool, optional): Whether the stage cache is used
+        reuse_threshold (float, optional): Similarity at which research of similar topics is reused
+        deadline (float, optional): Seconds the pipeline may take
+        save_results (bool, optional): Whether the results are appended to the result log
+        
+    Returns:
+        tuple: Hashable request key
+    """
+    return (normalize_prompt(topic), int(word_count), brand_voice_fingerprint(brand_voice),
+            bool(speculative_facts), bool(use_cache), reuse_threshold,
+            None if deadline is None else float(deadline), bool(save_results))
+
+def save_pipeline_results(results, tracker):
+    """Append pipeline results, including the token usage report, to the result log
+    
+    Args:
+        results (dict): Results of the content creation pipeline
+        tracker (TokenTracker): Tracker holding the token usage of the run
+        
+    Returns:
+        str: Id of the saved record
+    """
+    record = results if "token_usage" in results else dict(results, token_usage=tracker.get_usage_report())
+    record_id = result_log.append(record, key=results.get("workflow_id"))
+    logger.info(f"Content results saved to result log as {record_id}")
+    return record_id
+
+def run_content_pipeline(topic, brand_voice=None, word_count=500, save_results=True, speculative_facts=True,
+                         use_cache=True, deadline=None, reuse_threshold=DEFAULT_REUSE_THRESHOLD):
     """Run the content creation pipeline using individual agents rather than a Team.
     
+    Blocking wrapper around arun_content_pipeline for scripts and thread-based callers.
+    Usage is recorded on the global token tracker, which is reset for this run.
+    
     Args:
         topic (str): The topic for content creation
         brand_voice (dict, optional): Dictionary containing brand voice parameters
         word_count (int, optional): Target word count for the content
-        save_results (bool, optional): Whether to save the results to a JSON file
+        save_results (bool, optional): Whether to append the results to the result log
+        speculative_facts (bool, optional): Pre-fetch topic facts while research and brief run
+        use_cache (bool, optional): Serve repeated agent calls from the stage cache
+        deadline (float, optional): Seconds the whole pipeline may take
+        reuse_threshold (float, optional): Similarity at which a similar topic's cached
+            research is reused; None disables the lookup
         
     Returns:
         dict: Results of the content creation pipeline
     """
-    logger.info(f"Starting content creation pipeline for topic: {topic}")
-    
     # Reset token tracker for this run
     token_tracker.reset()
     
-    # Initialize all agents
-    research_agent, brief_agent, facts_agent, content_agent = create_content_team(brand_voice)
+    results = asyncio.run(arun_content_pipeline(
+        topic,
+        brand_voice=brand_voice,
+        word_count=word_count,
+        save_results=save_results,
+        speculative_facts=speculative_facts,
+        tracker=token_tracker,
+        use_cache=use_cache,
+        deadline=deadline,
+        reuse_threshold=reuse_threshold
+    ))
     
-    results = {
-        "topic": topic,
-        "steps": {}
-    }
+    # Print token usage report
+    token_tracker.print_usage_report()
     
-    # Step 1: Research topic with O3Mini through OpenRouter
-    logger.info("Step 1: Running Research Engine with O3Mini via OpenRouter")
-    research_prompt = f"Analyze content structure and trends for '{topic}' in 300 words or less"
+    return results
+
+async def arun_content_pipeline(topic, brand_voice=None, word_count=500, save_results=True,
+                                speculative_facts=True, tracker=None, provider_slots=None,
+                                on_event=None, use_cache=True, workflow_id=None, resume=False,
+                                checkpoint_store=None, coalesce=True, hedge=True,
+                                deadline=None, reuse_threshold=DEFAULT_REUSE_THRESHOLD, upstream=None):
+    """Run the content creation pipeline on the event loop using agno's async run path.
     
-    try:
-        logger.info("Sending prompt to o3-mini via OpenRouter (non-streaming)...")
-        research_response = research_agent.run(research_prompt, stream=False)
+    The stages run as a dependency graph rather than a fixed sequence:
+    
+        research -> brief ---------.
+                                    +-> facts -> content
+        facts_prefetch ------------'
+    
+    With speculative_facts enabled, a topic-only facts pre-fetch runs while research
+    and brief are in flight, and the facts stage becomes a cheap top-up driven by the
+    gap analysis. Latency is then bounded by the critical path instead of the sum
+    of every model call.
+    
+    Args:
+        topic (str): The topic for content creation
+        brand_voice (dict, optional): Dictionary containing brand voice parameters
+        word_count (int, optional): Target word count for the content
+        save_results (bool, optional): Whether to append the results to the result log
+        speculative_facts (bool, optional): Pre-fetch topic facts while research and brief run
+        tracker (TokenTracker, optional): Tracker for this run; a new one is created by default
+        provider_slots (ProviderConcurrency, optional): Per-provider concurrency caps shared
+            with other pipelines, as used by the batch runner
+        on_event (callable, optional): Called with a dict for every stage transition
+            ({"type": "step", ...}). When set, the Content Creator runs in streaming mode
+            and each output delta is reported as {"type": "token", "step": "content", "delta": ...}
+        use_cache (bool, optional): Serve repeated agent calls from the stage cache. Cached
+            steps are marked with "cached": True and are not charged to the token tracker
+        workflow_id (str, optional): Id under which each completed stage is checkpointed
+        resume (bool, optional): Restore checkpointed stages of workflow_id and only run the rest
+        checkpoint_store (CheckpointStore, optional): Store for checkpoints; defaults to the
+            global store when a workflow_id is given
+        coalesce (bool, optional): Attach to an identical run already in flight instead of
+            starting a new one. Only applies to runs without workflow_id, on_event and
+            tracker; the attached caller gets a copy of the results marked with "coalesced": True
+        hedge (bool, optional): Send slow or failed non-streaming calls to the stage's
+            OpenRouter secondary (see hedge_policies); steps answered by it are marked
+            with "hedged": True
+        deadline (float, optional): Seconds the whole pipeline may take. It is split into
+            per-stage time budgets as stages start; a research or facts stage that runs out
+            of time degrades (stale cached research, pre-fetched or no facts) and is listed
+            in results["degraded"], while a brief or content stage fails with
+            DeadlineExceeded. Without a deadline each stage is still capped at
+            DEFAULT_STAGE_TIMEOUT seconds
+        reuse_threshold (float, optional): With use_cache, a topic whose research isn't
+            cached reuses the cached research of the most similar earlier topic if their
+            similarity (0-1, see agents.utils.topic_index) reaches this threshold; the brief
+            then follows from the stage cache too. The best scores are reported in
+            results["topic_matches"] and a reused research step has "reused_from".
+            None disables the lookup
+        upstream (dict, optional): Results of a run for a closely related topic, such as a
+            keyword cluster's representative. Its research and brief are taken over instead
+            of being run again (steps marked with "reused_from"); steps that failed or were
+            degraded there are run as usual
         
-        # Extract the response text based on response format
-        if hasattr(research_response, 'content'):
-            research_result = research_response.content
-        else:
-            research_result = str(research_response)
-            
-        logger.info(f"Research output received ({len(research_result)} chars)")
-    except Exception as e:
-        logger.error(f"Error with OpenRouter research: {str(e)}")
-        # Fallback message
-        research_result = f"Error in research phase: {str(e)}"
-    
-    # Track token usage for research step
-    token_tracker.track_step(
-        step_name="research",
-        provider="openrouter",
-        model="o3-mini",
-        input_text=research_prompt,
-        output_text=research_result
-    )
+    Returns:
+        dict: Results of the content creation pipeline
+    """
+    # A caller's own tracker must record the calls of its run, so such runs aren't shared
+    if coalesce and workflow_id is None and on_event is None and upstream is None and tracker is None:
+        key = pipeline_request_key(topic, brand_voice, word_count, speculative_facts, use_cache, reuse_threshold,
+                                   deadline, save_results)
+        results, shared = await pipeline_flights.do(key, lambda: arun_content_pipeline(
+            topic,
+            brand_voice=brand_voice,
+            word_count=word_count,
+            save_results=save_results,
+            speculative_facts=speculative_facts,
+            provider_slots=provider_slots,
+            use_cache=use_cache,
+            checkpoint_store=checkpoint_store,
+            coalesce=False,
+            hedge=hedge,
+            deadline=deadline,
+            reuse_threshold=reuse_threshold
+        ))
+        if shared:
+            logger.info(f"Coalesced pipeline request for topic '{topic}' with a run already in flight")
+            results = copy.deepcopy(results)
+            results["coalesced"] = True
+        return results
+    
+    with tracer.span("content_pipeline", topic=topic, workflow_id=workflow_id, resume=resume):
+        return await _arun_content_pipeline(
+            topic, brand_voice, word_count, save_results, speculative_facts, tracker, provider_slots,
+            on_event, use_cache, workflow_id, resume, checkpoint_store, hedge, deadline, reuse_threshold,
+            upstream
+        )
+
+async def _arun_content_pipeline(topic, brand_voice, word_count, save_results, speculative_facts, tracker,
+                                 provider_slots, on_event, use_cache, workflow_id, resume, checkpoint_store,
+                                 hedge, deadline, reuse_threshold, upstream):
+    """Run the pipeline for arun_content_pipeline inside its trace span"""
+    logger.info(f"Starting async content creation pipeline for topic: {topic}")
+    
+    # Each run gets its own tracker unless the caller supplies one
+    if tracker is None:
+        tracker = TokenTracker()
+    
+    checkpoints = None
+    if workflow_id is not None:
+        checkpoints = checkpoint_store or default_checkpoint_store
+    
+    # Check out a warmed agent set from the process pool. Building a new set imports
+    # the providers and creates their clients, so a pool miss is handled off the loop
+    agents = agent_pool.acquire_idle(brand_voice)
+    if agents is None:
+        agents = await asyncio.to_thread(agent_pool.acquire, brand_voice)
+    research_agent, brief_agent, facts_agent, content_agent = agents
     
-    results["steps"]["research"] = {
-        "prompt": research_prompt,
-        "output": research_result
+    results = {
+        "topic": topic,
+        "trace_id": tracer.current_span().trace_id,
+        "steps": {}
     }
+    if workflow_id is not None:
+        results["workflow_id"] = workflow_id
     
-    # Step 2: Create brief based on research
-    logger.info("Step 2: Running Brief Creator")
-    brief_prompt = f"""
-        You are a content strategy specialist. Based on the following research, create a brief content outline 
-        with a focus on identifying content gaps:
-        
-        {research_result}
-        
-        Include a section clearly labeled "Gap Analysis" that identifies 2-3 content opportunities 
-        competitors are missing. Keep your response under 300 words.
-        """
-    brief_response = brief_agent.run(brief_prompt)
-    brief_result = brief_response.content if hasattr(brief_response, 'content') else str(brief_response)
-    
-    # Track token usage for brief creation step
-    token_tracker.track_step(
-        step_name="brief",
-        provider="deepseek",
-        model="deepseek-chat",
-        input_text=brief_prompt,
-        output_text=brief_result
-    )
+    # The clock starts now; each stage gets its share of whatever time is left
+    budget = Deadline(deadline)
+    workflow_timer = StageTimer("workflow")
+    degraded = []
     
-    # Extract gap analysis
-    gap_analysis = extract_gap_analysis(brief_result)
+    def emit(event):
+        if on_event is None:
+            return
+        try:
+            on_event(event)
+        except Exception as e:
+            logger.warning(f"Pipeline event handler failed: {str(e)}")
     
-    results["steps"]["brief"] = {
-        "prompt": brief_prompt,
-        "output": brief_result,
-        "extracted_gap_analysis": gap_analysis
-    }
-    logger.info(f"Brief output received ({len(brief_result)} chars)")
-    logger.info(f"Gap Analysis extracted ({len(gap_analysis)} chars)")
-    
-    # Step 3: Collect facts
-    logger.info("Step 3: Running Facts Collector")
-    facts_prompt = create_facts_prompt(topic, gap_analysis)
-    
-    # Update the instructions for the facts agent
-    facts_agent.instructions = facts_prompt
-    
-    facts_response = facts_agent.run(facts_prompt)
-    facts_result = facts_response.content if hasattr(facts_response, 'content') else str(facts_response)
-    
-    # Track token usage for facts collection step
-    token_tracker.track_step(
-        step_name="facts",
-        provider="xai",
-        model="grok-beta",
-        input_text=facts_prompt,
-        output_text=facts_result
-    )
+    cached_steps = set()
+    hedged_steps = set()
     
-    results["steps"]["facts"] = {
-        "prompt": facts_prompt,
-        "output": facts_result
-    }
-    logger.info(f"Facts output received ({len(facts_result)} chars)")
+    def agent_cache_key(step_name, stage, agent, prompt):
+        model_id = getattr(getattr(agent, "model", None), "id", None) or STAGE_MODELS[stage][1]
+        return make_cache_key(step_name, model_id, prompt, agent.instructions)
     
-    # Step 4: Create content
-    logger.info("Step 4: Running Content Creator")
-    content_prompt = f"""
-        Create a {word_count}-word outline about {topic} based on:
+    async def run_agent(step_name, stage, agent, prompt, stream=False):
+        provider, model = STAGE_MODELS[stage]
         
-        RESEARCH:
-        {research_result}
+        # Identical prompt, instructions and model within the stage TTL: reuse the output
+        cache_key = None
+        if use_cache:
+            cache_key = agent_cache_key(step_name, stage, agent, prompt)
+            with timed("storage"):
+                cached = await asyncio.to_thread(stage_cache.get, step_name, cache_key)
+            if cached is not None:
+                logger.debug(f"{step_name} output served from stage cache ({len(cached)} chars)")
+                cached_steps.add(step_name)
+                if stream:
+                    emit({"type": "token", "step": step_name, "delta": cached})
+                return cached
         
-        CONTENT BRIEF:
-        {brief_result}
+        # Reserve rate limit budget for the prompt plus the most the model may generate
+        max_output_tokens = getattr(getattr(agent, "model", None), "max_tokens", None) or DEFAULT_OUTPUT_TOKEN_ESTIMATE
+        input_tokens = tracker.estimate_tokens(f"{agent.instructions or ''}\n{prompt}", model)
+        reserved_tokens = input_tokens + max_output_tokens
         
-        FACTS AND STATISTICS:
-        {facts_result}
+        async def call_primary():
+            started = time.monotonic()
+            slot = provider_slots.slot(provider) if provider_slots else contextlib.nullcontext()
+            async with slot:
+                await rate_limiter.acquire(provider, reserved_tokens)
+                try:
+                    with timed("provider"), tracer.span("model_call", step=step_name, provider=provider,
+                                                        model=model, stream=stream):
+                        if stream:
+                            # Forward each delta as it is produced and assemble the full output
+                            chunks = []
+                            async for chunk in await agent.arun(prompt, stream=True):
+                                delta = getattr(chunk, "content", None)
+                                if isinstance(delta, str) and delta:
+                                    chunks.append(delta)
+                                    emit({"type": "token", "step": step_name, "delta": delta})
+                            output = "".join(chunks)
+                        else:
+                            response = await agent.arun(prompt, stream=False)
+                            output = get_response_text(response)
+                except asyncio.CancelledError:
+                    # Lost to a hedged request: the elapsed time is a lower bound on
+                    # this call's latency, and the prompt has been paid for
+                    latency_history.record(step_name, time.monotonic() - started)
+                    tracker.track_step(step_name=step_name, provider=provider, model=model,
+                                       input_text=prompt, output_text="")
+                    rate_limiter.settle(provider, reserved_tokens, input_tokens)
+                    provider_calls.inc(provider=provider, outcome="cancelled")
+                    raise
+                except Exception as e:
+                    rate_limited = is_rate_limit_error(e)
+                    if rate_limited:
+                        rate_limiter.throttle(provider, retry_after_seconds(e))
+                    provider_calls.inc(provider=provider, outcome="rate_limited" if rate_limited else "error")
+                    raise
+            provider_calls.inc(provider=provider, outcome="ok")
+            latency_history.record(step_name, time.monotonic() - started)
+            usage = tracker.track_step(
+                step_name=step_name,
+                provider=provider,
+                model=model,
+                input_text=prompt,
+                output_text=output
+            )
+            rate_limiter.settle(provider, reserved_tokens, input_tokens + usage["output_tokens"])
+            return output
         
-        The content should be concise and practical. Focus on an outline only.
+        async def call_secondary():
+            # The same prompt through OpenRouter; its usage is attributed to hedging
+            secondary_model = policy.secondary_model
+            secondary_reserved = input_tokens + max_output_tokens
+            slot = provider_slots.slot("openrouter") if provider_slots else contextlib.nullcontext()
+            async with slot:
+                await rate_limiter.acquire("openrouter", secondary_reserved)
+                try:
+                    secondary_agent = hedge_agent_factory(agent, secondary_model)
+                    with timed("provider"), tracer.span("model_call", step=step_name, provider="openrouter",
+                                                        model=secondary_model, hedge=True):
+                        response = await secondary_agent.arun(prompt, stream=False)
+                    output = get_response_text(response)
+                except asyncio.CancelledError:
+                    tracker.track_step(step_name=step_name, provider="openrouter", model=secondary_model,
+                                       input_text=prompt, output_text="", hedge=True)
+                    rate_limiter.settle("openrouter", secondary_reserved, input_tokens)
+                    provider_calls.inc(provider="openrouter", outcome="cancelled")
+                    raise
+                except Exception as e:
+                    rate_limited = is_rate_limit_error(e)
+                    if rate_limited:
+                        rate_limiter.throttle("openrouter", retry_after_seconds(e))
+                    provider_calls.inc(provider="openrouter", outcome="rate_limited" if rate_limited else "error")
+                    raise
+            provider_calls.inc(provider="openrouter", outcome="ok")
+            usage = tracker.track_step(step_name=step_name, provider="openrouter", model=secondary_model,
+                                       input_text=prompt, output_text=output, hedge=True)
+            rate_limiter.settle("openrouter", secondary_reserved, input_tokens + usage["output_tokens"])
+            return output
+        
+        # Streamed output has already reached the client, so it is never hedged
+        policy = hedge_policies.get(stage) if hedge and not stream else None
+        delay = hedge_delay(latency_history, step_name, policy)
+        # The stage's share of the deadline covers the call, the hedge and any failover
+        timeout = budget.stage_timeout(step_name)
+        call = asyncio.ensure_future(race_with_hedge(call_primary(), call_secondary if policy else None, delay,
+                                                     failover=policy is not None and policy.failover))
+        try:
+            # asyncio.wait rather than wait_for, so a TimeoutError raised by the provider
+            # client isn't mistaken for the stage running out of time
+            done, _ = await asyncio.wait({call}, timeout=timeout)
+        finally:
+            if not call.done():
+                call.cancel()
+                await asyncio.gather(call, return_exceptions=True)
+        if not done:
+            raise DeadlineExceeded(step_name, timeout)
+        output, hedged = call.result()
+        if hedged:
+            hedged_steps.add(step_name)
+            logger.info(f"{step_name} answered by hedged request to {policy.secondary_model}")
+        logger.debug(f"{step_name} output received ({len(output)} chars)")
+        
+        if cache_key is not None:
+            with timed("storage"):
+                await asyncio.to_thread(stage_cache.set, step_name, cache_key, output)
+        return output
+    
+    async def similar_research():
+        """Cached research of the most similar earlier topic, if similar enough"""
+        with timed("storage"):
+            matches = await asyncio.to_thread(stage_cache.topics.search, topic)
+        if any(topic_key(match.topic) == topic_key(topic) for match in matches):
+            # This very topic is indexed; the stage cache will answer it exactly
+            return None
+        results["topic_matches"] = [match.to_dict() for match in matches]
+        for match in matches:
+            if match.score < reuse_threshold:
+                break
+            prompt = create_research_prompt(match.topic)
+            with timed("storage"):
+                output = await asyncio.to_thread(
+                    stage_cache.get, "research", agent_cache_key("research", "research", research_agent, prompt)
+                )
+            if output is not None:
+                logger.info(f"Reusing research of '{match.topic}' for '{topic}' (similarity {match.score})")
+                return prompt, output, match
+        return None
+    
+    async def research_stage(inputs):
+        if use_cache and reuse_threshold is not None:
+            reused = await similar_research()
+            if reused is not None:
+                prompt, output, match = reused
+                cached_steps.add("research")
+                results["steps"]["research"] = {
+                    "prompt": prompt,
+                    "output": output,
+                    "reused_from": match.to_dict()
+                }
+                return output
+        prompt = create_research_prompt(topic)
+        error = None
+        try:
+            output = await run_agent("research", "research", research_agent, prompt)
+            if use_cache and "research" not in cached_steps:
+                # Fresh research is in the stage cache now; let similar topics find it
+                with timed("storage"):
+                    await asyncio.to_thread(stage_cache.topics.add, topic)
+        except Exception as e:
+            logger.error(f"Error with OpenRouter research: {str(e)}")
+            error = str(e)
+            # Expired research for the same prompt beats no research at all
+            with timed("storage"):
+                stale = await asyncio.to_thread(
+                    stage_cache.get, "research", agent_cache_key("research", "research", research_agent, prompt), True
+                )
+            if stale is not None:
+                logger.warning("Using stale cached research")
+                degraded.append("research")
+                results["steps"]["research"] = {
+                    "prompt": prompt,
+                    "output": stale,
+                    "degraded": "stale_cache",
+                    "error": error
+                }
+                return stale
+            # Fallback message so the rest of the pipeline can continue
+            output = f"Error in research phase: {error}"
+            tracker.track_step(
+                step_name="research",
+                provider=STAGE_MODELS["research"][0],
+                model=STAGE_MODELS["research"][1],
+                input_text=prompt,
+                output_text=output
+            )
+        results["steps"]["research"] = {
+            "prompt": prompt,
+            "output": output
+        }
+        if error:
+            results["steps"]["research"]["error"] = error
+        return output
+    
+    async def brief_stage(inputs):
+        prompt = create_brief_prompt(inputs["research"])
+        output = await run_agent("brief", "brief", brief_agent, prompt)
+        gap_analysis = extract_gap_analysis(output)
+        results["steps"]["brief"] = {
+            "prompt": prompt,
+            "output": output,
+            "extracted_gap_analysis": gap_analysis
+        }
+        return output
+    
+    async def facts_prefetch_stage(inputs):
+        prompt = create_facts_prompt(topic)
+        facts_agent.instructions = prompt
+        try:
+            output = await run_agent("facts_prefetch", "facts", facts_agent, prompt)
+        except DeadlineExceeded as e:
+            # The facts stage will collect facts itself (or be skipped)
+            logger.warning(str(e))
+            degraded.append("facts_prefetch")
+            results["steps"]["facts_prefetch"] = {
+                "prompt": prompt,
+                "output": "",
+                "degraded": "skipped"
+            }
+            return ""
+        results["steps"]["facts_prefetch"] = {
+            "prompt": prompt,
+            "output": output
+        }
+        return output
+    
+    async def structure_facts(output):
+        """Parse the facts answer; only JSON that can't be repaired is sent back for one fix
+        
+        Returns:
+            tuple: (FactsReport or None, whether the model was asked for a fix)
         """
-    content_response = content_agent.run(content_prompt)
-    content_result = content_response.content if hasattr(content_response, 'content') else str(content_response)
-    
-    # Track token usage for content creation step
-    token_tracker.track_step(
-        step_name="content",
-        provider="anthropic",
-        model="claude-3-sonnet-20240229",
-        input_text=content_prompt,
-        output_text=content_result
-    )
+        try:
+            return parse_facts(output), False
+        except FactsParseError as e:
+            if not has_json_block(output):
+                # Prose without JSON is passed on as it is
+                logger.info("Facts answer has no JSON; using it as text")
+                return None, False
+            error = str(e)
+        logger.warning(f"Facts JSON unusable ({error}); asking for a fix")
+        try:
+            fixed = await run_agent("facts_fix", "facts", facts_agent, create_facts_fix_prompt(output, error))
+            return parse_facts(fixed), True
+        except Exception as e:
+            # The original answer still goes downstream as text
+            logger.warning(f"Facts fix failed: {str(e)}")
+            return None, True
+    
+    async def facts_stage(inputs):
+        gap_analysis = results["steps"]["brief"]["extracted_gap_analysis"]
+        facts_agent.instructions = create_facts_prompt(topic, gap_analysis)
+        prefetched = inputs.get("facts_prefetch")
+        if prefetched:
+            prompt = create_facts_topup_prompt(topic, gap_analysis, prefetched)
+        else:
+            prompt = facts_agent.instructions
+        try:
+            output = await run_agent("facts", "facts", facts_agent, prompt)
+        except DeadlineExceeded as e:
+            # Write the content with whatever facts there are rather than miss the deadline
+            logger.warning(str(e))
+            degraded.append("facts")
+            results["steps"]["facts"] = {
+                "prompt": prompt,
+                "output": prefetched or "",
+                "degraded": "prefetched_facts" if prefetched else "skipped"
+            }
+            try:
+                results["steps"]["facts"]["structured"] = parse_facts(prefetched).to_dict()
+            except FactsParseError:
+                pass
+            return prefetched or ""
+        results["steps"]["facts"] = {
+            "prompt": prompt,
+            "output": output
+        }
+        report, fix_requested = await structure_facts(output)
+        if report is not None:
+            results["steps"]["facts"]["structured"] = report.to_dict()
+        if fix_requested:
+            results["steps"]["facts"]["fix_requested"] = True
+        return output
+    
+    async def content_stage(inputs):
+        facts = inputs["facts"]
+        structured = results["steps"]["facts"].get("structured")
+        if structured:
+            # One line per validated record instead of the raw JSON answer
+            facts = FactsReport.from_dict(structured).to_prompt()
+        # Fit research, brief and facts into the content model's token budget
+        context = await asyncio.to_thread(
+            assemble_content_context,
+            inputs["research"], inputs["brief"], facts,
+            STAGE_MODELS["content"][1], tracker
+        )
+        prompt = create_content_prompt(topic, word_count, context["research"], context["brief"], context["facts"])
+        output = await run_agent("content", "content", content_agent, prompt, stream=on_event is not None)
+        results["steps"]["content"] = {
+            "prompt": prompt,
+            "output": output,
+            "context": context["stats"]
+        }
+        return output
     
-    results["steps"]["content"] = {
-        "prompt": content_prompt,
-        "output": content_result
-    }
-    logger.info(f"Content output received ({len(content_result)} chars)")
+    stages = [
+        Stage("research", research_stage),
+        Stage("brief", brief_stage, inputs=("research",)),
+        Stage("content", content_stage, inputs=("research", "brief", "facts")),
+    ]
+    if speculative_facts:
+        stages.append(Stage("facts_prefetch", facts_prefetch_stage))
+        stages.append(Stage("facts", facts_stage, inputs=("brief", "facts_prefetch")))
+    else:
+        stages.append(Stage("facts", facts_stage, inputs=("brief",)))
+    
+    def tracked(stage):
+        async def run(inputs):
+            emit({"type": "step", "step": stage.name, "status": "running"})
+            with tracer.span(f"stage.{stage.name}", stage=stage.name) as span, stage_timer(stage.name) as timer:
+                try:
+                    output = await stage.run(inputs)
+                except Exception as e:
+                    timing = timer.finish()
+                    stage_latency.observe(timing["duration"], stage=stage.name, status="failed")
+                    emit({"type": "step", "step": stage.name, "status": "failed", "error": str(e),
+                          "timing": timing})
+                    raise
+                step = results["steps"][stage.name]
+                # Section offsets let the API serve parts of the output without parsing it again
+                step["sections"] = index_markdown(step["output"]).to_dict()
+                if stage.name in cached_steps:
+                    step["cached"] = True
+                if stage.name in hedged_steps:
+                    step["hedged"] = True
+                for flag in ("cached", "hedged", "degraded"):
+                    if flag in step:
+                        span.set_attribute(flag, step[flag])
+                # Checkpoint as soon as the stage is done; fallback outputs are not worth keeping
+                if checkpoints is not None and "error" not in step and "degraded" not in step:
+                    with timed("storage"):
+                        await asyncio.to_thread(checkpoints.save_stage, workflow_id, stage.name, step)
+            step["timing"] = timer.finish()
+            stage_latency.observe(step["timing"]["duration"], stage=stage.name,
+                                  status="cached" if "cached" in step else "completed")
+            emit({"type": "step", "step": stage.name, "status": "completed", "output": output,
+                  "sections": step["sections"], "timing": step["timing"]})
+            return output
+        return Stage(stage.name, run, inputs=stage.inputs)
+    
+    # Stages restored from checkpoints are skipped by the graph
+    completed = {}
+    if checkpoints is not None and resume:
+        for name, step in (await asyncio.to_thread(checkpoints.load_stages, workflow_id)).items():
+            if any(stage.name == name for stage in stages):
+                results["steps"][name] = dict(step, resumed=True)
+                completed[name] = step["output"]
+                emit({"type": "step", "step": name, "status": "completed", "output": step["output"]})
+        logger.info(f"Resuming workflow {workflow_id} with checkpointed stages: {', '.join(completed) or 'none'}")
+    
+    # Research and brief shared with a related topic's run
+    if upstream is not None:
+        for name in ("research", "brief"):
+            step = upstream.get("steps", {}).get(name)
+            if name in completed or not step or "error" in step or "degraded" in step:
+                break
+            results["steps"][name] = dict(step, reused_from={"topic": upstream["topic"]})
+            results["steps"][name].pop("timing", None)
+            completed[name] = step["output"]
+            emit({"type": "step", "step": name, "status": "completed", "output": step["output"]})
     
-    # Get token usage report
-    token_usage = token_tracker.get_usage_report()
-    results["token_usage"] = token_usage
+    try:
+        await StageGraph([tracked(stage) for stage in stages]).run(completed=completed)
+    finally:
+        agent_pool.release(agents, brand_voice)
     
-    # Print token usage report
-    token_tracker.print_usage_report()
+    results["token_usage"] = tracker.get_usage_report()
+    results["deadline"] = budget.report()
+    if degraded:
+        results["degraded"] = degraded
     
-    # Save results to a file
+    # File writes run in a worker thread so they don't stall other workflows
+    save_started = time.perf_counter()
     if save_results:
-        timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
-        
-        # Create directories if they don't exist
-        os.makedirs("storage/content_results", exist_ok=True)
-        os.makedirs("storage/token_usage", exist_ok=True)
-        
-        # Save content results
-        results_filename = f"storage/content_results/content_{timestamp}.json"
-        with open(results_filename, "w") as f:
-            json.dump(results, f, indent=2)
-        logger.info(f"Content results saved to {results_filename}")
-        
-        # Save token usage report separately
-        usage_filename = f"storage/token_usage/tokens_{timestamp}.json"
-        token_tracker.save_report_to_file(usage_filename)
+        with tracer.span("save_results"):
+            record_id = await asyncio.to_thread(save_pipeline_results, results, tracker)
+        if record_id is not None:
+            results["result_id"] = record_id
+    
+    # The workflow finished, so its checkpoints are no longer needed
+    if checkpoints is not None:
+        await asyncio.to_thread(checkpoints.clear, workflow_id)
+    save_seconds = time.perf_counter() - save_started
+    
+    # Set after saving, so the saved file has the stage timings but not this summary
+    timing = workflow_timer.finish()
+    results["timing"] = {
+        "started_at": timing["started_at"],
+        "finished_at": timing["finished_at"],
+        "duration": timing["duration"],
+        "save_seconds": round(save_seconds, 4)
+    }
     
-    logger.info("Content creation pipeline completed")
+    logger.info("Async content creation pipeline completed")
     return results
 
 def main():
@@ -556,4 +980,5 @@ def main():
         logger.exception(f"Error in content creation process: {str(e)}")
 
 if __name__ == "__main__":
+    configure_logging()
     main() 
\ No newline at end of file
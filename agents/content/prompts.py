@@ -0,0 +1,312 @@
+"""
+Compiled prompt and instruction templates for the content agents.
+
+Templates are dedented and split into literal text and `{slot}` fields once, when
+the module is imported; rendering a prompt only joins the literals with the slot
+values. Instructions that depend on nothing but the brand voice are rendered once
+per brand voice and memoised by its fingerprint.
+
+Keeping the static text byte-for-byte identical between requests also keeps the
+prompts' prefixes stable, which is what provider-side prompt caching keys on.
+"""
+
+import datetime
+import functools
+import threading
+from collections import OrderedDict
+from string import Formatter
+from textwrap import dedent
+from typing import Any, Dict, List, Optional, Tuple
+
+from agents.content.agent_pool import brand_voice_fingerprint
+
+# Brand voices whose rendered instructions are kept
+BRAND_VOICE_CACHE_SIZE = 256
+
+
+class PromptTemplate:
+    """
+    A template compiled into literal parts and named slots.
+
+    Uses str.format syntax for slots (`{topic}`; literal braces are doubled), but
+    without format specs or attribute access, which no prompt needs.
+    """
+
+    def __init__(self, name: str, text: str, strip_indent: bool = True):
+        """
+        Compile a template.
+
+        Args:
+            name: Template name
+            text: Template text
+            strip_indent: Dedent the text once at compile time
+        """
+        self.name = name
+        self.text = dedent(text) if strip_indent else text
+        self.parts: List[Tuple[str, Optional[str]]] = []
+        for literal, field, spec, conversion in Formatter().parse(self.text):
+            if spec or conversion:
+                raise ValueError(f"Template {name} uses a format spec or conversion in {{{field}}}")
+            self.parts.append((literal, field))
+        self.slots = tuple(field for _, field in self.parts if field is not None)
+
+    def render(self, **values: Any) -> str:
+        """
+        Substitute the slots.
+
+        Raises:
+            KeyError: If a slot has no value
+        """
+        if not self.slots:
+            return self.text
+        out = []
+        for literal, field in self.parts:
+            out.append(literal)
+            if field is not None:
+                out.append(str(values[field]))
+        return "".join(out)
+
+
+class TemplateRegistry:
+    """
+    Named, pre-compiled templates.
+    """
+
+    def __init__(self):
+        self._templates: Dict[str, PromptTemplate] = {}
+
+    def register(self, name: str, text: str, strip_indent: bool = True) -> PromptTemplate:
+        template = PromptTemplate(name, text, strip_indent)
+        self._templates[name] = template
+        return template
+
+    def get(self, name: str) -> PromptTemplate:
+        return self._templates[name]
+
+    def render(self, name: str, **values: Any) -> str:
+        return self._templates[name].render(**values)
+
+    def names(self) -> List[str]:
+        return list(self._templates)
+
+
+# Global registry of the content pipeline's templates
+prompts = TemplateRegistry()
+
+prompts.register("research_instructions", """
+    You are a content research specialist.
+
+    When given a topic:
+    1. Search for top-ranking content on this topic
+    2. Analyze their structure, style, and coverage
+    3. Identify common topics, subtopics, and patterns
+    4. Determine content styles that perform well
+    5. Provide a comprehensive analysis summary
+
+    Your output should be a detailed analysis report that includes:
+    - Key topics covered by top-performing content
+    - Common content structures and formats
+    - Typical tone and style elements
+    - Depth of coverage in successful content
+    - Notable authority signals used
+""")
+
+prompts.register("brief_instructions", """
+    You are a content strategy specialist.
+
+    When given a research analysis:
+    1. Identify content gaps and opportunities
+    2. Create a detailed content brief that includes:
+       - Recommended structure and outline
+       - Key topics to cover thoroughly
+       - Content differentiation strategy
+       - E-E-A-T signals to include
+       - Target word count and depth
+
+    Your brief should provide clear direction for content creation
+    that will outperform existing content.
+
+    IMPORTANT: Include a section clearly labeled "Gap Analysis" that summarizes the key content gaps
+    and opportunities you've identified. This section will be used by the Facts Collector agent
+    to gather targeted real-time data. Be specific about underserved topics, angles, or questions
+    that competitors are not addressing adequately.
+""")
+
+prompts.register("content_instructions", """
+    You are an expert content creator.
+
+    When given a content brief and supporting facts:
+    1. Create engaging, high-quality content that:
+       - Follows the structure in the brief
+       - Addresses all required topics thoroughly
+       - Incorporates facts and figures naturally
+       - Maintains a consistent, appropriate tone
+       - Sounds authentically human, not AI-generated
+       - Demonstrates expertise and authority
+
+    Your content should be publication-ready and exceed
+    the quality of competing content on the same topic.
+""")
+
+prompts.register("brand_voice", """
+    BRAND VOICE GUIDELINES:
+
+    Tone: {tone}
+
+    Style: {style}
+
+    Sentence Structure: {sentence_structure}
+
+    Language: {language}
+
+    Taboo Words/Phrases: {taboo_words}
+
+    Persuasion Techniques: {persuasion}
+
+    Content Format: {format}
+
+    YOU MUST STRICTLY ADHERE TO THESE BRAND VOICE GUIDELINES IN ALL CONTENT YOU CREATE.
+""")
+
+prompts.register("facts", """\
+Fetch real-time data as of {date}, related to '{topic}' for an SEO-optimized blog. Include:
+1. The latest statistics or facts from credible web sources (e.g., travel reports, news articles, industry blogs).
+2. Trending discussions or insights from X posts, YouTube videos/comments, Reddit threads, Hacker News posts, and other relevant social platforms (e.g., hashtags, sentiments, key topics).
+3. A concise summary linking the data to the keyword and suggesting how it can enhance SEO relevance.
+""", strip_indent=False)
+
+prompts.register("facts_gap_analysis", """\
+If a content gap analysis is provided below, incorporate it to identify unique angles or underserved topics competitors may have missed.
+
+---BEGIN GAP ANALYSIS---
+{gap_analysis}
+---END GAP ANALYSIS---
+""", strip_indent=False)
+
+prompts.register("facts_format", """\
+Return the response in JSON format with fields: 'stats' (list of facts with sources and dates), 'social_insights' (list of trends with platform, sentiment, and examples), and 'summary' (text tying it to the keyword and SEO goals).
+
+Keep your response concise, with 3-5 stats and 2-3 social insights at most.""", strip_indent=False)
+
+prompts.register("facts_topup", """\
+Facts about '{topic}' have already been collected:
+
+---BEGIN COLLECTED FACTS---
+{prefetched_facts}
+---END COLLECTED FACTS---
+
+The content brief identified these gaps:
+
+---BEGIN GAP ANALYSIS---
+{gap_analysis}
+---END GAP ANALYSIS---
+
+Add at most 2 new stats or social insights that address these gaps, and only if the collected facts do not already cover them. Return the same JSON format with fields 'stats', 'social_insights', and 'summary', keeping the collected entries and adding the new ones.""", strip_indent=False)
+
+prompts.register("research", "Analyze content structure and trends for '{topic}' in 300 words or less")
+
+prompts.register("brief", """
+    You are a content strategy specialist. Based on the following research, create a brief content outline
+    with a focus on identifying content gaps:
+
+    {research_result}
+
+    Include a section clearly labeled "Gap Analysis" that identifies 2-3 content opportunities
+    competitors are missing. Keep your response under 300 words.
+""")
+
+prompts.register("content", """
+    Create a {word_count}-word outline about {topic} based on:
+
+    RESEARCH:
+    {research_result}
+
+    CONTENT BRIEF:
+    {brief_result}
+
+    FACTS AND STATISTICS:
+    {facts_result}
+
+    The content should be concise and practical. Focus on an outline only.
+""")
+
+# Values used for brand voice fields the caller leaves out
+BRAND_VOICE_DEFAULTS = {
+    "tone": "Professional and authoritative",
+    "style": "Clear, concise, and engaging",
+    "sentence_structure": "Varied sentence length with a mix of simple and complex structures",
+    "language": "Use industry terminology appropriately, but explain complex concepts clearly",
+    "taboo_words": ["clearly", "obviously", "simply", "just"],
+    "persuasion": "Use evidence-based arguments, social proof, and specific examples",
+    "format": "Use clear headings, bullet points for lists, and short paragraphs",
+}
+
+_content_instructions: "OrderedDict[str, str]" = OrderedDict()
+_content_instructions_lock = threading.Lock()
+
+
+def render_brand_voice(brand_voice: Dict[str, Any]) -> str:
+    """
+    Brand voice guidelines block for the Content Creator.
+
+    Args:
+        brand_voice: Brand voice parameters; missing fields use BRAND_VOICE_DEFAULTS
+
+    Returns:
+        The rendered guidelines
+    """
+    values = {name: brand_voice.get(name, default) for name, default in BRAND_VOICE_DEFAULTS.items()}
+    values["taboo_words"] = ", ".join(values["taboo_words"])
+    return prompts.render("brand_voice", **values)
+
+
+def content_instructions(brand_voice: Optional[Dict[str, Any]] = None) -> str:
+    """
+    Content Creator instructions, with the brand voice guidelines if one is given.
+
+    Rendered once per distinct brand voice (by brand_voice_fingerprint) and
+    served from memory afterwards; the least recently used entries are dropped
+    beyond BRAND_VOICE_CACHE_SIZE.
+
+    Args:
+        brand_voice: Brand voice parameters, or None for the default voice
+
+    Returns:
+        The instructions
+    """
+    fingerprint = brand_voice_fingerprint(brand_voice)
+    with _content_instructions_lock:
+        cached = _content_instructions.get(fingerprint)
+        if cached is not None:
+            _content_instructions.move_to_end(fingerprint)
+            return cached
+
+    instructions = prompts.render("content_instructions")
+    if brand_voice:
+        instructions += "\n\n" + render_brand_voice(brand_voice)
+
+    with _content_instructions_lock:
+        _content_instructions[fingerprint] = instructions
+        while len(_content_instructions) > BRAND_VOICE_CACHE_SIZE:
+            _content_instructions.popitem(last=False)
+    return instructions
+
+
+@functools.lru_cache(maxsize=8)
+def _format_date(day: datetime.date) -> str:
+    return day.strftime("%B %d, %Y")
+
+
+def formatted_date() -> str:
+    """Current date formatted as Month Day, Year, rendered once per day."""
+    return _format_date(datetime.date.today())
+
+
+def facts_prompt(topic: str, gap_analysis: Optional[str] = None) -> str:
+    """
+    Facts Collector prompt; see create_facts_prompt in the pipeline.
+    """
+    prompt = prompts.render("facts", date=formatted_date(), topic=topic)
+    if gap_analysis:
+        prompt += prompts.render("facts_gap_analysis", gap_analysis=gap_analysis)
+    return prompt + prompts.render("facts_format")
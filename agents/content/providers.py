@@ -0,0 +1,107 @@
+"""
+Storage and tool classes of the content agents, which need the agno provider stack.
+
+Importing agno's agents, models and tools pulls in every provider SDK (openai,
+anthropic, httpx, ...), which takes well over a second. The pipeline imports this
+module, and the model classes, only when it first builds agents, so the API can
+start and answer health checks without them.
+"""
+
+import time
+import asyncio
+import logging
+import threading
+from dataclasses import asdict
+from typing import Any, Dict, Optional, Set
+
+from agno.storage.json import JsonStorage
+from agno.storage.session.agent import AgentSession
+from agno.storage.session.team import TeamSession
+from agno.storage.session.workflow import WorkflowSession
+from agno.tools.duckduckgo import DuckDuckGoTools
+
+from agents.utils.timing import timed, timed_call
+from agents.utils.tracing import traced_call
+
+logger = logging.getLogger("content_creation.storage")
+
+# Session class read back for each storage mode, as in JsonStorage.read
+_SESSION_CLASSES = {"agent": AgentSession, "team": TeamSession, "workflow": WorkflowSession}
+
+
+class TimedJsonStorage(JsonStorage):
+    """
+    JsonStorage whose session writes count towards the running stage's storage time.
+
+    agno writes the session synchronously at the end of every Agent.arun. Called on
+    an event loop, upsert() snapshots the session and hands the file write to a
+    worker thread, so one workflow's disk I/O doesn't stall the others. Reads of a
+    session with a write still pending are served from the snapshot.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._lock = threading.Lock()
+        # Latest snapshot per session whose write hasn't reached disk yet
+        self._pending: Dict[str, Dict[str, Any]] = {}
+        self._writes: Set[asyncio.Task] = set()
+
+    def upsert(self, session):
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            with timed("storage"):
+                return super().upsert(session)
+
+        data = asdict(session)
+        data["updated_at"] = int(time.time())
+        data.setdefault("created_at", data["updated_at"])
+        with self._lock:
+            # A session already in _pending has a writer that will pick up this snapshot
+            writing = session.session_id in self._pending
+            self._pending[session.session_id] = data
+        if not writing:
+            task = loop.create_task(asyncio.to_thread(self._write_pending, session.session_id))
+            self._writes.add(task)
+            task.add_done_callback(self._writes.discard)
+        return session
+
+    def _write_pending(self, session_id: str):
+        """Write a session's latest snapshot until no newer one is waiting."""
+        while True:
+            with self._lock:
+                data = self._pending[session_id]
+            try:
+                with timed("storage"):
+                    with open(self.dir_path / f"{session_id}.json", "w", encoding="utf-8") as f:
+                        f.write(self.serialize(data))
+            except OSError as e:
+                logger.error(f"Error writing session {session_id}: {e}")
+            with self._lock:
+                if self._pending[session_id] is data:
+                    del self._pending[session_id]
+                    return
+
+    def read(self, session_id: str, user_id: Optional[str] = None):
+        with self._lock:
+            data = self._pending.get(session_id)
+        if data is None:
+            return super().read(session_id, user_id)
+        # Round-trip like a disk read so the caller can't mutate the pending snapshot
+        data = self.deserialize(self.serialize(data))
+        if user_id and data["user_id"] != user_id:
+            return None
+        return _SESSION_CLASSES[self.mode].from_dict(data)
+
+    async def flush(self):
+        """Wait for the session writes handed to worker threads so far."""
+        while self._writes:
+            await asyncio.gather(*list(self._writes), return_exceptions=True)
+
+
+class TimedDuckDuckGoTools(DuckDuckGoTools):
+    """DuckDuckGoTools whose searches are traced and count towards the running stage's tool time"""
+
+    def register(self, function, sanitize_arguments=True):
+        traced = traced_call(f"tool.{function.__name__}", function, tool=function.__name__)
+        super().register(timed_call("tool", traced), sanitize_arguments=sanitize_arguments)
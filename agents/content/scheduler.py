@@ -0,0 +1,118 @@
+"""
+Small dependency-graph executor for pipeline stages.
+
+Each stage declares the stages whose outputs it needs. A stage starts as soon as
+all of its inputs are available, so independent stages run concurrently and the
+wall-clock time of a run is bounded by its critical path.
+"""
+
+import asyncio
+import logging
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger("content_creation.scheduler")
+
+
+@dataclass
+class Stage:
+    """
+    A unit of work in a stage graph.
+
+    Attributes:
+        name: Unique stage name; its output is stored under this key
+        run: Coroutine function called with a dict of the outputs of its inputs
+        inputs: Names of the stages that must finish before this one starts
+    """
+    name: str
+    run: Callable[[Dict[str, Any]], Awaitable[Any]]
+    inputs: Tuple[str, ...] = ()
+
+
+class StageGraph:
+    """
+    Executes a set of stages respecting their declared dependencies.
+    """
+
+    def __init__(self, stages: Iterable[Stage]):
+        """
+        Initialize the graph.
+
+        Args:
+            stages: Stages to run; names must be unique and inputs must refer to other stages
+
+        Raises:
+            ValueError: If a stage name is duplicated, an input is unknown, or the graph has a cycle
+        """
+        self.stages: Dict[str, Stage] = {}
+        for stage in stages:
+            if stage.name in self.stages:
+                raise ValueError(f"Duplicate stage name: {stage.name}")
+            self.stages[stage.name] = stage
+
+        for stage in self.stages.values():
+            unknown = [name for name in stage.inputs if name not in self.stages]
+            if unknown:
+                raise ValueError(f"Stage '{stage.name}' depends on unknown stages: {', '.join(unknown)}")
+
+        self.order = self._topological_order()
+
+    def _topological_order(self) -> List[str]:
+        """Return stage names so that every stage comes after its inputs."""
+        order = []
+        state: Dict[str, str] = {}
+
+        def visit(name: str):
+            if state.get(name) == "done":
+                return
+            if state.get(name) == "visiting":
+                raise ValueError(f"Stage graph has a cycle through '{name}'")
+            state[name] = "visiting"
+            for dependency in self.stages[name].inputs:
+                visit(dependency)
+            state[name] = "done"
+            order.append(name)
+
+        for name in self.stages:
+            visit(name)
+        return order
+
+    async def run(self, completed: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Run every stage once its inputs are ready.
+
+        Args:
+            completed: Outputs of stages that already ran; those stages are skipped
+
+        Returns:
+            Dictionary mapping stage names to their outputs
+
+        Raises:
+            Exception: The first stage failure; stages still running are cancelled
+        """
+        outputs: Dict[str, Any] = dict(completed or {})
+        tasks: Dict[str, asyncio.Task] = {}
+
+        async def run_stage(stage: Stage) -> Any:
+            if stage.inputs:
+                await asyncio.gather(*(tasks[name] for name in stage.inputs if name in tasks))
+            inputs = {name: outputs[name] for name in stage.inputs}
+            logger.debug(f"Stage '{stage.name}' started")
+            output = await stage.run(inputs)
+            outputs[stage.name] = output
+            logger.debug(f"Stage '{stage.name}' finished")
+            return output
+
+        for name in self.order:
+            if name in outputs:
+                continue
+            tasks[name] = asyncio.create_task(run_stage(self.stages[name]), name=f"stage:{name}")
+
+        try:
+            await asyncio.gather(*tasks.values())
+        except BaseException:
+            for task in tasks.values():
+                task.cancel()
+            await asyncio.gather(*tasks.values(), return_exceptions=True)
+            raise
+
+        return outputs
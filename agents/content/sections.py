@@ -0,0 +1,246 @@
+"""
+One-pass section index for markdown agent outputs.
+
+Briefs, facts and articles are looked up by section several times per workflow
+(gap analysis, outline, the API's section view). Instead of running a regex over
+the whole output for every lookup, the output is scanned once into a heading
+tree with character offsets plus a table of "Label: value" paragraphs; lookups
+by title are then dictionary hits and section text is a slice.
+
+Headings are ATX headings (`## Title`) and lines that are entirely bold
+(`**Title**` or `**Title:**`), which models use as headings too; bold headings
+rank below every ATX level. Nothing inside fenced code blocks is indexed.
+
+Indexes are cached by output text, so every stage asking about the same output
+shares one parse, and the section offsets are stored on the step results so the
+API can serve sections without parsing again (see MarkdownIndex.from_dict).
+"""
+
+import re
+import functools
+from dataclasses import asdict, dataclass
+from typing import Any, Dict, List, Optional
+
+# Level given to bold-line headings, below all ATX levels
+BOLD_HEADING_LEVEL = 7
+
+_ATX_HEADING = re.compile(r"^\s*(#{1,6})\s+(.+?)\s*#*\s*$")
+_BOLD_HEADING = re.compile(r"^\s*(?:\*\*|__)([^*_\n]+?)(?:\*\*|__)\s*:?\s*$")
+_LABEL = re.compile(r"^\s*(?:[-*+]\s+)?(?:\*\*|__)?([A-Za-z0-9][^:*_\n]{0,60}?)\s*(?:\*\*|__)?\s*:(?:\*\*|__)?\s*(.*)$")
+_FENCE = re.compile(r"^\s*(```|~~~)")
+_NUMBERING = re.compile(r"^\d+[.)]\s*")
+_SPACES = re.compile(r"\s+")
+
+
+def normalize_title(title: str) -> str:
+    """
+    Lookup key for a heading or label: lower case, without numbering,
+    emphasis, trailing colon or repeated whitespace.
+    """
+    key = _SPACES.sub(" ", (title or "").strip(" \t*_`")).strip()
+    key = _NUMBERING.sub("", key).rstrip(" :")
+    return key.lower()
+
+
+@dataclass
+class Section:
+    """
+    One heading and the text it governs.
+
+    Offsets index into the indexed text: the section spans [start, end), the
+    heading line ends at body_start, and content_end is where the next heading
+    of any level starts (so [body_start, content_end) excludes subsections).
+    """
+    title: str
+    level: int
+    start: int
+    body_start: int
+    content_end: int
+    end: int
+    parent: Optional[int] = None
+
+    @property
+    def key(self) -> str:
+        return normalize_title(self.title)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+@dataclass
+class Label:
+    """A "Label: value" paragraph; the value runs to a blank line or heading."""
+    name: str
+    start: int
+    value_start: int
+    end: int
+
+
+class MarkdownIndex:
+    """
+    Heading tree and labels of one text, with O(1) lookups by title.
+    """
+
+    def __init__(self, text: str, sections: List[Section], labels: Optional[Dict[str, Label]] = None):
+        """
+        Initialize the index.
+
+        Args:
+            text: The indexed text
+            sections: Sections in document order
+            labels: Labels by normalized name
+        """
+        self.text = text
+        self.sections = sections
+        self.labels = labels or {}
+        self._by_key: Dict[str, int] = {}
+        for position, section in enumerate(sections):
+            # The first section with a given title wins, as in a top-down read
+            self._by_key.setdefault(section.key, position)
+
+    @classmethod
+    def from_dict(cls, text: str, sections: List[Dict[str, Any]]) -> "MarkdownIndex":
+        """
+        Rebuild an index from stored section offsets without parsing the text.
+
+        Labels aren't stored, so only heading lookups are available.
+        """
+        return cls(text, [Section(**section) for section in sections])
+
+    def to_dict(self) -> List[Dict[str, Any]]:
+        """Section offsets for storing alongside the text."""
+        return [section.to_dict() for section in self.sections]
+
+    def find(self, title: str, prefix: bool = False) -> Optional[Section]:
+        """
+        Section with the given title.
+
+        Args:
+            title: Heading text; matching ignores case, numbering and emphasis
+            prefix: Also accept headings that merely start with the title
+                (e.g. "Gap Analysis and Opportunities"), if none matches exactly
+
+        Returns:
+            The first matching section, or None
+        """
+        key = normalize_title(title)
+        position = self._by_key.get(key)
+        if position is not None:
+            return self.sections[position]
+        if prefix:
+            for section in self.sections:
+                if section.key.startswith(key):
+                    return section
+        return None
+
+    def section_text(self, section: Section, nested: bool = True, heading: bool = False) -> str:
+        """
+        Text of a section.
+
+        Args:
+            section: Section of this index
+            nested: Include subsections
+            heading: Include the heading line
+        """
+        start = section.start if heading else section.body_start
+        end = section.end if nested else section.content_end
+        return self.text[start:end].strip()
+
+    def get(self, title: str, default: Optional[str] = None, nested: bool = True) -> Optional[str]:
+        """Body of the section with the given title, or default."""
+        section = self.find(title)
+        return default if section is None else self.section_text(section, nested=nested)
+
+    def children(self, section: Section) -> List[Section]:
+        position = self.sections.index(section)
+        return [child for child in self.sections if child.parent == position]
+
+    def label(self, name: str) -> Optional[str]:
+        """Value of the first "name: value" paragraph, or None."""
+        label = self.labels.get(normalize_title(name))
+        if label is None:
+            return None
+        return self.text[label.value_start:label.end].strip()
+
+    def preamble(self) -> str:
+        """Text before the first heading."""
+        end = self.sections[0].start if self.sections else len(self.text)
+        return self.text[:end].strip()
+
+
+def parse_markdown(text: str) -> MarkdownIndex:
+    """
+    Index a text in a single pass over its lines.
+
+    Args:
+        text: Markdown text
+
+    Returns:
+        Its index
+    """
+    text = text or ""
+    sections: List[Section] = []
+    labels: Dict[str, Label] = {}
+    open_sections: List[int] = []
+    label: Optional[Label] = None
+    in_fence = False
+    position = 0
+
+    def close_label(at):
+        nonlocal label
+        if label is not None:
+            label.end = at
+            labels.setdefault(normalize_title(label.name), label)
+            label = None
+
+    for line in text.splitlines(keepends=True):
+        line_start, position = position, position + len(line)
+        stripped = line.strip()
+
+        if _FENCE.match(line):
+            in_fence = not in_fence
+            close_label(line_start)
+            continue
+        if in_fence:
+            continue
+        if not stripped:
+            close_label(line_start)
+            continue
+
+        level = title = None
+        match = _ATX_HEADING.match(line)
+        if match:
+            level, title = len(match.group(1)), match.group(2)
+        else:
+            match = _BOLD_HEADING.match(line)
+            if match:
+                level, title = BOLD_HEADING_LEVEL, match.group(1)
+
+        if level is not None:
+            close_label(line_start)
+            if sections:
+                sections[-1].content_end = min(sections[-1].content_end, line_start)
+            while open_sections and sections[open_sections[-1]].level >= level:
+                sections[open_sections.pop()].end = line_start
+            parent = open_sections[-1] if open_sections else None
+            sections.append(Section(title.strip(), level, line_start, position,
+                                    len(text), len(text), parent))
+            open_sections.append(len(sections) - 1)
+            continue
+
+        if label is None:
+            match = _LABEL.match(line)
+            if match:
+                label = Label(match.group(1), line_start, line_start + match.start(2), position)
+
+    close_label(len(text))
+    return MarkdownIndex(text, sections, labels)
+
+
+@functools.lru_cache(maxsize=128)
+def index_markdown(text: str) -> MarkdownIndex:
+    """
+    Cached parse_markdown: stages and the API asking about the same output share
+    one index. Treat the returned index as read-only.
+    """
+    return parse_markdown(text)
@@ -18,11 +18,9 @@ from agno.models.anthropic import Claude
 from agno.models.deepseek import DeepSeek
 from agno.storage.json import JsonStorage
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
-)
+from agents.utils.fake_llm import fake_llm_enabled, maybe_fake
+from agents.utils.logging_config import configure_logging
+
 logger = logging.getLogger("prompt_engineering")
 
 # Ensure storage directory exists
@@ -34,6 +32,10 @@ storage = JsonStorage(dir_path=str(STORAGE_DIR))
 
 def check_api_keys():
     """Verify that all required API keys are available."""
+    if fake_llm_enabled():
+        logger.info("FAKE_LLM is set; using offline fake models instead of provider APIs")
+        return True
+    
     required_keys = ["OPENAI_API_KEY", "ANTHROPIC_API_KEY", "DEEPSEEK_API_KEY"]
     missing_keys = [key for key in required_keys if not os.getenv(key)]
     
@@ -48,7 +50,7 @@ def create_structure_testing_agent():
     structure_agent = Agent(
         name="Structure Testing Agent",
         role="Tests organizational changes to prompts",
-        model=Claude(id="claude-3-sonnet-20240229"),
+        model=maybe_fake(Claude(id="claude-3-sonnet-20240229")),
         description=dedent("""\
             You are a prompt engineering expert specialized in analyzing and improving 
             the structural elements of prompts. Your expertise lies in:
@@ -105,7 +107,7 @@ def create_language_testing_agent():
     language_agent = Agent(
         name="Language Testing Agent",
         role="Tests linguistic elements of prompts",
-        model=DeepSeek(id="deepseek-chat"),
+        model=maybe_fake(DeepSeek(id="deepseek-chat")),
         description=dedent("""\
             You are a prompt engineering expert specialized in analyzing and improving 
             the linguistic elements of prompts. Your expertise lies in:
@@ -162,7 +164,7 @@ def create_length_testing_agent():
     length_agent = Agent(
         name="Length Testing Agent",
         role="Tests verbosity and detail level in prompts",
-        model=OpenAIChat(id="gpt-4o"),
+        model=maybe_fake(OpenAIChat(id="gpt-4o")),
         description=dedent("""\
             You are a prompt engineering expert specialized in analyzing and improving 
             the verbosity and detail level of prompts. Your expertise lies in:
@@ -219,7 +221,7 @@ def create_test_execution_agent():
     test_agent = Agent(
         name="Test Execution Agent",
         role="Executes tests across prompt variations",
-        model=OpenAIChat(id="gpt-4o"),
+        model=maybe_fake(OpenAIChat(id="gpt-4o")),
         description=dedent("""\
             You are a prompt engineering test coordinator specialized in running 
             systematic tests of prompt variations. Your expertise lies in:
@@ -288,7 +290,7 @@ def create_analysis_agent():
     analysis_agent = Agent(
         name="Analysis Agent",
         role="Analyzes test results and recommends improvements",
-        model=OpenAIChat(id="gpt-4o"),
+        model=maybe_fake(OpenAIChat(id="gpt-4o")),
         description=dedent("""\
             You are a prompt engineering analyst specialized in interpreting test results
             and recommending prompt improvements. Your expertise lies in:
@@ -398,7 +400,7 @@ def create_prompt_engineering_team():
     prompt_team = Team(
         name="Prompt Engineering Team",
         mode="coordinate",  # Use coordinate mode for parallel agent execution
-        model=OpenAIChat(id="gpt-4o"),
+        model=maybe_fake(OpenAIChat(id="gpt-4o")),
         members=[structure_agent, language_agent, length_agent, test_agent, analysis_agent],
         storage=storage,
         instructions=team_instructions,
@@ -414,6 +416,8 @@ def create_prompt_engineering_team():
 
 # Example usage
 if __name__ == "__main__":
+    configure_logging()
+
     # Sample base prompt to test
     base_prompt = dedent("""\
         You are a helpful financial advisor. 
@@ -17,19 +17,20 @@ from agno.models.anthropic import Claude
 from agno.storage.json import JsonStorage
 from agno.tools.duckduckgo import DuckDuckGoTools
 
+from agents.utils.fake_llm import fake_llm_enabled, maybe_fake
+from agents.utils.logging_config import configure_logging
+
 # Load environment variables from .env file
 load_dotenv()
 
-# Configure logging
-logging.basicConfig(
-    level=logging.DEBUG,
-    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
-)
-
 logger = logging.getLogger("agent_template")
 
 def check_api_keys():
     """Check if required API keys are set"""
+    if fake_llm_enabled():
+        logger.info("FAKE_LLM is set; using offline fake models instead of provider APIs")
+        return True
+    
     missing_keys = []
     
     if not os.getenv("OPENAI_API_KEY"):
@@ -66,7 +67,7 @@ def create_agents():
     agent1 = Agent(
         name="First Agent",
         role="Describe the role of this agent",
-        model=OpenAIChat(id="gpt-3.5-turbo", api_key=openai_api_key),
+        model=maybe_fake(OpenAIChat(id="gpt-3.5-turbo", api_key=openai_api_key)),
         storage=storage,
         tools=[DuckDuckGoTools()],
         instructions=dedent("""
@@ -87,7 +88,7 @@ def create_agents():
     agent2 = Agent(
         name="Second Agent",
         role="Describe the role of this agent",
-        model=Claude(id="claude-3-sonnet-20240229", api_key=anthropic_api_key),
+        model=maybe_fake(Claude(id="claude-3-sonnet-20240229", api_key=anthropic_api_key)),
         storage=storage,
         instructions=dedent("""
             You are an expert at your specific task.
@@ -197,4 +198,5 @@ def main():
         logger.exception(f"Error in pipeline process: {str(e)}")
 
 if __name__ == "__main__":
+    configure_logging()
     main() 
\ No newline at end of file
@@ -3,5 +3,9 @@ Utility modules for agent functionality.
 """
 
 from .token_tracker import token_tracker
+from .stage_cache import StageCache, stage_cache
+from .rate_limiter import ProviderRateLimiter, rate_limiter
+from .single_flight import SingleFlight
+from .timing import StageTimer
 
-__all__ = ["token_tracker"] 
\ No newline at end of file
+__all__ = ["token_tracker", "StageCache", "stage_cache", "ProviderRateLimiter", "rate_limiter", "SingleFlight", "StageTimer"] 
\ No newline at end of file
@@ -0,0 +1,284 @@
+"""
+Deterministic stand-in model for offline load and latency testing.
+
+FakeLLM is an agno Model that never touches the network. It answers with canned
+or templated text, sleeps according to a configurable latency distribution,
+reports token usage, and fails at a configurable rate, so the orchestration,
+API and token tracker can be exercised and benchmarked without API keys.
+
+Set FAKE_LLM=1 to swap it in for every model built by the content pipeline, the
+template pipeline and the prompt engineering team (see maybe_fake).
+"""
+
+import os
+import math
+import time
+import random
+import asyncio
+import hashlib
+import logging
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional
+
+from agno.exceptions import ModelProviderError
+from agno.models.base import Model
+from agno.models.message import Message
+from agno.models.response import ModelResponse
+
+logger = logging.getLogger("fake_llm")
+
+LATENCY_DISTRIBUTIONS = ("fixed", "uniform", "lognormal")
+
+# Canned answers per role. {topic} is the first line of the prompt, shortened.
+ROLE_RESPONSES = {
+    "research": (
+        "# Research Analysis: {topic}\n\n"
+        "## Key Topics\n- Fundamentals of {topic}\n- Common mistakes\n- Tools and setup\n\n"
+        "## Content Structures\n- Listicles with 7-10 tips\n- Step-by-step guides\n\n"
+        "## Tone and Style\n- Practical, friendly, example-driven\n"
+    ),
+    "brief": (
+        "## Outline\n- Introduction to {topic}\n- Core techniques\n- Tools worth buying\n- Conclusion\n\n"
+        "## Gap Analysis\nCompetitors rarely cover budget options or long-term maintenance of {topic}.\n"
+    ),
+    "facts": (
+        '```json\n{"stats": ['
+        '{"fact": "62% of readers searching for {topic} want a quick checklist", "source": "Example Survey", "date": "2024"}, '
+        '{"fact": "Interest in {topic} grew 18% year over year", "source": "Example Trends", "date": "2024"}, '
+        '{"fact": "3 in 4 experts recommend starting small", "source": "Example Panel", "date": "2024"}], '
+        '"social_insights": [{"trend": "Before-and-after photos of {topic}", "platform": "Reddit", '
+        '"sentiment": "positive", "examples": ["r/productivity weekly thread"]}], '
+        '"summary": "Checklists and small first steps resonate with readers interested in {topic}."}\n```\n'
+    ),
+    "content": (
+        "# {topic}\n\n"
+        "## Introduction\nA practical outline for getting {topic} right.\n\n"
+        "## Core Techniques\n- Start small\n- Measure what matters\n\n"
+        "## Conclusion\nPick one change and try it this week.\n"
+    ),
+}
+
+DEFAULT_RESPONSE = "# Response\n\nFake answer about {topic}.\n"
+
+FILLER = (
+    "This sentence pads the fake response so token counts resemble a real model answer."
+)
+
+
+class FakeProviderError(ModelProviderError):
+    """Injected provider failure; status_code 429 is treated as a rate limit."""
+
+
+def fake_llm_enabled() -> bool:
+    """Whether FAKE_LLM is set to a truthy value."""
+    return os.getenv("FAKE_LLM", "").strip().lower() in ("1", "true", "yes", "on")
+
+
+def _message_text(message: Message) -> str:
+    content = message.content
+    if isinstance(content, str):
+        return content
+    if isinstance(content, list):
+        return " ".join(part.get("text", "") if isinstance(part, dict) else str(part) for part in content)
+    return "" if content is None else str(content)
+
+
+def _estimate_tokens(text: str) -> int:
+    # Roughly four tokens for every three words
+    return (len(text.split()) * 4 + 2) // 3
+
+
+@dataclass
+class FakeLLM(Model):
+    """
+    Offline agno model with deterministic outputs, latency, token counts and errors.
+
+    Every random choice is seeded by `seed` and the prompt, so the same prompt gets
+    the same answer, latency and error regardless of call order or concurrency.
+
+    Attributes:
+        role: Key into ROLE_RESPONSES used when `response_template` is not set
+        response_template: Template for the answer; {topic} is replaced with the prompt's first line
+        latency: Mean seconds per call
+        latency_distribution: "fixed", "uniform" (latency +/- jitter) or "lognormal"
+        jitter: Relative spread for "uniform", sigma for "lognormal"
+        time_to_first_token: Share of the latency spent before the first streamed chunk
+        output_tokens: Approximate tokens per answer; canned text is padded up to it
+        error_rate: Probability (0-1) that a call fails
+        error_status_code: Status code of injected failures (429 simulates rate limits)
+        chunk_words: Words per streamed chunk
+        seed: Seed mixed into every per-call random choice
+    """
+
+    id: str = "fake-llm"
+    name: str = "FakeLLM"
+    provider: str = "Fake"
+
+    role: Optional[str] = None
+    response_template: Optional[str] = None
+    latency: float = 0.0
+    latency_distribution: str = "fixed"
+    jitter: float = 0.5
+    time_to_first_token: float = 0.2
+    output_tokens: int = 0
+    error_rate: float = 0.0
+    error_status_code: int = 500
+    chunk_words: int = 8
+    seed: int = 0
+    max_tokens: Optional[int] = None
+
+    calls: int = field(default=0, init=False)
+
+    @classmethod
+    def from_env(cls, role: Optional[str] = None, **overrides: Any) -> "FakeLLM":
+        """
+        Build a fake model configured from FAKE_LLM_* environment variables.
+
+        FAKE_LLM_LATENCY (seconds), FAKE_LLM_LATENCY_DISTRIBUTION, FAKE_LLM_JITTER,
+        FAKE_LLM_OUTPUT_TOKENS, FAKE_LLM_ERROR_RATE, FAKE_LLM_ERROR_STATUS and
+        FAKE_LLM_SEED are read; keyword arguments take precedence.
+        """
+        settings: Dict[str, Any] = {
+            "role": role,
+            "latency": float(os.getenv("FAKE_LLM_LATENCY", "0.5")),
+            "latency_distribution": os.getenv("FAKE_LLM_LATENCY_DISTRIBUTION", "lognormal"),
+            "jitter": float(os.getenv("FAKE_LLM_JITTER", "0.5")),
+            "output_tokens": int(os.getenv("FAKE_LLM_OUTPUT_TOKENS", "300")),
+            "error_rate": float(os.getenv("FAKE_LLM_ERROR_RATE", "0")),
+            "error_status_code": int(os.getenv("FAKE_LLM_ERROR_STATUS", "500")),
+            "seed": int(os.getenv("FAKE_LLM_SEED", "0")),
+        }
+        settings.update(overrides)
+        return cls(**settings)
+
+    def __post_init__(self):
+        super().__post_init__()
+        if self.latency_distribution not in LATENCY_DISTRIBUTIONS:
+            raise ValueError(f"latency_distribution must be one of {LATENCY_DISTRIBUTIONS}")
+
+    # Deterministic per-call choices
+
+    def _rng(self, prompt: str) -> random.Random:
+        digest = hashlib.sha256(f"{self.seed}\x00{self.id}\x00{prompt}".encode("utf-8")).digest()
+        return random.Random(int.from_bytes(digest[:8], "big"))
+
+    def _sample_latency(self, rng: random.Random) -> float:
+        if self.latency <= 0:
+            return 0.0
+        if self.latency_distribution == "uniform":
+            return max(rng.uniform(self.latency * (1 - self.jitter), self.latency * (1 + self.jitter)), 0.0)
+        if self.latency_distribution == "lognormal":
+            # Parameterised so the mean stays at `latency`; the right tail models slow calls
+            mu = math.log(self.latency) - self.jitter ** 2 / 2
+            return rng.lognormvariate(mu, self.jitter)
+        return self.latency
+
+    def _plan(self, messages: List[Message]) -> Dict[str, Any]:
+        """Decide the answer, latency and outcome of a call."""
+        prompt = next((_message_text(m) for m in reversed(messages) if m.role == "user"), "")
+        system = " ".join(_message_text(m) for m in messages if m.role == "system")
+        rng = self._rng(prompt)
+
+        topic = next((line.strip() for line in prompt.splitlines() if line.strip()), "the topic")[:80]
+        template = self.response_template or ROLE_RESPONSES.get(self.role or "", DEFAULT_RESPONSE)
+        content = template.replace("{topic}", topic)
+
+        target = self.output_tokens
+        if self.max_tokens:
+            target = min(target, self.max_tokens) if target else 0
+        while target and _estimate_tokens(content) + _estimate_tokens(FILLER) <= target:
+            content += ("\n" if content.endswith("\n") else " ") + FILLER
+
+        input_tokens = _estimate_tokens(system) + _estimate_tokens(prompt)
+        output_tokens = _estimate_tokens(content)
+        return {
+            "content": content,
+            "latency": self._sample_latency(rng),
+            "fail": rng.random() < self.error_rate,
+            "usage": {
+                "input_tokens": input_tokens,
+                "output_tokens": output_tokens,
+                "total_tokens": input_tokens + output_tokens,
+            },
+        }
+
+    def _error(self) -> FakeProviderError:
+        return FakeProviderError(
+            f"Injected failure from {self.id}", status_code=self.error_status_code,
+            model_name=self.name, model_id=self.id
+        )
+
+    def _chunks(self, content: str) -> List[str]:
+        words = content.split(" ")
+        return [
+            " ".join(words[i:i + self.chunk_words]) + (" " if i + self.chunk_words < len(words) else "")
+            for i in range(0, len(words), self.chunk_words)
+        ]
+
+    # agno Model interface
+
+    def invoke(self, messages: List[Message]) -> Dict[str, Any]:
+        self.calls += 1
+        plan = self._plan(messages)
+        time.sleep(plan["latency"])
+        if plan["fail"]:
+            raise self._error()
+        return plan
+
+    async def ainvoke(self, messages: List[Message]) -> Dict[str, Any]:
+        self.calls += 1
+        plan = self._plan(messages)
+        await asyncio.sleep(plan["latency"])
+        if plan["fail"]:
+            raise self._error()
+        return plan
+
+    def invoke_stream(self, messages: List[Message]) -> Iterator[Dict[str, Any]]:
+        self.calls += 1
+        plan = self._plan(messages)
+        chunks = self._chunks(plan["content"])
+        time.sleep(plan["latency"] * self.time_to_first_token)
+        if plan["fail"]:
+            raise self._error()
+        per_chunk = plan["latency"] * (1 - self.time_to_first_token) / max(len(chunks), 1)
+        for index, chunk in enumerate(chunks):
+            if index:
+                time.sleep(per_chunk)
+            yield {"content": chunk}
+        yield {"usage": plan["usage"]}
+
+    async def ainvoke_stream(self, messages: List[Message]) -> AsyncIterator[Dict[str, Any]]:
+        self.calls += 1
+        plan = self._plan(messages)
+        chunks = self._chunks(plan["content"])
+        await asyncio.sleep(plan["latency"] * self.time_to_first_token)
+        if plan["fail"]:
+            raise self._error()
+        per_chunk = plan["latency"] * (1 - self.time_to_first_token) / max(len(chunks), 1)
+        for index, chunk in enumerate(chunks):
+            if index:
+                await asyncio.sleep(per_chunk)
+            yield {"content": chunk}
+        yield {"usage": plan["usage"]}
+
+    def parse_provider_response(self, response: Dict[str, Any]) -> ModelResponse:
+        return ModelResponse(role="assistant", content=response["content"], response_usage=response["usage"])
+
+    def parse_provider_response_delta(self, response: Dict[str, Any]) -> ModelResponse:
+        return ModelResponse(content=response.get("content"), response_usage=response.get("usage"))
+
+
+def maybe_fake(model: Model, role: Optional[str] = None) -> Model:
+    """
+    Return a FakeLLM standing in for `model` when FAKE_LLM is set, else the model itself.
+
+    The fake keeps the real model's id and max_tokens, so token tracking, pricing and
+    stage cache keys behave as they would against the real provider.
+
+    Args:
+        model: The real model
+        role: Canned response to use (see ROLE_RESPONSES)
+    """
+    if not fake_llm_enabled():
+        return model
+    return FakeLLM.from_env(role=role, id=model.id, max_tokens=getattr(model, "max_tokens", None))
@@ -0,0 +1,221 @@
+"""
+Process-wide logging setup with a background writer.
+
+Modules only create loggers (`logging.getLogger(...)`); entry points (the API app,
+command line scripts) call configure_logging() once. Records are put on an
+in-memory queue by a QueueHandler and written to stdout, and optionally a file,
+by a QueueListener thread, so a workflow never waits on terminal or disk I/O.
+
+DEBUG records, which carry payload details such as prompt and output sizes, are
+sampled: only a fraction of them is kept. Output is one JSON object per line by
+default (see JsonFormatter); LOG_FORMAT=text gives the classic single-line format.
+
+Environment variables:
+    LOG_LEVEL               Root level (default INFO)
+    LOG_FORMAT              json or text (default json)
+    LOG_FILE                Also append to this file
+    LOG_DEBUG_SAMPLE_RATE   Fraction of DEBUG records kept, 0-1 (default 0.1)
+
+Invalid values fall back to the default with a warning.
+"""
+
+import os
+import sys
+import json
+import queue
+import atexit
+import random
+import logging
+import datetime
+import logging.handlers
+from typing import Optional, Tuple
+
+from agents.utils.tracing import tracer
+
+TEXT_FORMAT = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+
+DEFAULT_DEBUG_SAMPLE_RATE = 0.1
+
+# Attributes every LogRecord has; anything else was passed in `extra` and is output as a field
+_RECORD_ATTRIBUTES = frozenset(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime"}
+
+logger = logging.getLogger("logging_config")
+
+_listener: Optional[logging.handlers.QueueListener] = None
+_queue_handler: Optional[logging.Handler] = None
+
+
+def _sample_rate_from_env() -> Tuple[float, Optional[str]]:
+    """LOG_DEBUG_SAMPLE_RATE, or the default and a warning if it isn't a number in 0-1."""
+    value = os.getenv("LOG_DEBUG_SAMPLE_RATE")
+    if value is None or not value.strip():
+        return DEFAULT_DEBUG_SAMPLE_RATE, None
+    try:
+        rate = float(value)
+    except ValueError:
+        rate = -1.0
+    if not 0.0 <= rate <= 1.0:
+        return DEFAULT_DEBUG_SAMPLE_RATE, (f"Ignoring LOG_DEBUG_SAMPLE_RATE={value!r}, expected a number "
+                                           f"from 0 to 1; using {DEFAULT_DEBUG_SAMPLE_RATE}")
+    return rate, None
+
+
+class JsonFormatter(logging.Formatter):
+    """
+    One JSON object per record: time, level, logger, message, the trace id of the
+    span the record was logged in, fields passed with `extra`, and the traceback.
+    """
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": datetime.datetime.fromtimestamp(record.created, datetime.timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRIBUTES and not key.startswith("_"):
+                entry[key] = value
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry["exception"] = record.exc_text
+        return json.dumps(entry, default=str)
+
+
+class DebugSampler(logging.Filter):
+    """Keeps every record at INFO and above, and a random fraction of DEBUG records."""
+
+    def __init__(self, rate: float):
+        super().__init__()
+        self.rate = rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno > logging.DEBUG:
+            return True
+        return self.rate >= 1.0 or random.random() < self.rate
+
+
+class TraceContextFilter(logging.Filter):
+    """
+    Adds the current trace id to records.
+
+    Runs where the record is created, since the listener thread doesn't see the
+    caller's context.
+    """
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        span = tracer.current_span()
+        if span is not None and not hasattr(record, "trace_id"):
+            record.trace_id = span.trace_id
+        return True
+
+
+class _StdoutHandler(logging.StreamHandler):
+    """Writes to whatever sys.stdout is when the record is written, like logging.lastResort."""
+
+    def __init__(self):
+        logging.Handler.__init__(self)
+
+    @property
+    def stream(self):
+        return sys.stdout
+
+
+class _QueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that leaves formatting to the writer's formatter."""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # The stock prepare() formats the whole record with a plain formatter here,
+        # which would leave the JSON formatter only a text line. Merge the args, and
+        # render the traceback now so the queued record holds no frames
+        record = logging.makeLogRecord(vars(record))
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+def configure_logging(level: Optional[str] = None,
+                      fmt: Optional[str] = None,
+                      log_file: Optional[str] = None,
+                      debug_sample_rate: Optional[float] = None,
+                      stream=None) -> logging.handlers.QueueListener:
+    """
+    Route all logging through a queue to a background writer.
+
+    Replaces the root logger's handlers; calling it again reconfigures the writer.
+    Arguments default to the LOG_* environment variables.
+
+    Args:
+        level: Root log level name
+        fmt: "json" or "text"
+        log_file: File to append to in addition to the stream
+        debug_sample_rate: Fraction of DEBUG records kept
+        stream: Stream to write to; defaults to stdout
+
+    Returns:
+        The running listener
+    """
+    global _listener, _queue_handler
+
+    # A bad environment value must not stop the app from starting; it is reported
+    # once logging is up instead
+    warnings = []
+    level = (level or os.getenv("LOG_LEVEL") or "INFO").upper()
+    if not isinstance(logging.getLevelName(level), int):
+        warnings.append(f"Ignoring unknown log level {level!r}; using INFO")
+        level = "INFO"
+    fmt = (fmt or os.getenv("LOG_FORMAT") or "json").lower()
+    log_file = log_file if log_file is not None else os.getenv("LOG_FILE")
+    if debug_sample_rate is None:
+        debug_sample_rate, warning = _sample_rate_from_env()
+        if warning:
+            warnings.append(warning)
+
+    shutdown_logging()
+
+    formatter = JsonFormatter() if fmt == "json" else logging.Formatter(TEXT_FORMAT)
+    handlers = [logging.StreamHandler(stream) if stream is not None else _StdoutHandler()]
+    if log_file:
+        directory = os.path.dirname(log_file)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        handlers.append(logging.FileHandler(log_file))
+    for handler in handlers:
+        handler.setFormatter(formatter)
+
+    records: "queue.SimpleQueue[logging.LogRecord]" = queue.SimpleQueue()
+    _queue_handler = _QueueHandler(records)
+    _queue_handler.addFilter(DebugSampler(debug_sample_rate))
+    _queue_handler.addFilter(TraceContextFilter())
+
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(_queue_handler)
+    root.setLevel(level)
+
+    _listener = logging.handlers.QueueListener(records, *handlers, respect_handler_level=True)
+    _listener.start()
+    for warning in warnings:
+        logger.warning(warning)
+    return _listener
+
+
+def shutdown_logging():
+    """Write out queued records and stop the background writer."""
+    global _listener, _queue_handler
+    if _queue_handler is not None:
+        logging.getLogger().removeHandler(_queue_handler)
+        _queue_handler = None
+    if _listener is not None:
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.close()
+        _listener = None
+
+
+atexit.register(shutdown_logging)
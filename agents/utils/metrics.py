@@ -0,0 +1,246 @@
+"""
+In-process metrics in the Prometheus text exposition format.
+
+A deliberately small registry of counters, gauges and histograms with labels,
+so the API can serve /metrics without extra dependencies. Gauges may be backed
+by a callback that is evaluated at scrape time (e.g. workflows in flight).
+"""
+
+import abc
+import math
+import threading
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+# Buckets for stage and request latencies, in seconds
+DEFAULT_LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 30.0, 60.0, 120.0, 300.0)
+
+LabelValues = Tuple[str, ...]
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    pairs = ",".join(f'{name}="{_escape(value)}"' for name, value in zip(names, values))
+    return "{" + pairs + "}"
+
+
+class _Metric(abc.ABC):
+    type_name = ""
+
+    def __init__(self, name: str, documentation: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(labels)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> LabelValues:
+        if set(labels) != set(self.label_names):
+            raise ValueError(f"{self.name} expects labels {self.label_names}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.label_names)
+
+    @abc.abstractmethod
+    def samples(self) -> Iterable[Tuple[str, LabelValues, Sequence[str], float]]:
+        """(sample name, label values, label names, value) for each exposed sample."""
+
+    def render(self) -> List[str]:
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.type_name}",
+        ]
+        for name, values, label_names, value in self.samples():
+            lines.append(f"{name}{_format_labels(label_names, values)} {_format_value(value)}")
+        return lines
+
+
+class Counter(_Metric):
+    """Monotonically increasing value per label set."""
+
+    type_name = "counter"
+
+    def __init__(self, name: str, documentation: str, labels: Sequence[str] = ()):
+        super().__init__(name, documentation, labels)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: str):
+        if amount < 0:
+            raise ValueError("Counters can only increase")
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels: str) -> float:
+        with self._lock:
+            return self._values.get(self._key(labels), 0.0)
+
+    def samples(self):
+        with self._lock:
+            items = sorted(self._values.items())
+        for values, value in items:
+            yield self.name, values, self.label_names, value
+
+
+class Gauge(_Metric):
+    """
+    Value that can go up and down, either set directly or read from a callback.
+    """
+
+    type_name = "gauge"
+
+    def __init__(self, name: str, documentation: str, labels: Sequence[str] = (),
+                 callback: Optional[Callable[[], Dict[LabelValues, float]]] = None):
+        """
+        Args:
+            name: Metric name
+            documentation: Help text
+            labels: Label names
+            callback: Called at scrape time; returns {label values tuple: value}
+        """
+        super().__init__(name, documentation, labels)
+        self.callback = callback
+        self._values: Dict[LabelValues, float] = {}
+
+    def set(self, value: float, **labels: str):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def inc(self, amount: float = 1.0, **labels: str):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, **labels: str):
+        self.inc(-amount, **labels)
+
+    def value(self, **labels: str) -> float:
+        key = self._key(labels)
+        if self.callback is not None:
+            return self.callback().get(key, 0.0)
+        with self._lock:
+            return self._values.get(key, 0.0)
+
+    def samples(self):
+        if self.callback is not None:
+            items = sorted(self.callback().items())
+        else:
+            with self._lock:
+                items = sorted(self._values.items())
+        for values, value in items:
+            yield self.name, tuple(values), self.label_names, value
+
+
+class Histogram(_Metric):
+    """Cumulative bucket counts, sum and count of observations per label set."""
+
+    type_name = "histogram"
+
+    def __init__(self, name: str, documentation: str, labels: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_LATENCY_BUCKETS):
+        super().__init__(name, documentation, labels)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+        self._series: Dict[LabelValues, Dict[str, object]] = {}
+
+    def observe(self, value: float, **labels: str):
+        key = self._key(labels)
+        with self._lock:
+            series = self._series.setdefault(key, {"counts": [0] * len(self.buckets), "sum": 0.0})
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series["counts"][index] += 1
+                    break
+            series["sum"] += value
+
+    def count(self, **labels: str) -> int:
+        with self._lock:
+            series = self._series.get(self._key(labels))
+            return sum(series["counts"]) if series else 0
+
+    def samples(self):
+        with self._lock:
+            items = sorted((key, list(series["counts"]), series["sum"]) for key, series in self._series.items())
+        bucket_labels = self.label_names + ("le",)
+        for values, counts, total in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets, counts):
+                cumulative += count
+                yield f"{self.name}_bucket", values + (_format_value(bound),), bucket_labels, cumulative
+            yield f"{self.name}_sum", values, self.label_names, total
+            yield f"{self.name}_count", values, self.label_names, cumulative
+
+
+class MetricsRegistry:
+    """
+    Named collection of metrics rendered together.
+    """
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def _register(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                # Re-registering (e.g. on module reload) returns the original
+                if type(existing) is not type(metric):
+                    raise ValueError(f"Metric {metric.name} is already registered as a {existing.type_name}")
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+    def counter(self, name: str, documentation: str, labels: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, documentation, labels))
+
+    def gauge(self, name: str, documentation: str, labels: Sequence[str] = (),
+              callback: Optional[Callable[[], Dict[LabelValues, float]]] = None) -> Gauge:
+        gauge = self._register(Gauge(name, documentation, labels))
+        if callback is not None:
+            gauge.callback = callback
+        return gauge
+
+    def histogram(self, name: str, documentation: str, labels: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_LATENCY_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, documentation, labels, buckets))
+
+    def get(self, name: str) -> Optional[_Metric]:
+        return self._metrics.get(name)
+
+    def render(self) -> str:
+        """All metrics in the Prometheus text format (version 0.0.4)."""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+# Global registry served by the API at /metrics
+metrics = MetricsRegistry()
+
+# Metrics recorded by the pipeline and the token tracker
+stage_latency = metrics.histogram(
+    "seo_stage_duration_seconds", "Wall-clock duration of pipeline stages", ("stage", "status")
+)
+provider_calls = metrics.counter(
+    "seo_provider_calls_total", "Model calls by provider and outcome (ok, error, rate_limited, cancelled)",
+    ("provider", "outcome")
+)
+tokens_total = metrics.counter(
+    "seo_tokens_total", "Tokens tracked by TokenTracker", ("provider", "direction")
+)
+cost_total = metrics.counter(
+    "seo_cost_usd_total", "Estimated spend tracked by TokenTracker in US dollars", ("provider",)
+)
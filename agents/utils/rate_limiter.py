@@ -0,0 +1,197 @@
+"""
+Per-provider request and token rate limits shared by all workflows in the process.
+
+Each provider gets two token buckets, one for requests per minute and one for
+tokens per minute. Every agent call reserves one request and its estimated tokens
+before it is sent and waits while either bucket is short. Afterwards the estimate
+is settled against the tokens actually used. A 429 pauses the provider for the
+time the response asks for, so concurrent workflows back off together rather
+than each retrying into the limit.
+"""
+
+import os
+import time
+import asyncio
+import logging
+import threading
+from typing import Dict, Optional
+
+logger = logging.getLogger("rate_limiter")
+
+# Default requests and tokens per minute for each provider the pipeline uses.
+# Override with <PROVIDER>_RPM and <PROVIDER>_TPM environment variables.
+DEFAULT_RATE_LIMITS = {
+    "openai": {"rpm": 500, "tpm": 200000},
+    "anthropic": {"rpm": 50, "tpm": 40000},
+    "deepseek": {"rpm": 60, "tpm": 300000},
+    "xai": {"rpm": 60, "tpm": 100000},
+    "openrouter": {"rpm": 200, "tpm": 400000},
+}
+
+# Seconds to pause a provider after a 429 that didn't say how long to wait
+DEFAULT_BACKOFF_SECONDS = 10.0
+
+
+class TokenBucket:
+    """
+    Classic token bucket: holds up to `capacity` units and refills continuously.
+    """
+
+    def __init__(self, capacity: float, refill_per_second: float):
+        """
+        Initialize a full bucket.
+
+        Args:
+            capacity: Maximum units the bucket holds (the allowed burst)
+            refill_per_second: Units added back per second
+        """
+        self.capacity = float(capacity)
+        self.refill_per_second = float(refill_per_second)
+        self.level = float(capacity)
+        self.updated = time.monotonic()
+
+    def refill(self, now: float):
+        elapsed = max(now - self.updated, 0.0)
+        self.level = min(self.capacity, self.level + elapsed * self.refill_per_second)
+        self.updated = now
+
+    def wait_time(self, amount: float, now: float) -> float:
+        """Seconds until `amount` units are available (0 if available now)."""
+        self.refill(now)
+        amount = min(amount, self.capacity)
+        if self.level >= amount:
+            return 0.0
+        return (amount - self.level) / self.refill_per_second
+
+    def take(self, amount: float):
+        """Remove units; the level may go negative to record debt from underestimates."""
+        self.level -= min(amount, self.capacity)
+
+    def give(self, amount: float):
+        """Return units, e.g. when a reservation overestimated usage."""
+        self.level = min(self.capacity, self.level + amount)
+
+
+class ProviderRateLimiter:
+    """
+    Process-wide requests-per-minute and tokens-per-minute limits for each provider.
+
+    Every agent call acquires one request and its estimated tokens before it is sent,
+    and settles the estimate against actual usage afterwards, so concurrent workflows
+    together stay just under each provider's quota.
+    """
+
+    def __init__(self, limits: Optional[Dict[str, Dict[str, float]]] = None):
+        """
+        Initialize the limiter.
+
+        Args:
+            limits: Per-provider {"rpm": ..., "tpm": ...}, merged over DEFAULT_RATE_LIMITS
+        """
+        self.limits = {provider: dict(values) for provider, values in DEFAULT_RATE_LIMITS.items()}
+        for provider, values in (limits or {}).items():
+            self.limits.setdefault(provider, {}).update(values)
+
+        self._lock = threading.Lock()
+        self._requests: Dict[str, TokenBucket] = {}
+        self._tokens: Dict[str, TokenBucket] = {}
+        self._paused_until: Dict[str, float] = {}
+        self.stats: Dict[str, Dict[str, float]] = {}
+
+    @classmethod
+    def from_env(cls) -> "ProviderRateLimiter":
+        """Build a limiter using <PROVIDER>_RPM / <PROVIDER>_TPM overrides from the environment."""
+        limits = {}
+        for provider in DEFAULT_RATE_LIMITS:
+            for kind in ("rpm", "tpm"):
+                value = os.getenv(f"{provider.upper()}_{kind.upper()}")
+                if value:
+                    limits.setdefault(provider, {})[kind] = float(value)
+        return cls(limits)
+
+    def _buckets(self, provider: str):
+        """Get (request bucket, token bucket) for a provider; caller holds the lock."""
+        if provider not in self._requests:
+            limit = self.limits.get(provider, {"rpm": 60, "tpm": 100000})
+            self._requests[provider] = TokenBucket(limit["rpm"], limit["rpm"] / 60.0)
+            self._tokens[provider] = TokenBucket(limit["tpm"], limit["tpm"] / 60.0)
+            self.stats[provider] = {"requests": 0, "tokens": 0, "waited_seconds": 0.0, "throttled": 0}
+        return self._requests[provider], self._tokens[provider]
+
+    def _try_acquire(self, provider: str, tokens: int) -> float:
+        """Take budget if available; otherwise return seconds to wait before retrying."""
+        now = time.monotonic()
+        with self._lock:
+            requests, token_bucket = self._buckets(provider)
+            wait = max(
+                self._paused_until.get(provider, 0.0) - now,
+                requests.wait_time(1, now),
+                token_bucket.wait_time(tokens, now),
+            )
+            if wait > 0:
+                return wait
+            requests.take(1)
+            token_bucket.take(tokens)
+            self.stats[provider]["requests"] += 1
+            self.stats[provider]["tokens"] += tokens
+            return 0.0
+
+    async def acquire(self, provider: str, tokens: int):
+        """
+        Wait until the provider has budget for one request of `tokens` tokens.
+
+        Args:
+            provider: Provider key (openrouter, deepseek, xai, anthropic, ...)
+            tokens: Estimated input plus output tokens of the request
+        """
+        waited = 0.0
+        while True:
+            wait = self._try_acquire(provider, tokens)
+            if wait <= 0:
+                break
+            waited += wait
+            await asyncio.sleep(wait)
+
+        if waited:
+            with self._lock:
+                self.stats[provider]["waited_seconds"] += waited
+            logger.debug(f"Waited {waited:.2f}s for {provider} rate limit budget")
+
+    def settle(self, provider: str, reserved_tokens: int, actual_tokens: int):
+        """Correct a reservation once the real token usage is known."""
+        with self._lock:
+            _, token_bucket = self._buckets(provider)
+            difference = reserved_tokens - actual_tokens
+            if difference > 0:
+                token_bucket.give(difference)
+            elif difference < 0:
+                token_bucket.take(-difference)
+            self.stats[provider]["tokens"] -= difference
+
+    def throttle(self, provider: str, retry_after: Optional[float] = None):
+        """Pause a provider after it answered 429 instead of letting callers retry blindly."""
+        pause = retry_after if retry_after and retry_after > 0 else DEFAULT_BACKOFF_SECONDS
+        with self._lock:
+            self._buckets(provider)
+            self._paused_until[provider] = max(self._paused_until.get(provider, 0.0), time.monotonic() + pause)
+            self.stats[provider]["throttled"] += 1
+        logger.warning(f"{provider} returned 429; pausing new requests for {pause:.1f}s")
+
+
+def is_rate_limit_error(error: Exception) -> bool:
+    """Whether an exception from a provider client or agno is an HTTP 429."""
+    return getattr(error, "status_code", None) == 429
+
+
+def retry_after_seconds(error: Exception) -> Optional[float]:
+    """Read the Retry-After header from a provider error, if it has one."""
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None) or {}
+    try:
+        return float(headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+
+# Global instance shared by every workflow in the process
+rate_limiter = ProviderRateLimiter.from_env()
@@ -0,0 +1,321 @@
+"""
+Append-only log of pipeline results.
+
+Every saved run is one record appended to the active segment file: a fixed
+header (payload length and CRC-32) followed by the zlib-compressed JSON record.
+Writes are sequential appends to an open file; nothing is ever rewritten. A
+segment is closed and a new one started once it reaches `segment_bytes` or has
+been written to for `segment_seconds`.
+
+Next to each segment, an index file holds one JSON line per record with its id,
+key (the workflow id) and offset, so lookups by record id or workflow id seek
+straight to the record. Indexes are loaded on first use; records the index is
+missing after a crash are recovered by scanning the end of the segment.
+
+One process writes a log directory at a time; any number may read it.
+
+    python -m agents.utils.result_log storage/results [workflow_id]
+
+lists the records of a log, or prints the latest record of a workflow.
+"""
+
+import os
+import sys
+import json
+import time
+import uuid
+import zlib
+import struct
+import logging
+import threading
+from dataclasses import dataclass
+from typing import Any, BinaryIO, Dict, Iterator, List, Optional, TextIO
+
+logger = logging.getLogger("result_log")
+
+SEGMENT_SUFFIX = ".seg"
+INDEX_SUFFIX = ".idx"
+
+# Payload length and CRC-32 of the compressed payload, big-endian
+_HEADER = struct.Struct(">II")
+
+DEFAULT_SEGMENT_BYTES = 64 * 1024 * 1024
+DEFAULT_SEGMENT_SECONDS = 24 * 60 * 60
+
+
+class CorruptRecordError(ValueError):
+    """A record's checksum or encoding doesn't match what was written."""
+
+
+@dataclass
+class RecordLocation:
+    """Where a record is stored, as kept in the segment index."""
+    id: str
+    key: Optional[str]
+    kind: str
+    segment: int
+    offset: int
+    length: int
+    created_at: float
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"id": self.id, "key": self.key, "kind": self.kind, "offset": self.offset,
+                "length": self.length, "created_at": self.created_at}
+
+
+def encode_record(record: Dict[str, Any]) -> bytes:
+    """Frame of a record: header and compressed JSON."""
+    payload = zlib.compress(json.dumps(record, default=str, separators=(",", ":")).encode("utf-8"))
+    return _HEADER.pack(len(payload), zlib.crc32(payload)) + payload
+
+
+def decode_payload(payload: bytes, checksum: int) -> Dict[str, Any]:
+    """Record of a frame's payload; raises CorruptRecordError if it doesn't check out."""
+    if zlib.crc32(payload) != checksum:
+        raise CorruptRecordError("Checksum mismatch")
+    try:
+        return json.loads(zlib.decompress(payload))
+    except (zlib.error, ValueError) as e:
+        raise CorruptRecordError(str(e)) from e
+
+
+class ResultLog:
+    """
+    Segmented, compressed, append-only record log with an offset index.
+    """
+
+    def __init__(self, directory: str = "storage/results",
+                 segment_bytes: int = DEFAULT_SEGMENT_BYTES,
+                 segment_seconds: Optional[float] = DEFAULT_SEGMENT_SECONDS,
+                 fsync: bool = False):
+        """
+        Initialize the log.
+
+        Args:
+            directory: Directory holding the segment and index files
+            segment_bytes: Size at which the active segment is rolled over
+            segment_seconds: Age at which the active segment is rolled over; None never rolls by age
+            fsync: Flush each record to disk before append() returns
+        """
+        self.directory = directory
+        self.segment_bytes = segment_bytes
+        self.segment_seconds = segment_seconds
+        self.fsync = fsync
+        self._by_id: Dict[str, RecordLocation] = {}
+        self._by_key: Dict[str, List[str]] = {}
+        self._segments: List[int] = []
+        self._lock = threading.Lock()
+        self._loaded = False
+        # Active segment, opened on the first append
+        self._segment: Optional[int] = None
+        self._segment_file: Optional[BinaryIO] = None
+        self._index_file: Optional[TextIO] = None
+        self._segment_size = 0
+        self._segment_started = 0.0
+
+    def _path(self, segment: int, suffix: str) -> str:
+        return os.path.join(self.directory, f"{segment:08d}{suffix}")
+
+    def _load(self):
+        """Read the segment indexes on first use; caller holds the lock."""
+        self._loaded = True
+        try:
+            names = os.listdir(self.directory)
+        except OSError:
+            return
+        self._segments = sorted(int(name[:-len(SEGMENT_SUFFIX)]) for name in names
+                                if name.endswith(SEGMENT_SUFFIX) and name[:-len(SEGMENT_SUFFIX)].isdigit())
+        for segment in self._segments:
+            indexed_end = 0
+            try:
+                with open(self._path(segment, INDEX_SUFFIX)) as f:
+                    for line in f:
+                        try:
+                            entry = json.loads(line)
+                            location = RecordLocation(segment=segment, **entry)
+                        except (ValueError, TypeError):
+                            # A line cut short by a crash; the scan below recovers the record
+                            break
+                        self._add_location(location)
+                        indexed_end = location.offset + _HEADER.size + location.length
+            except OSError:
+                pass
+            self._recover(segment, indexed_end)
+
+    def _recover(self, segment: int, offset: int):
+        """Index records written after the index's last entry (e.g. before a crash)."""
+        path = self._path(segment, SEGMENT_SUFFIX)
+        try:
+            if os.path.getsize(path) <= offset:
+                return
+        except OSError:
+            return
+        recovered = []
+        with open(path, "rb") as f:
+            f.seek(offset)
+            while True:
+                header = f.read(_HEADER.size)
+                if len(header) < _HEADER.size:
+                    break
+                length, checksum = _HEADER.unpack(header)
+                payload = f.read(length)
+                try:
+                    if len(payload) < length:
+                        raise CorruptRecordError("Truncated record")
+                    record = decode_payload(payload, checksum)
+                except CorruptRecordError:
+                    logger.warning(f"Ignoring damaged tail of result segment {path} at offset {offset}")
+                    break
+                recovered.append(RecordLocation(record["id"], record.get("key"), record.get("kind", "content"),
+                                                segment, offset, length, record.get("created_at", 0.0)))
+                offset += _HEADER.size + length
+        for location in recovered:
+            self._add_location(location)
+        if recovered:
+            logger.info(f"Recovered {len(recovered)} unindexed records from {path}")
+
+    def _add_location(self, location: RecordLocation):
+        self._by_id[location.id] = location
+        if location.key is not None:
+            self._by_key.setdefault(location.key, []).append(location.id)
+
+    def _close_segment(self):
+        for handle in (self._segment_file, self._index_file):
+            if handle is not None:
+                handle.close()
+        self._segment = self._segment_file = self._index_file = None
+
+    def _open_segment(self, now: float):
+        """Start a new segment; caller holds the lock."""
+        self._close_segment()
+        os.makedirs(self.directory, exist_ok=True)
+        segment = (self._segments[-1] + 1) if self._segments else 0
+        self._segments.append(segment)
+        self._segment = segment
+        self._segment_file = open(self._path(segment, SEGMENT_SUFFIX), "ab")
+        self._index_file = open(self._path(segment, INDEX_SUFFIX), "a")
+        self._segment_size = 0
+        self._segment_started = now
+
+    def _should_roll(self, now: float) -> bool:
+        if self._segment is None:
+            return True
+        if self._segment_size >= self.segment_bytes:
+            return True
+        return self.segment_seconds is not None and now - self._segment_started >= self.segment_seconds
+
+    def append(self, data: Dict[str, Any], key: Optional[str] = None, kind: str = "content") -> str:
+        """
+        Append a record.
+
+        Args:
+            data: JSON-serialisable record body
+            key: Lookup key, such as the workflow id
+            kind: Record type
+
+        Returns:
+            The record's unique id
+        """
+        created_at = time.time()
+        record = {"id": uuid.uuid4().hex, "key": key, "kind": kind, "created_at": created_at, "data": data}
+        # Encode outside the lock; only the append itself is serialised
+        frame = encode_record(record)
+        with self._lock:
+            if not self._loaded:
+                self._load()
+            # Records are only ever appended to a segment this process started, so a
+            # damaged tail left by an earlier crash is never written after
+            if self._should_roll(created_at):
+                self._open_segment(created_at)
+            location = RecordLocation(record["id"], key, kind, self._segment, self._segment_size,
+                                      len(frame) - _HEADER.size, created_at)
+            self._segment_file.write(frame)
+            self._segment_file.flush()
+            self._index_file.write(json.dumps(location.to_dict()) + "\n")
+            self._index_file.flush()
+            if self.fsync:
+                os.fsync(self._segment_file.fileno())
+                os.fsync(self._index_file.fileno())
+            self._segment_size += len(frame)
+            self._add_location(location)
+        return record["id"]
+
+    def _read(self, location: RecordLocation) -> Dict[str, Any]:
+        with open(self._path(location.segment, SEGMENT_SUFFIX), "rb") as f:
+            f.seek(location.offset)
+            frame = f.read(_HEADER.size + location.length)
+        if len(frame) < _HEADER.size + location.length:
+            raise CorruptRecordError(f"Record {location.id} is truncated")
+        length, checksum = _HEADER.unpack_from(frame)
+        return decode_payload(frame[_HEADER.size:_HEADER.size + length], checksum)
+
+    def _locate(self, record_id: str) -> Optional[RecordLocation]:
+        with self._lock:
+            if not self._loaded:
+                self._load()
+            return self._by_id.get(record_id)
+
+    def get(self, record_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Record with the given id.
+
+        Returns:
+            The record (id, key, kind, created_at and data), or None
+        """
+        location = self._locate(record_id)
+        return None if location is None else self._read(location)
+
+    def find(self, key: str) -> Optional[Dict[str, Any]]:
+        """Latest record appended under a key, such as a workflow id, or None."""
+        with self._lock:
+            if not self._loaded:
+                self._load()
+            ids = self._by_key.get(key)
+            location = self._by_id[ids[-1]] if ids else None
+        return None if location is None else self._read(location)
+
+    def locations(self, kind: Optional[str] = None) -> List[RecordLocation]:
+        """Index entries in append order, optionally of one kind only."""
+        with self._lock:
+            if not self._loaded:
+                self._load()
+            entries = list(self._by_id.values())
+        entries.sort(key=lambda location: (location.segment, location.offset))
+        return [location for location in entries if kind is None or location.kind == kind]
+
+    def scan(self, kind: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+        """Records in append order, optionally of one kind only."""
+        for location in self.locations(kind):
+            yield self._read(location)
+
+    def close(self):
+        """Close the active segment; the next append starts a new one."""
+        with self._lock:
+            self._close_segment()
+
+    def __len__(self) -> int:
+        with self._lock:
+            if not self._loaded:
+                self._load()
+            return len(self._by_id)
+
+
+# Global log that content pipeline results are saved to
+result_log = ResultLog()
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("Usage: python -m agents.utils.result_log LOG_DIRECTORY [WORKFLOW_ID]")
+        sys.exit(1)
+    log = ResultLog(sys.argv[1])
+    if len(sys.argv) > 2:
+        found = log.find(sys.argv[2])
+        if found is None:
+            print(f"No record for {sys.argv[2]}")
+            sys.exit(1)
+        print(json.dumps(found, indent=2))
+    else:
+        for entry in log.locations():
+            print(f"{entry.id}  {entry.kind}  {entry.key or '-'}  {entry.created_at:.0f}  "
+                  f"segment {entry.segment} @ {entry.offset}  {entry.length} bytes")
@@ -0,0 +1,84 @@
+"""
+Coalescing of identical in-flight async calls.
+
+Callers that ask for the same key while a call for it is running share that
+call's result instead of starting their own. The shared call runs as its own
+task, so one waiter being cancelled doesn't cancel it for the others. Once every
+waiter has been cancelled nobody wants the result any more, and the shared call
+is cancelled too, so abandoned work (such as paid model calls) stops.
+"""
+
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict, Hashable, Tuple
+
+logger = logging.getLogger("single_flight")
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls that share a key into a single in-flight execution.
+
+    The first caller for a key starts the work; callers arriving while it is still
+    running await the same result instead of starting their own.
+    """
+
+    def __init__(self):
+        self._calls: Dict[Hashable, asyncio.Future] = {}
+        # Callers currently awaiting each in-flight call
+        self._waiters: Dict[asyncio.Future, int] = {}
+        self.stats = {"started": 0, "coalesced": 0}
+
+    async def do(self, key: Hashable, factory: Callable[[], Awaitable[Any]]) -> Tuple[Any, bool]:
+        """
+        Run `factory()` for the key unless a call for the same key is already in flight.
+
+        Args:
+            key: Identity of the work; equal keys are coalesced
+            factory: Zero-argument callable returning the awaitable to run
+
+        Returns:
+            Tuple of (result, shared), where shared is True if the result came from
+            a call started by another caller
+        """
+        loop = asyncio.get_running_loop()
+        existing = self._calls.get(key)
+
+        # Futures belong to one event loop; calls from other loops run on their own
+        if existing is not None and not existing.done() and existing.get_loop() is loop:
+            self.stats["coalesced"] += 1
+            logger.info(f"Attached to in-flight call for {key!r}")
+            return await self._wait(key, existing), True
+
+        task = asyncio.ensure_future(factory())
+        self._calls[key] = task
+        self.stats["started"] += 1
+
+        def forget(finished):
+            if self._calls.get(key) is finished:
+                del self._calls[key]
+
+        task.add_done_callback(forget)
+        return await self._wait(key, task), False
+
+    async def _wait(self, key: Hashable, task: asyncio.Future) -> Any:
+        """Await the shared call; cancel it if the last caller waiting on it is cancelled."""
+        self._waiters[task] = self._waiters.get(task, 0) + 1
+        try:
+            # Shield so one waiter being cancelled doesn't cancel the call for the others
+            return await asyncio.shield(task)
+        finally:
+            self._waiters[task] -= 1
+            if not self._waiters[task]:
+                del self._waiters[task]
+                if not task.done():
+                    logger.info(f"Cancelling in-flight call for {key!r}; no callers are waiting")
+                    # Later callers start a fresh call rather than attach to a cancelled one
+                    if self._calls.get(key) is task:
+                        del self._calls[key]
+                    task.cancel()
+
+    def in_flight(self, key: Hashable) -> bool:
+        """Whether a call for the key is currently running."""
+        call = self._calls.get(key)
+        return call is not None and not call.done()
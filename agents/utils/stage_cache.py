@@ -0,0 +1,289 @@
+"""
+Two-tier cache of pipeline stage outputs.
+
+Agent calls are keyed by stage, model id and a hash of the normalized prompt and
+instructions, so a repeated call within the stage's TTL is served without paying
+for it again. Entries live in an in-memory LRU backed by one JSON file per entry,
+and the disk tier is trimmed oldest-first past its size limit.
+
+Only the upstream stages (research, brief and facts) are cached by default. The
+final article is not, so a repeated request still gets freshly written content;
+pass a "content" TTL to opt in.
+"""
+
+import os
+import re
+import json
+import time
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+from agents.utils.topic_index import TopicIndex
+
+logger = logging.getLogger("stage_cache")
+
+HOUR = 60 * 60
+DAY = 24 * HOUR
+
+# Default time-to-live per pipeline stage, in seconds; stages without one aren't cached
+DEFAULT_STAGE_TTLS = {
+    "research": 3 * DAY,
+    "brief": 3 * DAY,
+    "facts_prefetch": 6 * HOUR,
+    "facts": 6 * HOUR,
+}
+
+# How long expired entries stay on disk as a last-resort fallback (see get(allow_stale=True))
+DEFAULT_STALE_TTLS = {
+    "research": 7 * DAY,
+}
+
+# File in the cache directory holding the index of topics with cached research
+TOPIC_INDEX_FILE = "topics.jsonl"
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_prompt(text: Optional[str]) -> str:
+    """Normalize prompt text so formatting-only differences map to the same key."""
+    if not text:
+        return ""
+    return _WHITESPACE.sub(" ", str(text)).strip().casefold()
+
+
+def make_cache_key(stage: str, model_id: str, prompt: str, instructions: Optional[str] = None) -> str:
+    """
+    Build the cache key for an agent call.
+
+    Args:
+        stage: Pipeline stage name
+        model_id: Identifier of the model answering the call
+        prompt: Prompt sent to the agent
+        instructions: Agent instructions (system prompt)
+
+    Returns:
+        Hex digest identifying the call
+    """
+    digest = hashlib.sha256()
+    for part in (stage, model_id, normalize_prompt(prompt), normalize_prompt(instructions)):
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\x00")
+    return digest.hexdigest()
+
+
+class StageCache:
+    """
+    Two-tier cache for pipeline stage outputs.
+
+    Entries live in an in-memory LRU and in a directory of JSON files. Each stage
+    has its own TTL, and the disk tier is trimmed oldest-first when it grows past
+    its size limit.
+    """
+
+    def __init__(self,
+                 directory: str = "storage/stage_cache",
+                 max_memory_entries: int = 512,
+                 max_disk_bytes: int = 256 * 1024 * 1024,
+                 ttls: Optional[Dict[str, float]] = None,
+                 stale_ttls: Optional[Dict[str, float]] = None):
+        """
+        Initialize the cache.
+
+        Args:
+            directory: Directory for the disk tier
+            max_memory_entries: Entries kept in the in-memory LRU
+            max_disk_bytes: Size limit of the disk tier
+            ttls: Per-stage TTLs in seconds, merged over DEFAULT_STAGE_TTLS
+            stale_ttls: Seconds expired entries of a stage are kept for stale reads,
+                merged over DEFAULT_STALE_TTLS
+        """
+        self.directory = directory
+        self.max_memory_entries = max_memory_entries
+        self.max_disk_bytes = max_disk_bytes
+        self.ttls = dict(DEFAULT_STAGE_TTLS)
+        if ttls:
+            self.ttls.update(ttls)
+        self.stale_ttls = dict(DEFAULT_STALE_TTLS)
+        if stale_ttls:
+            self.stale_ttls.update(stale_ttls)
+
+        # Topics whose research is cached, for reuse by similar topics; kept as long
+        # as their research can still be read (stale reads included)
+        self.topics = TopicIndex(
+            os.path.join(directory, TOPIC_INDEX_FILE),
+            ttl=self.ttls.get("research", 0) + self.stale_ttls.get("research", 0)
+        )
+
+        self._memory: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._disk_bytes: Optional[int] = None
+
+        self.stats = {"memory_hits": 0, "disk_hits": 0, "stale_hits": 0, "misses": 0, "writes": 0, "evictions": 0}
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key[:2], f"{key}.json")
+
+    def get(self, stage: str, key: str, allow_stale: bool = False) -> Optional[str]:
+        """
+        Look up a cached output.
+
+        Args:
+            stage: Pipeline stage name
+            key: Key from make_cache_key
+            allow_stale: Also return an expired entry that is still within the stage's
+                stale TTL, e.g. when a deadline leaves no time for a fresh call
+
+        Returns:
+            The cached output, or None if missing or expired
+        """
+        now = time.time()
+
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                expires_at, output = entry
+                if expires_at > now:
+                    self._memory.move_to_end(key)
+                    self.stats["memory_hits"] += 1
+                    return output
+                del self._memory[key]
+
+        path = self._path(key)
+        try:
+            with open(path, "r") as f:
+                record = json.load(f)
+        except (OSError, ValueError):
+            with self._lock:
+                self.stats["misses"] += 1
+            return None
+
+        expires_at = record.get("expires_at", 0)
+        if expires_at <= now:
+            stale_until = expires_at + self.stale_ttls.get(stage, 0)
+            if allow_stale and stale_until > now:
+                with self._lock:
+                    self.stats["stale_hits"] += 1
+                return record["output"]
+            # Keep the file around for stale reads until its stale TTL has passed
+            if stale_until <= now:
+                self._remove_file(path)
+            with self._lock:
+                self.stats["misses"] += 1
+            return None
+
+        with self._lock:
+            self._remember(key, record["expires_at"], record["output"])
+            self.stats["disk_hits"] += 1
+        return record["output"]
+
+    def set(self, stage: str, key: str, output: str, ttl: Optional[float] = None):
+        """
+        Store an output for a stage.
+
+        Args:
+            stage: Pipeline stage name
+            key: Key from make_cache_key
+            output: Agent output to cache
+            ttl: TTL in seconds; defaults to the stage TTL. Zero disables caching.
+        """
+        if ttl is None:
+            ttl = self.ttls.get(stage, 0)
+        if not ttl or ttl <= 0:
+            return
+
+        now = time.time()
+        expires_at = now + ttl
+
+        with self._lock:
+            self._remember(key, expires_at, output)
+            self.stats["writes"] += 1
+
+        record = {"stage": stage, "created_at": now, "expires_at": expires_at, "output": output}
+        path = self._path(key)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp_path, "w") as f:
+                json.dump(record, f)
+            previous = os.path.getsize(path) if os.path.exists(path) else 0
+            os.replace(tmp_path, path)
+            self._account_disk(os.path.getsize(path) - previous)
+        except OSError as e:
+            logger.warning(f"Could not write stage cache entry: {e}")
+
+    def _remember(self, key: str, expires_at: float, output: str):
+        """Insert into the memory LRU; caller holds the lock."""
+        self._memory[key] = (expires_at, output)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_entries:
+            self._memory.popitem(last=False)
+
+    def _scan_disk(self):
+        """Return (path, mtime, size) for every file in the disk tier."""
+        files = []
+        for root, _, names in os.walk(self.directory):
+            for name in names:
+                if root == self.directory and name == TOPIC_INDEX_FILE:
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                files.append((path, stat.st_mtime, stat.st_size))
+        return files
+
+    def _account_disk(self, delta: int):
+        """Track disk usage and evict the oldest entries when over the limit."""
+        with self._lock:
+            if self._disk_bytes is None:
+                self._disk_bytes = sum(size for _, _, size in self._scan_disk())
+            else:
+                self._disk_bytes += delta
+            if self._disk_bytes <= self.max_disk_bytes:
+                return
+
+            files = sorted(self._scan_disk(), key=lambda item: item[1])
+            total = sum(size for _, _, size in files)
+            # Trim to 90% of the limit so eviction doesn't run on every write
+            target = self.max_disk_bytes * 0.9
+            for path, _, size in files:
+                if total <= target:
+                    break
+                try:
+                    os.remove(path)
+                except OSError:
+                    continue
+                total -= size
+                self.stats["evictions"] += 1
+            self._disk_bytes = total
+
+    def _remove_file(self, path: str):
+        try:
+            size = os.path.getsize(path)
+            os.remove(path)
+        except OSError:
+            return
+        with self._lock:
+            if self._disk_bytes is not None:
+                self._disk_bytes -= size
+
+    def clear(self):
+        """Remove every entry from both tiers, and the topic index."""
+        with self._lock:
+            self._memory.clear()
+        self.topics.clear()
+        for path, _, _ in self._scan_disk():
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+        with self._lock:
+            self._disk_bytes = 0
+
+
+# Global instance shared by all pipelines in the process
+stage_cache = StageCache()
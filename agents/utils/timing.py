@@ -0,0 +1,154 @@
+"""
+Wall-clock timing of pipeline stages, broken down by where the time went.
+
+A StageTimer is bound to the running stage through a context variable, so code
+deep inside a stage (tool calls, tokenization, storage writes) can charge its
+time with `timed(component)` without the timer being passed around. Tasks and
+asyncio.to_thread copy the context, so agno's tool calls in worker threads are
+charged to the stage that made them.
+
+Sections nest: time spent in an inner section is charged to the inner component
+only, so a DuckDuckGo search inside a model call counts as tool time, not
+provider time.
+"""
+
+import time
+import datetime
+import functools
+import threading
+import contextlib
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Optional
+
+# Components a stage's duration is split into; the rest is reported as "other"
+TIMING_COMPONENTS = ("provider", "tool", "tokenization", "storage")
+
+
+class StageTimer:
+    """
+    Start, end and per-component durations of one stage.
+    """
+
+    def __init__(self, stage: str):
+        """
+        Start the clock.
+
+        Args:
+            stage: Stage name
+        """
+        self.stage = stage
+        self.started_at = datetime.datetime.now(datetime.timezone.utc)
+        self.finished_at = None
+        self.seconds = {component: 0.0 for component in TIMING_COMPONENTS}
+        self._start = time.perf_counter()
+        self._duration = None
+        self._lock = threading.Lock()
+
+    def add(self, component: str, seconds: float):
+        """Charge time to a component."""
+        with self._lock:
+            self.seconds[component] = self.seconds.get(component, 0.0) + seconds
+
+    def finish(self) -> Dict[str, Any]:
+        """Stop the clock (if still running) and return the timing report."""
+        if self._duration is None:
+            self._duration = time.perf_counter() - self._start
+            self.finished_at = datetime.datetime.now(datetime.timezone.utc)
+        return self.report()
+
+    def report(self) -> Dict[str, Any]:
+        """
+        Timing report for the stage results.
+
+        Component durations are summed over the stage's calls, so concurrent calls
+        (e.g. a hedged request racing the primary) may add up to more than the duration.
+        """
+        duration = self._duration if self._duration is not None else time.perf_counter() - self._start
+        with self._lock:
+            breakdown = {component: round(seconds, 4) for component, seconds in self.seconds.items()}
+        breakdown["other"] = round(max(duration - sum(self.seconds.values()), 0.0), 4)
+        return {
+            "started_at": self.started_at.isoformat(),
+            "finished_at": self.finished_at.isoformat() if self.finished_at else None,
+            "duration": round(duration, 4),
+            "breakdown": breakdown
+        }
+
+
+class _Section:
+    __slots__ = ("nested",)
+
+    def __init__(self):
+        self.nested = 0.0
+
+
+_current_timer: ContextVar[Optional[StageTimer]] = ContextVar("stage_timer", default=None)
+_current_section: ContextVar[Optional[_Section]] = ContextVar("timing_section", default=None)
+
+
+def current_timer() -> Optional[StageTimer]:
+    """Timer of the stage running in this context, if any."""
+    return _current_timer.get()
+
+
+@contextlib.contextmanager
+def stage_timer(stage: str):
+    """
+    Time a stage; code running inside it charges its components to the yielded timer.
+
+    Args:
+        stage: Stage name
+    """
+    timer = StageTimer(stage)
+    token = _current_timer.set(timer)
+    section_token = _current_section.set(None)
+    try:
+        yield timer
+    finally:
+        _current_section.reset(section_token)
+        _current_timer.reset(token)
+        timer.finish()
+
+
+@contextlib.contextmanager
+def timed(component: str):
+    """
+    Charge the time spent in the block to a component of the current stage.
+
+    Does nothing outside a stage. Time spent in nested sections is subtracted.
+
+    Args:
+        component: One of TIMING_COMPONENTS
+    """
+    timer = _current_timer.get()
+    if timer is None:
+        yield
+        return
+
+    parent = _current_section.get()
+    section = _Section()
+    token = _current_section.set(section)
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        _current_section.reset(token)
+        timer.add(component, max(elapsed - section.nested, 0.0))
+        if parent is not None:
+            with timer._lock:
+                parent.nested += elapsed
+
+
+def timed_call(component: str, function: Callable) -> Callable:
+    """
+    Wrap a synchronous callable so each call is charged to a component.
+
+    The wrapper keeps the callable's name, signature and docstring, so it can be
+    registered as an agno tool in its place.
+    """
+    @functools.wraps(function)
+    def wrapper(*args, **kwargs):
+        with timed(component):
+            return function(*args, **kwargs)
+    return wrapper
@@ -1,12 +1,12 @@
 import os
 import json
-import tiktoken
 from datetime import datetime
 from typing import Dict, List, Optional, Union, Any
 import logging
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
+from agents.utils.metrics import cost_total, tokens_total
+from agents.utils.timing import timed
+
 logger = logging.getLogger("token_tracker")
 
 class TokenTracker:
@@ -41,6 +41,10 @@ class TokenTracker:
             "o3-mini": (0.0015, 0.002),           # $0.0015 per 1K input, $0.002 per 1K output
             "o3-preview": (0.003, 0.004),         # $0.003 per 1K input, $0.004 per 1K output
             "gpt-4o": (0.005, 0.015),             # $0.005 per 1K input, $0.015 per 1K output
+            "gpt-4o-mini": (0.00015, 0.0006),     # Hedge secondary for research
+            "deepseek-chat": (0.00027, 0.0011),   # Hedge secondary for briefs
+            "grok-2-1212": (0.002, 0.01),         # Hedge secondary for facts
+            "claude-3-sonnet": (0.003, 0.015),    # Hedge secondary for content
         }
     }
     
@@ -63,6 +67,9 @@ class TokenTracker:
         # Track per-step usage
         self.step_usage = {}
         
+        # Extra spend on hedged requests (also included in the provider totals)
+        self.hedge_usage = {"input_tokens": 0, "output_tokens": 0, "cost": 0.0, "calls": 0}
+        
         self.prices = self.DEFAULT_PRICES.copy()
         if custom_prices:
             self._update_prices(custom_prices)
@@ -87,6 +94,9 @@ class TokenTracker:
         if model_name in self._tokenizers:
             return self._tokenizers[model_name]
         
+        # Imported on first use; tiktoken and its encodings aren't needed at startup
+        import tiktoken
+        
         # OpenAI models
         if "gpt-4" in model_name or "gpt-3.5" in model_name:
             tokenizer = tiktoken.encoding_for_model(model_name)
@@ -102,20 +112,23 @@ class TokenTracker:
         if not text:
             return 0
             
-        try:
-            tokenizer = self._get_tokenizer(model_name)
-            return len(tokenizer.encode(text))
-        except Exception as e:
-            logger.warning(f"Error estimating tokens: {e}")
-            # Fallback: rough estimate based on whitespace tokens
-            return len(text) // 4
+        # Charged to the running pipeline stage, if any
+        with timed("tokenization"):
+            try:
+                tokenizer = self._get_tokenizer(model_name)
+                return len(tokenizer.encode(text))
+            except Exception as e:
+                logger.warning(f"Error estimating tokens: {e}")
+                # Fallback: rough estimate based on whitespace tokens
+                return len(text) // 4
     
     def track_step(self, 
                   step_name: str,
                   provider: str,
                   model: str, 
                   input_text: str,
-                  output_text: str):
+                  output_text: str,
+                  hedge: bool = False):
         """
         Track token usage for a specific pipeline step.
         
@@ -125,6 +138,8 @@ class TokenTracker:
             model: The model name
             input_text: Input text sent to the model
             output_text: Output text received from the model
+            hedge: Whether this was a hedged duplicate of the step's primary call;
+                its usage is also added to hedge_usage
         """
         # Estimate tokens
         input_tokens = self.estimate_tokens(input_text, model)
@@ -149,13 +164,25 @@ class TokenTracker:
                 input_price=0.001, output_price=0.002
             )
         
+        if hedge:
+            usage_data["hedge"] = True
+            self.hedge_usage["input_tokens"] += input_tokens
+            self.hedge_usage["output_tokens"] += output_tokens
+            self.hedge_usage["cost"] += usage_data["total_cost"]
+            self.hedge_usage["calls"] += 1
+        
         # Store step usage data
         if step_name not in self.step_usage:
             self.step_usage[step_name] = []
         
         self.step_usage[step_name].append(usage_data)
         
-        logger.info(f"Step {step_name}: Tracked {provider} ({model}): {input_tokens} input, {output_tokens} output tokens")
+        # Process-wide counters for /metrics, across every tracker
+        tokens_total.inc(input_tokens, provider=provider, direction="input")
+        tokens_total.inc(output_tokens, provider=provider, direction="output")
+        cost_total.inc(usage_data["total_cost"], provider=provider)
+        
+        logger.debug(f"Step {step_name}: Tracked {provider} ({model}): {input_tokens} input, {output_tokens} output tokens")
         return usage_data
     
     def track_openai(self, 
@@ -520,6 +547,7 @@ class TokenTracker:
         report = {
             "usage": self.usage,
             "step_usage": self.step_usage,
+            "hedge_usage": self.hedge_usage,
             "session_start": self.session_start.isoformat(),
             "session_duration": str(datetime.now() - self.session_start)
         }
@@ -559,6 +587,13 @@ class TokenTracker:
         print(f"  Total tokens: {total_data['input_tokens'] + total_data['output_tokens']:,}")
         print(f"  Total cost: ${total_data['cost']:.4f}")
         
+        # Print hedging overhead
+        if self.hedge_usage["calls"] > 0:
+            print("\nHEDGED REQUESTS (included above):")
+            print(f"  Calls: {self.hedge_usage['calls']}")
+            print(f"  Total tokens: {self.hedge_usage['input_tokens'] + self.hedge_usage['output_tokens']:,}")
+            print(f"  Cost: ${self.hedge_usage['cost']:.4f}")
+        
         # Print step usage
         if "step_usage" in report and report["step_usage"]:
             print("\nUSAGE BY STEP:")
@@ -635,6 +670,7 @@ class TokenTracker:
             "total": {"input_tokens": 0, "output_tokens": 0, "cost": 0.0, "calls": 0}
         }
         self.step_usage = {}
+        self.hedge_usage = {"input_tokens": 0, "output_tokens": 0, "cost": 0.0, "calls": 0}
         self.session_start = datetime.now()
         self.last_tracked = None
         
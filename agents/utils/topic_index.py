@@ -0,0 +1,288 @@
+"""
+Similarity index over topics whose research is in the stage cache.
+
+Keyword lists are full of near-paraphrases ("desk organization tips", "tips for
+organizing your desk"). Each topic is reduced to stemmed content words, and
+those words plus their character trigrams are hashed into a sparse unit vector,
+so two topics are compared by cosine similarity without any embedding service.
+An inverted index on the stemmed words keeps lookups to the topics that share
+at least one word.
+
+The index is appended to a JSONL file next to the stage cache, so it survives
+restarts like the cache itself; only topics are stored, vectors are rebuilt on load.
+"""
+
+import os
+import re
+import json
+import time
+import zlib
+import math
+import logging
+import threading
+from dataclasses import asdict, dataclass
+from typing import Dict, List, Optional, Set, Tuple
+
+logger = logging.getLogger("topic_index")
+
+# Cosine similarity at which a topic reuses another topic's research by default
+DEFAULT_REUSE_THRESHOLD = 0.85
+
+# Hashed feature space; collisions only ever add a little similarity
+VECTOR_DIMENSIONS = 1 << 20
+
+# Weight of each character trigram relative to a whole stemmed word
+TRIGRAM_WEIGHT = 0.25
+
+STOPWORDS = frozenset("""
+    a an and are as at be best by can do does for from get guide how i in into is it
+    its my of on or our that the their this to top ultimate vs what when where which
+    who why will with you your
+""".split())
+
+_WORD = re.compile(r"[a-z0-9]+")
+
+# Suffixes stripped by stem(), longest first; the replacement is appended to the stem
+_SUFFIXES = (
+    ("izations", ""), ("ization", ""), ("isations", ""), ("isation", ""),
+    ("izers", ""), ("izer", ""), ("izing", ""), ("ising", ""), ("ized", ""), ("ised", ""),
+    ("izes", ""), ("ises", ""), ("ize", ""), ("ise", ""),
+    ("ational", "ate"), ("ations", "ate"), ("ation", "ate"),
+    ("fulness", "ful"), ("iveness", "ive"), ("ments", ""), ("ment", ""), ("ness", ""),
+    ("ings", ""), ("ing", ""), ("ies", "y"), ("edly", ""), ("ed", ""), ("ers", ""), ("er", ""),
+    ("ly", ""), ("es", ""), ("s", ""),
+)
+
+
+def stem(word: str) -> str:
+    """
+    Light suffix-stripping stemmer, enough to map inflections of a keyword together
+    (organize, organizing, organization -> organ; tips -> tip).
+    """
+    if len(word) <= 3 or word.isdigit():
+        return word
+    for suffix, replacement in _SUFFIXES:
+        if not word.endswith(suffix):
+            continue
+        base = word[:-len(suffix)]
+        if len(base) < 3:
+            continue
+        if suffix == "s" and word.endswith(("ss", "us", "is")):
+            return word
+        if suffix == "es" and not base.endswith(("s", "x", "z", "ch", "sh")):
+            # "guides" -> "guide", but "boxes" -> "box"
+            continue
+        base += replacement
+        # "running" -> "run"
+        if len(base) > 3 and base[-1] == base[-2] and base[-1] not in "aeiouylsz":
+            base = base[:-1]
+        return base
+    return word
+
+
+def topic_terms(topic: str) -> List[str]:
+    """Stemmed content words of a topic, in order."""
+    words = _WORD.findall((topic or "").casefold())
+    terms = [stem(word) for word in words if word not in STOPWORDS]
+    # A topic made only of stopwords still needs something to compare
+    return terms or [stem(word) for word in words]
+
+
+def _feature(name: str) -> int:
+    return zlib.crc32(name.encode("utf-8")) & (VECTOR_DIMENSIONS - 1)
+
+
+def topic_vector(topic: str) -> Dict[int, float]:
+    """
+    Hashed, L2-normalised vector of a topic's stemmed words and their trigrams.
+    """
+    vector: Dict[int, float] = {}
+    for term in topic_terms(topic):
+        word = _feature(f"w:{term}")
+        vector[word] = vector.get(word, 0.0) + 1.0
+        padded = f"#{term}#"
+        for start in range(len(padded) - 2):
+            gram = _feature(f"c:{padded[start:start + 3]}")
+            vector[gram] = vector.get(gram, 0.0) + TRIGRAM_WEIGHT
+    norm = math.sqrt(sum(value * value for value in vector.values()))
+    if not norm:
+        return {}
+    return {feature: value / norm for feature, value in vector.items()}
+
+
+def cosine(left: Dict[int, float], right: Dict[int, float]) -> float:
+    """Cosine similarity of two normalised sparse vectors."""
+    if len(left) > len(right):
+        left, right = right, left
+    return sum(value * right.get(feature, 0.0) for feature, value in left.items())
+
+
+def topic_similarity(left: str, right: str) -> float:
+    """Similarity of two topics between 0 and 1."""
+    return round(cosine(topic_vector(left), topic_vector(right)), 4)
+
+
+def topic_key(topic: str) -> str:
+    """Topics with the same key are the same topic (case, spacing and punctuation aside)."""
+    return " ".join(_WORD.findall((topic or "").casefold()))
+
+
+@dataclass
+class TopicMatch:
+    """An indexed topic and its similarity to the query."""
+    topic: str
+    score: float
+
+    def to_dict(self) -> Dict[str, object]:
+        return asdict(self)
+
+
+class TopicIndex:
+    """
+    Topics with cached research, searchable by similarity.
+    """
+
+    def __init__(self, path: Optional[str] = None, ttl: Optional[float] = None, max_entries: int = 10000):
+        """
+        Initialize the index.
+
+        Args:
+            path: JSONL file the index is kept in; None keeps it in memory only
+            ttl: Seconds a topic stays searchable after it was added; None keeps it forever
+            max_entries: Topics kept; the oldest are dropped first
+        """
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: Dict[str, Tuple[str, Dict[int, float], float]] = {}
+        self._postings: Dict[int, Set[str]] = {}
+        self._lock = threading.Lock()
+        self._loaded = path is None
+
+    def _load(self):
+        """Read the file on first use; caller holds the lock."""
+        self._loaded = True
+        try:
+            with open(self.path) as f:
+                lines = f.readlines()
+        except OSError:
+            return
+        for line in lines:
+            try:
+                record = json.loads(line)
+                self._insert(record["topic"], record["added_at"])
+            except (ValueError, KeyError, TypeError):
+                continue
+        self._expire(time.time())
+        # Rewrite the file once it holds mostly superseded or expired lines
+        if len(lines) > 2 * max(len(self._entries), 64):
+            self._rewrite()
+
+    def _rewrite(self):
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp_path, "w") as f:
+                for topic, _, added_at in sorted(self._entries.values(), key=lambda entry: entry[2]):
+                    f.write(json.dumps({"topic": topic, "added_at": added_at}) + "\n")
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            logger.warning(f"Could not compact topic index: {e}")
+
+    def _insert(self, topic: str, added_at: float):
+        key = topic_key(topic)
+        if not key:
+            return
+        self._remove(key)
+        vector = topic_vector(topic)
+        self._entries[key] = (topic, vector, added_at)
+        for term in set(topic_terms(topic)):
+            self._postings.setdefault(_feature(f"w:{term}"), set()).add(key)
+        while len(self._entries) > self.max_entries:
+            oldest = min(self._entries, key=lambda name: self._entries[name][2])
+            self._remove(oldest)
+
+    def _remove(self, key: str):
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        for term in set(topic_terms(entry[0])):
+            feature = _feature(f"w:{term}")
+            keys = self._postings.get(feature)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._postings[feature]
+
+    def _expire(self, now: float):
+        if self.ttl is None:
+            return
+        for key in [key for key, (_, _, added_at) in self._entries.items() if added_at + self.ttl <= now]:
+            self._remove(key)
+
+    def add(self, topic: str):
+        """
+        Index a topic whose research has just been cached (re-adding refreshes it).
+
+        Args:
+            topic: The topic
+        """
+        now = time.time()
+        with self._lock:
+            if not self._loaded:
+                self._load()
+            self._insert(topic, now)
+            if self.path is None:
+                return
+            try:
+                directory = os.path.dirname(self.path)
+                if directory:
+                    os.makedirs(directory, exist_ok=True)
+                with open(self.path, "a") as f:
+                    f.write(json.dumps({"topic": topic, "added_at": now}) + "\n")
+            except OSError as e:
+                logger.warning(f"Could not write topic index entry: {e}")
+
+    def search(self, topic: str, limit: int = 3) -> List[TopicMatch]:
+        """
+        Most similar indexed topics.
+
+        Args:
+            topic: Query topic
+            limit: Matches returned at most
+
+        Returns:
+            Matches, best first; the query's own topic is included if indexed
+        """
+        vector = topic_vector(topic)
+        features = {_feature(f"w:{term}") for term in topic_terms(topic)}
+        with self._lock:
+            if not self._loaded:
+                self._load()
+            self._expire(time.time())
+            candidates = set()
+            for feature in features:
+                candidates |= self._postings.get(feature, set())
+            scored = [
+                TopicMatch(self._entries[key][0], round(cosine(vector, self._entries[key][1]), 4))
+                for key in candidates
+            ]
+        scored.sort(key=lambda match: (-match.score, match.topic))
+        return scored[:limit]
+
+    def clear(self):
+        """Forget every topic and remove the file."""
+        with self._lock:
+            self._entries.clear()
+            self._postings.clear()
+            self._loaded = True
+            if self.path is not None:
+                try:
+                    os.remove(self.path)
+                except OSError:
+                    pass
+
+    def __len__(self) -> int:
+        with self._lock:
+            if not self._loaded:
+                self._load()
+            return len(self._entries)
@@ -0,0 +1,284 @@
+"""
+Lightweight tracing for content workflows.
+
+Spans carry a trace id shared by everything done for one request and a parent
+span id, so a workflow can be reassembled as a tree: API request -> workflow ->
+pipeline stages -> model and tool calls. The current span lives in a context
+variable, so tasks and asyncio.to_thread workers (where agno runs tools) nest
+under the span that started them.
+
+Finished spans are appended to a JSONL file, one span per line with OTLP field
+names (traceId, spanId, parentSpanId, startTimeUnixNano, ...). Set TRACE_FILE to
+enable the sink; without it spans are still created, so trace ids can be reported,
+but nothing is written.
+
+    python -m agents.utils.tracing storage/traces/spans.jsonl [trace_id]
+
+prints a trace as an indented tree with durations.
+"""
+
+import os
+import sys
+import json
+import time
+import secrets
+import logging
+import threading
+import contextlib
+import functools
+from contextvars import ContextVar, Token
+from typing import Any, Callable, Dict, List, Optional, Union
+
+logger = logging.getLogger("tracing")
+
+
+class SpanContext:
+    """Ids needed to continue a trace somewhere else (e.g. in a background task)."""
+
+    __slots__ = ("trace_id", "span_id")
+
+    def __init__(self, trace_id: str, span_id: str):
+        self.trace_id = trace_id
+        self.span_id = span_id
+
+    def to_dict(self) -> Dict[str, str]:
+        return {"trace_id": self.trace_id, "span_id": self.span_id}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, str]) -> "SpanContext":
+        return cls(data["trace_id"], data["span_id"])
+
+
+class Span:
+    """
+    One timed operation in a trace.
+    """
+
+    def __init__(self, tracer: "Tracer", name: str, trace_id: str, parent_span_id: Optional[str],
+                 attributes: Optional[Dict[str, Any]] = None):
+        self.tracer = tracer
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = secrets.token_hex(8)
+        self.parent_span_id = parent_span_id
+        self.attributes = dict(attributes or {})
+        self.status = "OK"
+        self.status_message = None
+        self.start_ns = time.time_ns()
+        self.end_ns = None
+
+    @property
+    def context(self) -> SpanContext:
+        return SpanContext(self.trace_id, self.span_id)
+
+    def set_attribute(self, key: str, value: Any):
+        self.attributes[key] = value
+
+    def record_error(self, error: BaseException):
+        """Mark the span as failed."""
+        self.status = "ERROR"
+        self.status_message = str(error) or type(error).__name__
+
+    def end(self):
+        """Finish the span and export it; later calls do nothing."""
+        if self.end_ns is not None:
+            return
+        self.end_ns = time.time_ns()
+        self.tracer.export(self)
+
+    def to_dict(self) -> Dict[str, Any]:
+        status = {"code": self.status}
+        if self.status_message:
+            status["message"] = self.status_message
+        return {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "parentSpanId": self.parent_span_id,
+            "name": self.name,
+            "startTimeUnixNano": self.start_ns,
+            "endTimeUnixNano": self.end_ns,
+            "attributes": self.attributes,
+            "status": status,
+        }
+
+
+class JsonlSpanExporter:
+    """Appends finished spans to a JSONL file."""
+
+    def __init__(self, path: str):
+        """
+        Initialize the exporter.
+
+        Args:
+            path: File to append to; its directory is created if needed
+        """
+        self.path = path
+        self._lock = threading.Lock()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def export(self, span: Span):
+        line = json.dumps(span.to_dict(), default=str)
+        with self._lock:
+            with open(self.path, "a") as f:
+                f.write(line + "\n")
+
+
+_current_span: ContextVar[Optional[Span]] = ContextVar("current_span", default=None)
+
+
+class Tracer:
+    """
+    Creates spans and hands finished ones to an exporter.
+    """
+
+    def __init__(self, exporter: Optional[JsonlSpanExporter] = None):
+        """
+        Initialize the tracer.
+
+        Args:
+            exporter: Sink for finished spans; None keeps them in memory only
+        """
+        self.exporter = exporter
+
+    @classmethod
+    def from_env(cls) -> "Tracer":
+        """Tracer exporting to TRACE_FILE, if set."""
+        path = os.getenv("TRACE_FILE")
+        return cls(JsonlSpanExporter(path) if path else None)
+
+    def current_span(self) -> Optional[Span]:
+        return _current_span.get()
+
+    def start_span(self, name: str, parent: Union[Span, SpanContext, Dict[str, str], None] = None,
+                   **attributes: Any) -> Span:
+        """
+        Start a span without making it current.
+
+        Args:
+            name: Span name
+            parent: Parent span or its context; defaults to the current span. Without
+                either, the span starts a new trace
+            **attributes: Span attributes
+
+        Returns:
+            The started span; call end() when done
+        """
+        if isinstance(parent, dict):
+            parent = SpanContext.from_dict(parent)
+        if parent is None:
+            parent = _current_span.get()
+        if parent is None:
+            return Span(self, name, secrets.token_hex(16), None, attributes)
+        return Span(self, name, parent.trace_id, parent.span_id, attributes)
+
+    def activate(self, span: Span) -> Token:
+        """Make a span current; pass the returned token to deactivate."""
+        return _current_span.set(span)
+
+    def deactivate(self, token: Token):
+        _current_span.reset(token)
+
+    @contextlib.contextmanager
+    def span(self, name: str, parent: Union[Span, SpanContext, Dict[str, str], None] = None,
+             **attributes: Any):
+        """
+        Run a block inside a new current span, recording errors and cancellation.
+
+        Args:
+            name: Span name
+            parent: See start_span
+            **attributes: Span attributes
+        """
+        span = self.start_span(name, parent, **attributes)
+        token = self.activate(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.record_error(e)
+            raise
+        finally:
+            self.deactivate(token)
+            span.end()
+
+    def export(self, span: Span):
+        if self.exporter is None:
+            return
+        try:
+            self.exporter.export(span)
+        except Exception as e:
+            logger.warning(f"Failed to export span {span.name}: {str(e)}")
+
+
+def traced_call(name: str, function: Callable, **attributes: Any) -> Callable:
+    """
+    Wrap a synchronous callable so each call runs in its own span.
+
+    The wrapper keeps the callable's name, signature and docstring, so it can be
+    registered as an agno tool in its place.
+    """
+    @functools.wraps(function)
+    def wrapper(*args, **kwargs):
+        with tracer.span(name, **attributes):
+            return function(*args, **kwargs)
+    return wrapper
+
+
+def load_spans(path: str, trace_id: Optional[str] = None) -> List[Dict[str, Any]]:
+    """
+    Read exported spans, optionally only those of one trace.
+
+    Args:
+        path: JSONL file written by JsonlSpanExporter
+        trace_id: Trace to keep; all traces by default
+    """
+    spans = []
+    with open(path) as f:
+        for line in f:
+            if not line.strip():
+                continue
+            span = json.loads(line)
+            if trace_id is None or span["traceId"] == trace_id:
+                spans.append(span)
+    return spans
+
+
+def format_trace(spans: List[Dict[str, Any]]) -> str:
+    """
+    Render spans as indented trees, one per trace, with offsets and durations in ms.
+    """
+    children: Dict[Optional[str], List[Dict[str, Any]]] = {}
+    ids = {span["spanId"] for span in spans}
+    for span in spans:
+        # Spans whose parent wasn't exported are shown as roots
+        parent = span["parentSpanId"] if span["parentSpanId"] in ids else None
+        children.setdefault(parent, []).append(span)
+    for group in children.values():
+        group.sort(key=lambda span: span["startTimeUnixNano"])
+
+    lines = []
+
+    def render(span, depth, origin):
+        offset = (span["startTimeUnixNano"] - origin) / 1e6
+        duration = (span["endTimeUnixNano"] - span["startTimeUnixNano"]) / 1e6
+        status = "" if span["status"]["code"] == "OK" else f" [{span['status']['code']}]"
+        lines.append(f"{'  ' * depth}{span['name']}  +{offset:.0f}ms  {duration:.0f}ms{status}")
+        for child in children.get(span["spanId"], []):
+            render(child, depth + 1, origin)
+
+    for root in children.get(None, []):
+        lines.append(f"trace {root['traceId']}")
+        render(root, 1, root["startTimeUnixNano"])
+    return "\n".join(lines)
+
+
+# Global tracer used by the API and the content pipeline
+tracer = Tracer.from_env()
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("Usage: python -m agents.utils.tracing SPANS_FILE [TRACE_ID]")
+        sys.exit(1)
+    print(format_trace(load_spans(sys.argv[1], sys.argv[2] if len(sys.argv) > 2 else None)))
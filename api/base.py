@@ -5,21 +5,27 @@ various agent pipelines through a unified RESTful interface.
 """
 
 import os
+import time
+import asyncio
 import logging
 import datetime
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
 from dotenv import load_dotenv
 
 from api.routers import content
-
-# Configure logging
-logging.basicConfig(level=logging.DEBUG)
-logger = logging.getLogger(__name__)
+from agents.content import agent_pool
+from agents.utils.metrics import metrics
+from agents.utils.logging_config import configure_logging
 
 # Load environment variables
 load_dotenv()
 
+# Configure logging (LOG_LEVEL, LOG_FORMAT, LOG_FILE, LOG_DEBUG_SAMPLE_RATE)
+configure_logging()
+logger = logging.getLogger(__name__)
+
 # Create API app
 app = FastAPI(
     title="SEO Agent API", 
@@ -39,6 +45,29 @@ app.add_middleware(
 # Include routers
 app.include_router(content.router)
 
+http_requests = metrics.counter("seo_http_requests_total", "HTTP requests by method, route and status",
+                                ("method", "path", "status"))
+http_request_duration = metrics.histogram("seo_http_request_duration_seconds",
+                                          "Time to produce an HTTP response", ("method", "path"))
+
+@app.middleware("http")
+async def record_request_metrics(request: Request, call_next):
+    """Count requests per route template, so workflow ids don't become labels"""
+    started = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        route = request.scope.get("route")
+        path = getattr(route, "path", "unmatched")
+        http_requests.inc(method=request.method, path=path, status=str(status))
+        http_request_duration.observe(time.perf_counter() - started, method=request.method, path=path)
+
+# Startup work still running; referenced here so the tasks aren't garbage collected
+_background_tasks = set()
+
 @app.on_event("startup")
 async def startup_event():
     """Initialize on startup"""
@@ -52,6 +81,21 @@ async def startup_event():
         "XAI_API_KEY": bool(os.getenv("XAI_API_KEY"))
     }
     logger.info(f"API Keys configured: {api_keys}")
+    
+    # Pre-build the default agent set so the first workflow doesn't pay for it. This
+    # imports the provider SDKs, so it runs in the background: health checks are
+    # answered while it loads
+    task = asyncio.create_task(warm_agent_pool())
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
+
+async def warm_agent_pool():
+    """Build the default content agent set in a worker thread"""
+    try:
+        await asyncio.to_thread(agent_pool.warm)
+        logger.info("Content agent pool warmed")
+    except Exception as e:
+        logger.warning(f"Could not warm content agent pool: {str(e)}")
 
 @app.get("/")
 def read_root():
@@ -61,8 +105,10 @@ def read_root():
         "message": "Welcome to the SEO Agent API",
         "endpoints": [
             "/api/v1/health",
+            "/metrics",
             "/api/v1/content",
-            "/api/v1/content/workflows/{workflow_id}"
+            "/api/v1/content/workflows/{workflow_id}",
+            "/api/v1/workflows/{workflow_id}/stream"
         ]
     }
 
@@ -89,6 +135,11 @@ async def health_check():
             "timestamp": datetime.datetime.now().isoformat()
         }
 
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics_endpoint():
+    """Request, workflow, stage latency, provider error and token/cost metrics for Prometheus"""
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
 # Run the API with uvicorn
 if __name__ == "__main__":
     import uvicorn
@@ -2,11 +2,20 @@
 Content creation API endpoints.
 """
 
-from typing import Optional, List, Dict, Any
+import json
+import asyncio
+from typing import Optional, List, Dict, Any, AsyncIterator
 from pydantic import BaseModel, Field
-from fastapi import APIRouter, BackgroundTasks
+from fastapi import APIRouter, BackgroundTasks, HTTPException
+from fastapi.responses import StreamingResponse
 
-from agents.content import run_content_pipeline, extract_gap_analysis
+from agents.content import arun_content_pipeline, extract_gap_analysis, pipeline_request_key
+from agents.content.checkpoints import checkpoint_store
+from agents.content.sections import MarkdownIndex, index_markdown
+from agents.utils.result_log import result_log
+from agents.utils.topic_index import DEFAULT_REUSE_THRESHOLD
+from agents.utils.tracing import tracer
+from agents.utils.metrics import metrics
 
 # Create the router
 router = APIRouter(tags=["content"])
@@ -14,6 +23,96 @@ router = APIRouter(tags=["content"])
 # Track workflows
 workflows = {}
 
+# Pending or running workflow id for each distinct request (see pipeline_request_key)
+inflight_workflows: Dict[Any, str] = {}
+
+def _count_workflows(status: str):
+    return {(): sum(1 for workflow in list(workflows.values()) if workflow["status"] == status)}
+
+# Workflow metrics served at /metrics
+metrics.gauge("seo_workflows_in_flight", "Content workflows currently running",
+              callback=lambda: _count_workflows("running"))
+metrics.gauge("seo_workflow_queue_depth", "Content workflows accepted but not started yet",
+              callback=lambda: _count_workflows("pending"))
+workflows_finished = metrics.counter("seo_workflows_total", "Content workflows finished, by outcome", ("status",))
+coalesced_requests = metrics.counter("seo_coalesced_requests_total",
+                                     "Content requests attached to an identical workflow in progress")
+
+# Seconds between keep-alive comments on idle event streams
+STREAM_HEARTBEAT_SECONDS = 15.0
+
+# Seconds a finished workflow's buffered events stay available to new subscribers
+STREAM_RETENTION_SECONDS = 60.0
+
+class WorkflowEventStream:
+    """Buffered stream of pipeline events for one workflow.
+    
+    Events are kept so that clients connecting mid-run replay everything from the
+    start before following live events.
+    """
+    
+    def __init__(self):
+        self.events: List[Dict[str, Any]] = []
+        self.closed = False
+        self._changed = asyncio.Event()
+    
+    def publish(self, event: Dict[str, Any]):
+        """Append an event and wake up all followers"""
+        self.events.append(event)
+        if event.get("type") == "workflow" and event.get("status") in ("completed", "failed"):
+            self.closed = True
+        changed, self._changed = self._changed, asyncio.Event()
+        changed.set()
+    
+    async def follow(self, heartbeat: float = STREAM_HEARTBEAT_SECONDS) -> AsyncIterator[Optional[Dict[str, Any]]]:
+        """Yield every event from the start; yields None when idle for `heartbeat` seconds"""
+        index = 0
+        while True:
+            changed = self._changed
+            while index < len(self.events):
+                yield self.events[index]
+                index += 1
+            if self.closed:
+                return
+            try:
+                await asyncio.wait_for(changed.wait(), timeout=heartbeat)
+            except asyncio.TimeoutError:
+                yield None
+
+# Event streams by workflow id
+workflow_streams: Dict[str, WorkflowEventStream] = {}
+
+def expire_stream(workflow_id: str, delay: float = None):
+    """Drop a finished workflow's event stream after a grace period
+    
+    The buffer holds every token delta and stage output of the workflow, so it isn't
+    kept for the life of the process. Connected followers keep their reference and
+    finish normally; later subscribers get the final state (see stream_workflow).
+    """
+    stream = workflow_streams.get(workflow_id)
+    if stream is None:
+        return
+    
+    def drop():
+        # A resumed workflow gets a new stream, which must stay
+        if workflow_streams.get(workflow_id) is stream:
+            del workflow_streams[workflow_id]
+    
+    asyncio.get_running_loop().call_later(STREAM_RETENTION_SECONDS if delay is None else delay, drop)
+
+def content_request_key(request: "ContentRequest"):
+    """Key under which identical content requests are attached to one workflow"""
+    brand_voice_dict = request.brand_voice.model_dump() if request.brand_voice else None
+    return pipeline_request_key(request.topic, brand_voice_dict, request.word_count,
+                                reuse_threshold=request.topic_reuse_threshold,
+                                deadline=request.deadline_seconds)
+
+def format_sse(event: Optional[Dict[str, Any]]) -> str:
+    """Format an event as a server-sent events message (None becomes a keep-alive comment)"""
+    if event is None:
+        return ": keep-alive\n\n"
+    return f"event: {event.get('type', 'message')}\ndata: {json.dumps(event)}\n\n"
+
 class BrandVoice(BaseModel):
     """Model for brand voice configuration"""
     tone: str = Field(default="Professional and authoritative", description="The overall tone of the content")
@@ -31,12 +130,15 @@ class ContentRequest(BaseModel):
     tone: str = Field(default="helpful", description="Overall tone of the content")
     word_count: int = Field(default=500, description="Target word count for the content", ge=100, le=2000)
     brand_voice: Optional[BrandVoice] = Field(default=None, description="Brand voice configuration")
+    deadline_seconds: Optional[float] = Field(default=None, description="Seconds the workflow may take; slow research or facts stages are degraded to stay within it", gt=0)
+    topic_reuse_threshold: Optional[float] = Field(default=DEFAULT_REUSE_THRESHOLD, description="Similarity (0-1) at which cached research of a similar earlier topic is reused; null always runs fresh research", ge=0, le=1)
 
 class ContentResponse(BaseModel):
     """Response model for content creation"""
     workflow_id: str
     status: str
     message: str
+    trace_id: Optional[str] = None
 
 class WorkflowStatusResponse(BaseModel):
     """Response model for workflow status"""
@@ -47,11 +149,28 @@ class WorkflowStatusResponse(BaseModel):
     error: Optional[str] = None
     steps: Optional[Dict[str, Dict[str, Any]]] = None
     token_usage: Optional[Dict[str, Any]] = None
+    trace_id: Optional[str] = None
+    topic_matches: Optional[List[Dict[str, Any]]] = None
+
+class StepSectionsResponse(BaseModel):
+    """Response model for the sections of a step's output"""
+    workflow_id: str
+    step: str
+    sections: List[Dict[str, Any]]
 
-def run_content_workflow(workflow_id: str, request: ContentRequest):
-    """Run the content creation pipeline in the background"""
+async def run_content_workflow(workflow_id: str, request: ContentRequest, resume: bool = False):
+    """Run the content creation pipeline in the background on the event loop
+    
+    Completed stages are checkpointed under the workflow id; with resume=True the
+    pipeline restarts from the last good checkpoint instead of from scratch.
+    """
     global workflows
     
+    # Continue the trace started by the request that created (or resumed) the workflow
+    span = tracer.start_span("run_content_workflow", parent=workflows[workflow_id].get("trace"),
+                             workflow_id=workflow_id, resume=resume)
+    token = tracer.activate(span)
+    
     try:
         # Update status
         workflows[workflow_id]["status"] = "running"
@@ -62,15 +181,35 @@ def run_content_workflow(workflow_id: str, request: ContentRequest):
             "content": {"status": "pending"}
         }
         
+        stream = workflow_streams.setdefault(workflow_id, WorkflowEventStream())
+        stream.publish({"type": "workflow", "status": "running"})
+        
+        def on_event(event):
+            # Keep step statuses current for polling clients, then forward to streams
+            if event["type"] == "step":
+                step = workflows[workflow_id]["steps"].setdefault(event["step"], {})
+                step["status"] = event["status"]
+                if "output" in event:
+                    step["output"] = event["output"]
+                for key in ("sections", "timing"):
+                    if key in event:
+                        step[key] = event[key]
+            stream.publish(event)
+        
         # Convert brand voice to dict if provided
-        brand_voice_dict = request.brand_voice.dict() if request.brand_voice else None
+        brand_voice_dict = request.brand_voice.model_dump() if request.brand_voice else None
         
         # Run the pipeline with individual agents
-        results = run_content_pipeline(
+        results = await arun_content_pipeline(
             topic=request.topic,
             brand_voice=brand_voice_dict,
             word_count=request.word_count,
-            save_results=True
+            save_results=True,
+            on_event=on_event,
+            workflow_id=workflow_id,
+            resume=resume,
+            deadline=request.deadline_seconds,
+            reuse_threshold=request.topic_reuse_threshold
         )
         
         # Update workflow with results
@@ -81,11 +220,17 @@ def run_content_workflow(workflow_id: str, request: ContentRequest):
         if "token_usage" in results:
             workflows[workflow_id]["token_usage"] = results["token_usage"]
         
+        # Similar earlier topics and their similarity scores
+        if "topic_matches" in results:
+            workflows[workflow_id]["topic_matches"] = results["topic_matches"]
+        
         # Update step statuses
         workflows[workflow_id]["steps"]["research"] = {
             "status": "completed",
             "output": results["steps"]["research"]["output"]
         }
+        if "reused_from" in results["steps"]["research"]:
+            workflows[workflow_id]["steps"]["research"]["reused_from"] = results["steps"]["research"]["reused_from"]
         
         workflows[workflow_id]["steps"]["brief"] = {
             "status": "completed",
@@ -103,47 +248,161 @@ def run_content_workflow(workflow_id: str, request: ContentRequest):
             "output": results["steps"]["content"]["output"]
         }
         
+        # Start/end times, where each stage's time went, and section offsets
+        for name, step in workflows[workflow_id]["steps"].items():
+            for key in ("sections", "timing"):
+                if key in results["steps"].get(name, {}):
+                    step[key] = results["steps"][name][key]
+        
+        # Flag stages that were cut short to meet the deadline
+        for name in results.get("degraded", []):
+            if name in workflows[workflow_id]["steps"]:
+                workflows[workflow_id]["steps"][name]["degraded"] = results["steps"][name]["degraded"]
+        
+        stream.publish({
+            "type": "workflow",
+            "status": "completed",
+            "result": workflows[workflow_id]["result"]
+        })
+        workflows_finished.inc(status="completed")
+        
     except Exception as e:
         # Handle errors
+        span.record_error(e)
+        workflows_finished.inc(status="failed")
         workflows[workflow_id]["status"] = "failed"
         workflows[workflow_id]["error"] = str(e)
+        workflow_streams.setdefault(workflow_id, WorkflowEventStream()).publish(
+            {"type": "workflow", "status": "failed", "error": str(e)}
+        )
+    
+    finally:
+        # New identical requests start a fresh workflow from now on
+        key = content_request_key(request)
+        if inflight_workflows.get(key) == workflow_id:
+            del inflight_workflows[key]
+        expire_stream(workflow_id)
+        tracer.deactivate(token)
+        span.end()
 
 @router.post("/api/v1/content", response_model=ContentResponse)
 async def create_content(request: ContentRequest, background_tasks: BackgroundTasks):
-    """Create new content based on the request"""
+    """Create new content based on the request
+    
+    A request identical to one that is still pending or running (same topic, word
+    count and brand voice) is attached to that workflow instead of starting another.
+    """
     import uuid
     
+    key = content_request_key(request)
+    existing_id = inflight_workflows.get(key)
+    existing = workflows.get(existing_id) if existing_id else None
+    if existing and existing["status"] in ("pending", "running"):
+        existing["coalesced_requests"] = existing.get("coalesced_requests", 0) + 1
+        coalesced_requests.inc()
+        trace = existing.get("trace")
+        tracer.start_span("create_content", parent=trace, workflow_id=existing_id, coalesced=True).end()
+        return ContentResponse(
+            workflow_id=existing_id,
+            status=existing["status"],
+            message="Attached to identical workflow already in progress",
+            trace_id=trace["trace_id"] if trace else None
+        )
+    
     # Generate workflow ID
     workflow_id = str(uuid.uuid4())
     
-    # Initialize workflow tracking
+    with tracer.span("create_content", workflow_id=workflow_id, topic=request.topic) as span:
+        # Initialize workflow tracking
+        workflows[workflow_id] = {
+            "status": "pending",
+            "request": request.model_dump(),
+            "steps": {
+                "research": {"status": "pending"},
+                "brief": {"status": "pending"},
+                "facts": {"status": "pending"},
+                "content": {"status": "pending"}
+            },
+            # The background run continues this trace
+            "trace": span.context.to_dict()
+        }
+        
+        workflow_streams[workflow_id] = WorkflowEventStream()
+        inflight_workflows[key] = workflow_id
+        
+        # Persist the request so the workflow can be resumed even after a restart
+        await asyncio.to_thread(checkpoint_store.save_request, workflow_id, request.model_dump())
+        
+        # Start background task
+        background_tasks.add_task(run_content_workflow, workflow_id, request)
+    
+    return ContentResponse(
+        workflow_id=workflow_id,
+        status="pending",
+        message="Content creation started",
+        trace_id=span.trace_id
+    )
+
+@router.post("/api/v1/workflows/{workflow_id}/resume", response_model=ContentResponse)
+async def resume_workflow(workflow_id: str, background_tasks: BackgroundTasks):
+    """Restart a failed or interrupted workflow from its last completed stage"""
+    workflow = workflows.get(workflow_id)
+    if workflow and workflow["status"] in ("pending", "running"):
+        raise HTTPException(status_code=409, detail=f"Workflow {workflow_id} is already {workflow['status']}")
+    if workflow and workflow["status"] == "completed":
+        raise HTTPException(status_code=409, detail=f"Workflow {workflow_id} already completed")
+    
+    # After a restart the workflow is only known from its checkpoints
+    request_data = workflow["request"] if workflow else await asyncio.to_thread(checkpoint_store.load_request, workflow_id)
+    if request_data is None:
+        raise HTTPException(status_code=404, detail=f"Workflow {workflow_id} has no checkpoint to resume from")
+    
+    request = ContentRequest(**request_data)
+    # A resumed run starts a new trace
+    span = tracer.start_span("resume_workflow", workflow_id=workflow_id)
     workflows[workflow_id] = {
         "status": "pending",
-        "request": request.dict(),
+        "request": request.model_dump(),
         "steps": {
             "research": {"status": "pending"},
             "brief": {"status": "pending"},
             "facts": {"status": "pending"},
             "content": {"status": "pending"}
-        }
+        },
+        "trace": span.context.to_dict()
     }
+    workflow_streams[workflow_id] = WorkflowEventStream()
     
-    # Start background task
-    background_tasks.add_task(run_content_workflow, workflow_id, request)
+    background_tasks.add_task(run_content_workflow, workflow_id, request, True)
+    span.end()
     
     return ContentResponse(
         workflow_id=workflow_id,
         status="pending",
-        message="Content creation started"
+        message="Workflow resumed from last checkpoint",
+        trace_id=span.trace_id
     )
 
 @router.get("/api/v1/workflows/{workflow_id}", response_model=WorkflowStatusResponse)
 async def get_workflow_status(workflow_id: str):
     """Get the status of a workflow"""
     if workflow_id not in workflows:
+        # Completed before a restart: served from the result log
+        record = await asyncio.to_thread(result_log.find, workflow_id)
+        if record is None:
+            return WorkflowStatusResponse(
+                workflow_id=workflow_id,
+                status="not_found"
+            )
+        results = record["data"]
         return WorkflowStatusResponse(
             workflow_id=workflow_id,
-            status="not_found"
+            status="completed",
+            result=results["steps"].get("content", {}).get("output"),
+            steps={name: dict(step, status="completed") for name, step in results["steps"].items()},
+            token_usage=results.get("token_usage"),
+            topic_matches=results.get("topic_matches"),
+            trace_id=results.get("trace_id")
         )
     
     workflow = workflows[workflow_id]
@@ -155,5 +414,64 @@ async def get_workflow_status(workflow_id: str):
         result=workflow.get("result"),
         error=workflow.get("error"),
         steps=workflow.get("steps"),
-        token_usage=workflow.get("token_usage")
-    ) 
\ No newline at end of file
+        token_usage=workflow.get("token_usage"),
+        topic_matches=workflow.get("topic_matches"),
+        trace_id=workflow["trace"]["trace_id"] if workflow.get("trace") else None
+    ) 
+
+@router.get("/api/v1/workflows/{workflow_id}/steps/{step}/sections", response_model=StepSectionsResponse)
+async def get_step_sections(workflow_id: str, step: str, title: Optional[str] = None):
+    """List the sections of a step's output, or return the one titled `title` with its text
+    
+    Uses the section offsets recorded by the pipeline, so the output isn't parsed again.
+    """
+    if workflow_id not in workflows:
+        raise HTTPException(status_code=404, detail=f"Workflow {workflow_id} not found")
+    
+    step_result = (workflows[workflow_id].get("steps") or {}).get(step)
+    if not step_result or "output" not in step_result:
+        raise HTTPException(status_code=404, detail=f"Step {step} has no output yet")
+    
+    output = step_result["output"] or ""
+    if "sections" in step_result:
+        index = MarkdownIndex.from_dict(output, step_result["sections"])
+    else:
+        index = index_markdown(output)
+    
+    if title is None:
+        sections = index.to_dict()
+    else:
+        section = index.find(title, prefix=True)
+        if section is None:
+            raise HTTPException(status_code=404, detail=f"No section titled {title!r} in step {step}")
+        sections = [dict(section.to_dict(), text=index.section_text(section))]
+    
+    return StepSectionsResponse(workflow_id=workflow_id, step=step, sections=sections)
+
+@router.get("/api/v1/workflows/{workflow_id}/stream")
+async def stream_workflow(workflow_id: str):
+    """Stream step transitions and Content Creator tokens as server-sent events
+    
+    Once a finished workflow's events have expired, the stream only carries its final
+    workflow event; the steps are available from GET /api/v1/workflows/{workflow_id}.
+    """
+    stream = workflow_streams.get(workflow_id)
+    if stream is None:
+        workflow = workflows.get(workflow_id)
+        if workflow is None or workflow["status"] not in ("completed", "failed"):
+            raise HTTPException(status_code=404, detail=f"Workflow {workflow_id} not found")
+        stream = WorkflowEventStream()
+        if workflow["status"] == "completed":
+            stream.publish({"type": "workflow", "status": "completed", "result": workflow.get("result")})
+        else:
+            stream.publish({"type": "workflow", "status": "failed", "error": workflow.get("error")})
+    
+    async def event_source():
+        async for event in stream.follow():
+            yield format_sse(event)
+    
+    return StreamingResponse(
+        event_source(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
@@ -0,0 +1,65 @@
+"""
+Import-time budget for the API.
+
+The API must start and answer health checks without loading the provider SDKs,
+tools, tokenizer or NumPy; those are imported when the first workflow needs them.
+Each check runs in a fresh interpreter so modules already imported by other tests
+don't hide a regression.
+"""
+
+import os
+import sys
+import json
+import subprocess
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '../..'))
+
+# Seconds `import api.base` may take; it took about 2s with eager provider imports
+IMPORT_TIME_BUDGET = float(os.getenv("API_IMPORT_TIME_BUDGET", "1.0"))
+
+# Modules that must only be imported on first use
+LAZY_MODULES = ("agno", "openai", "anthropic", "tiktoken", "numpy", "duckduckgo_search")
+
+
+def run_python(code, *options):
+    env = dict(os.environ, PYTHONPATH=ROOT, LOG_LEVEL="WARNING")
+    result = subprocess.run(
+        [sys.executable, *options, "-c", code],
+        cwd=ROOT, env=env, capture_output=True, text=True, timeout=120
+    )
+    assert result.returncode == 0, result.stderr
+    return result
+
+
+def test_api_import_leaves_providers_unloaded():
+    result = run_python(
+        "import sys, json, api.base\n"
+        "print(json.dumps(sorted({name.split('.')[0] for name in sys.modules})))"
+    )
+    loaded = set(json.loads(result.stdout.strip().splitlines()[-1]))
+    assert loaded.isdisjoint(LAZY_MODULES), sorted(loaded & set(LAZY_MODULES))
+
+
+def test_api_import_within_budget():
+    # Warm the bytecode cache so the budget measures imports, not compilation
+    run_python("import api.base")
+    result = run_python("import api.base", "-X", "importtime")
+    total = None
+    for line in result.stderr.splitlines():
+        if line.startswith("import time:") and line.rstrip().endswith("| api.base"):
+            total = int(line.split("|")[1]) / 1e6
+    assert total is not None
+    assert total < IMPORT_TIME_BUDGET, f"import api.base took {total:.2f}s"
+
+
+def test_providers_load_on_first_agent_build():
+    result = run_python(
+        "import os, sys\n"
+        "os.environ['FAKE_LLM'] = '1'\n"
+        "from agents.content import pipeline\n"
+        "assert 'agno.models.anthropic' not in sys.modules\n"
+        "pipeline.get_content_storage = lambda: None\n"
+        "agents = pipeline.create_content_team()\n"
+        "print(len(agents), 'agno.models.anthropic' in sys.modules)"
+    )
+    assert result.stdout.strip().splitlines()[-1] == "4 True"
@@ -0,0 +1,349 @@
+"""
+Offline tests for the workflow API endpoints.
+
+The content agents are replaced with stand-ins so the API can be exercised
+without API keys or network access.
+"""
+
+import os
+import sys
+import json
+import asyncio
+
+import pytest
+
+from fastapi.testclient import TestClient
+
+# Add the parent directory to the path to import agents modules
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+from agents.content import pipeline
+from agents.utils.stage_cache import StageCache
+from agents.utils.rate_limiter import DEFAULT_RATE_LIMITS, ProviderRateLimiter
+from agents.utils.result_log import ResultLog
+from agents.content.checkpoints import CheckpointStore
+from agents.content.sections import parse_markdown
+from agents.utils.tracing import JsonlSpanExporter, load_spans, tracer
+from api.base import app
+from api.routers import content as content_router
+
+
+@pytest.fixture(autouse=True)
+def isolated_stage_cache(monkeypatch, tmp_path):
+    """Give every test an empty stage cache outside the repository"""
+    monkeypatch.setattr(pipeline, "stage_cache", StageCache(directory=str(tmp_path / "stage_cache")))
+
+
+@pytest.fixture(autouse=True)
+def isolated_content_storage(monkeypatch, tmp_path):
+    """Keep agent session files out of the repository's content_storage"""
+    monkeypatch.setenv("CONTENT_STORAGE_DIR", str(tmp_path / "content_storage"))
+    monkeypatch.setattr(pipeline, "_content_storage", None)
+
+
+@pytest.fixture(autouse=True)
+def isolated_rate_limiter(monkeypatch):
+    """Fresh limiter per test so budget used by one test doesn't throttle the next"""
+    limiter = ProviderRateLimiter({
+        provider: {"rpm": 100000, "tpm": 100000000} for provider in DEFAULT_RATE_LIMITS
+    })
+    monkeypatch.setattr(pipeline, "rate_limiter", limiter)
+    return limiter
+
+
+@pytest.fixture(autouse=True)
+def isolated_checkpoints(monkeypatch, tmp_path):
+    """Keep workflow checkpoints out of the repository"""
+    store = CheckpointStore(directory=str(tmp_path / "checkpoints"))
+    monkeypatch.setattr(pipeline, "default_checkpoint_store", store)
+    monkeypatch.setattr(content_router, "checkpoint_store", store)
+    return store
+
+
+@pytest.fixture(autouse=True)
+def isolated_result_log(monkeypatch, tmp_path):
+    """Keep saved results out of the repository"""
+    log = ResultLog(directory=str(tmp_path / "results"))
+    monkeypatch.setattr(pipeline, "result_log", log)
+    monkeypatch.setattr(content_router, "result_log", log)
+    yield log
+    log.close()
+
+
+@pytest.fixture(autouse=True)
+def no_hedging(monkeypatch):
+    """Failed stub calls must not fail over to real OpenRouter agents"""
+    monkeypatch.setattr(pipeline, "hedge_policies", {})
+
+
+class StubResponse:
+    def __init__(self, content):
+        self.content = content
+
+
+class StubAgent:
+    """Agent stand-in; streams its answer word by word when asked to"""
+
+    def __init__(self, name):
+        self.name = name
+        self.instructions = ""
+
+    async def arun(self, message, stream=False):
+        text = "## Gap Analysis\nNo one covers cables." if self.name == "brief" else f"{self.name} output text"
+        if not stream:
+            return StubResponse(text)
+
+        async def chunks():
+            for word in text.split(" "):
+                await asyncio.sleep(0)
+                yield StubResponse(word + " ")
+        return chunks()
+
+
+def stub_team(brand_voice=None):
+    return tuple(StubAgent(name) for name in ("research", "brief", "facts", "content"))
+
+
+def parse_events(body):
+    events = []
+    for block in body.strip().split("\n\n"):
+        data = [line[len("data: "):] for line in block.split("\n") if line.startswith("data: ")]
+        if data:
+            events.append(json.loads(data[0]))
+    return events
+
+
+def test_stream_replays_steps_and_content_tokens(monkeypatch):
+    monkeypatch.setattr(pipeline, "create_content_team", stub_team)
+    monkeypatch.setattr(pipeline.TokenTracker, "estimate_tokens", lambda self, text, model_name="": len(text or "") // 4)
+    monkeypatch.setattr(pipeline, "save_pipeline_results", lambda results, tracker: None)
+    pipeline.agent_pool.clear()
+
+    client = TestClient(app)
+    response = client.post("/api/v1/content", json={"topic": "desk organization tips"})
+    workflow_id = response.json()["workflow_id"]
+
+    stream = client.get(f"/api/v1/workflows/{workflow_id}/stream")
+    assert stream.status_code == 200
+    assert stream.headers["content-type"].startswith("text/event-stream")
+
+    events = parse_events(stream.text)
+    tokens = "".join(event["delta"] for event in events if event["type"] == "token")
+    completed_steps = {event["step"] for event in events if event["type"] == "step" and event["status"] == "completed"}
+
+    assert tokens.strip() == "content output text"
+    assert {"research", "brief", "facts", "content"} <= completed_steps
+    assert events[-1]["type"] == "workflow"
+    assert events[-1]["status"] == "completed"
+    assert events[-1]["result"].strip() == "content output text"
+
+    # Polling clients see when each stage ran and where its time went
+    steps = client.get(f"/api/v1/workflows/{workflow_id}").json()["steps"]
+    for name in ("research", "brief", "facts", "content"):
+        timing = steps[name]["timing"]
+        assert timing["started_at"] <= timing["finished_at"]
+        assert set(timing["breakdown"]) == {"provider", "tool", "tokenization", "storage", "other"}
+
+    # Once the buffered events have expired, late subscribers get the final state only
+    del content_router.workflow_streams[workflow_id]
+    late = parse_events(client.get(f"/api/v1/workflows/{workflow_id}/stream").text)
+    assert late == [events[-1]]
+
+    pipeline.agent_pool.clear()
+
+
+def test_finished_stream_is_dropped_after_grace_period(monkeypatch):
+    monkeypatch.setattr(content_router, "workflow_streams", {})
+
+    async def finish():
+        stream = content_router.WorkflowEventStream()
+        content_router.workflow_streams["done-id"] = stream
+        content_router.workflow_streams["resumed-id"] = stream
+        stream.publish({"type": "workflow", "status": "completed", "result": "text"})
+        content_router.expire_stream("done-id", delay=0.01)
+        content_router.expire_stream("resumed-id", delay=0.01)
+        # A resume replaces the stream before the old one expires
+        content_router.workflow_streams["resumed-id"] = content_router.WorkflowEventStream()
+        await asyncio.sleep(0.05)
+
+    asyncio.run(finish())
+
+    assert "done-id" not in content_router.workflow_streams
+    assert "resumed-id" in content_router.workflow_streams
+
+
+def test_workflow_is_traced_from_request_to_model_calls(monkeypatch, tmp_path):
+    monkeypatch.setattr(pipeline, "create_content_team", stub_team)
+    monkeypatch.setattr(pipeline.TokenTracker, "estimate_tokens", lambda self, text, model_name="": len(text or "") // 4)
+    monkeypatch.setattr(pipeline, "save_pipeline_results", lambda results, tracker: None)
+    spans_file = str(tmp_path / "spans.jsonl")
+    monkeypatch.setattr(tracer, "exporter", JsonlSpanExporter(spans_file))
+    pipeline.agent_pool.clear()
+
+    client = TestClient(app)
+    response = client.post("/api/v1/content", json={"topic": "desk organization tips"}).json()
+    status = client.get(f"/api/v1/workflows/{response['workflow_id']}").json()
+
+    assert status["status"] == "completed"
+    assert status["trace_id"] == response["trace_id"]
+    spans = load_spans(spans_file, response["trace_id"])
+    by_id = {span["spanId"]: span for span in spans}
+
+    def ancestors(span):
+        names = []
+        while span["parentSpanId"]:
+            span = by_id[span["parentSpanId"]]
+            names.append(span["name"])
+        return names
+
+    model_calls = [span for span in spans if span["name"] == "model_call"]
+    assert {span["attributes"]["step"] for span in model_calls} >= {"research", "brief", "facts", "content"}
+    content_call = next(span for span in model_calls if span["attributes"]["step"] == "content")
+    assert ancestors(content_call) == ["stage.content", "content_pipeline", "run_content_workflow", "create_content"]
+
+    pipeline.agent_pool.clear()
+
+
+def test_metrics_endpoint_reports_workflows_stages_and_tokens(monkeypatch):
+    monkeypatch.setattr(pipeline, "create_content_team", stub_team)
+    monkeypatch.setattr(pipeline.TokenTracker, "estimate_tokens", lambda self, text, model_name="": len(text or "") // 4)
+    monkeypatch.setattr(pipeline, "save_pipeline_results", lambda results, tracker: None)
+    pipeline.agent_pool.clear()
+
+    client = TestClient(app)
+    workflow_id = client.post("/api/v1/content", json={"topic": "standing desk setup"}).json()["workflow_id"]
+    client.get(f"/api/v1/workflows/{workflow_id}")
+
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    text = response.text
+    assert 'seo_http_requests_total{method="POST",path="/api/v1/content",status="200"}' in text
+    # Workflow ids are collapsed into the route template
+    assert 'path="/api/v1/workflows/{workflow_id}"' in text
+    assert workflow_id not in text
+    assert "seo_workflows_in_flight 0" in text
+    assert "# TYPE seo_workflow_queue_depth gauge" in text
+    assert 'seo_workflows_total{status="completed"}' in text
+    assert 'seo_stage_duration_seconds_count{stage="content",status="completed"}' in text
+    assert 'seo_provider_calls_total{provider="anthropic",outcome="ok"}' in text
+    assert 'seo_tokens_total{provider="anthropic",direction="output"}' in text
+    assert 'seo_cost_usd_total{provider="anthropic"}' in text
+
+    pipeline.agent_pool.clear()
+
+
+def test_stream_unknown_workflow():
+    client = TestClient(app)
+    assert client.get("/api/v1/workflows/missing/stream").status_code == 404
+
+
+def test_failed_workflow_resumes_from_checkpoint(monkeypatch, isolated_checkpoints):
+    monkeypatch.setattr(pipeline.TokenTracker, "estimate_tokens", lambda self, text, model_name="": len(text or "") // 4)
+    monkeypatch.setattr(pipeline, "save_pipeline_results", lambda results, tracker: None)
+
+    class BrokenContentAgent(StubAgent):
+        async def arun(self, message, stream=False):
+            raise RuntimeError("anthropic unavailable")
+
+    def broken_team(brand_voice=None):
+        return stub_team()[:3] + (BrokenContentAgent("content"),)
+
+    monkeypatch.setattr(pipeline, "create_content_team", broken_team)
+    pipeline.agent_pool.clear()
+
+    client = TestClient(app)
+    workflow_id = client.post("/api/v1/content", json={"topic": "desk organization tips"}).json()["workflow_id"]
+    assert client.get(f"/api/v1/workflows/{workflow_id}").json()["status"] == "failed"
+    assert "content" not in isolated_checkpoints.load_stages(workflow_id)
+
+    # Simulate a process restart: only the checkpoints survive
+    content_router.workflows.pop(workflow_id)
+    monkeypatch.setattr(pipeline, "create_content_team", stub_team)
+    pipeline.agent_pool.clear()
+
+    response = client.post(f"/api/v1/workflows/{workflow_id}/resume")
+    assert response.status_code == 200
+
+    status = client.get(f"/api/v1/workflows/{workflow_id}").json()
+    assert status["status"] == "completed"
+    assert status["result"].strip() == "content output text"
+    assert client.post(f"/api/v1/workflows/{workflow_id}/resume").status_code == 409
+    assert client.post("/api/v1/workflows/unknown/resume").status_code == 404
+
+    pipeline.agent_pool.clear()
+
+
+def test_duplicate_request_attaches_to_in_flight_workflow(monkeypatch):
+    monkeypatch.setattr(content_router, "workflows", {})
+    monkeypatch.setattr(content_router, "inflight_workflows", {})
+
+    # A workflow for the same topic, word count and brand voice is still running
+    request = content_router.ContentRequest(topic="desk organization tips")
+    content_router.workflows["running-id"] = {"status": "running", "request": request.model_dump(), "steps": {}}
+    content_router.inflight_workflows[content_router.content_request_key(request)] = "running-id"
+
+    client = TestClient(app)
+    response = client.post("/api/v1/content", json={"topic": "Desk organization tips"}).json()
+
+    assert response["workflow_id"] == "running-id"
+    assert response["status"] == "running"
+    assert content_router.workflows["running-id"]["coalesced_requests"] == 1
+    assert len(content_router.workflows) == 1
+
+    # A request with a deadline doesn't wait on a workflow without one
+    with_deadline = content_router.ContentRequest(topic="desk organization tips", deadline_seconds=5)
+    assert content_router.content_request_key(with_deadline) != content_router.content_request_key(request)
+
+    # Once it is done, the same request starts a new workflow
+    content_router.workflows["running-id"]["status"] = "completed"
+    monkeypatch.setattr(content_router, "run_content_workflow", lambda workflow_id, request: None)
+    response = client.post("/api/v1/content", json={"topic": "desk organization tips"}).json()
+    assert response["workflow_id"] != "running-id"
+
+
+def test_step_sections_are_served_from_stored_offsets():
+    output = "## Outline\n- Cable trays\n\n## Gap Analysis\nNobody covers standing desks.\n"
+    content_router.workflows["sections-id"] = {
+        "status": "completed",
+        "steps": {"brief": {"status": "completed", "output": output,
+                            "sections": parse_markdown(output).to_dict()}}
+    }
+    client = TestClient(app)
+
+    listing = client.get("/api/v1/workflows/sections-id/steps/brief/sections").json()
+    assert [section["title"] for section in listing["sections"]] == ["Outline", "Gap Analysis"]
+
+    gap = client.get("/api/v1/workflows/sections-id/steps/brief/sections", params={"title": "gap analysis"}).json()
+    assert gap["sections"][0]["text"] == "Nobody covers standing desks."
+
+    missing = client.get("/api/v1/workflows/sections-id/steps/brief/sections", params={"title": "Keywords"})
+    assert missing.status_code == 404
+    assert client.get("/api/v1/workflows/sections-id/steps/facts/sections").status_code == 404
+
+    del content_router.workflows["sections-id"]
+
+
+def test_completed_workflow_is_served_from_result_log_after_restart(monkeypatch, isolated_result_log):
+    monkeypatch.setattr(pipeline, "create_content_team", stub_team)
+    monkeypatch.setattr(pipeline.TokenTracker, "estimate_tokens", lambda self, text, model_name="": len(text or "") // 4)
+    pipeline.agent_pool.clear()
+
+    client = TestClient(app)
+    workflow_id = client.post("/api/v1/content", json={"topic": "desk organization tips"}).json()["workflow_id"]
+    before = client.get(f"/api/v1/workflows/{workflow_id}").json()
+    assert before["status"] == "completed"
+
+    # A restarted API has no in-memory workflows and reads the log from disk
+    monkeypatch.setattr(content_router, "workflows", {})
+    monkeypatch.setattr(content_router, "result_log", ResultLog(directory=isolated_result_log.directory))
+    after = client.get(f"/api/v1/workflows/{workflow_id}").json()
+
+    assert after["status"] == "completed"
+    assert after["result"] == before["result"]
+    assert after["steps"]["brief"]["output"] == before["steps"]["brief"]["output"]
+    assert after["token_usage"]["usage"] == before["token_usage"]["usage"]
+    assert after["trace_id"] == before["trace_id"]
+    assert client.get("/api/v1/workflows/unknown-id").json()["status"] == "not_found"
+
+    pipeline.agent_pool.clear()
@@ -0,0 +1,395 @@
+#!/usr/bin/env python3
+"""
+Throughput and latency benchmark for the content pipeline.
+
+Drives the pipeline (arun_content_pipeline) or the FastAPI app in-process against
+the offline fake LLM provider, sweeping the number of concurrent workflows, and
+reports for each level:
+
+- workflows per second
+- p50/p95/p99 end-to-end latency and per-stage latency
+- peak RSS and peak OS thread count
+
+Nothing leaves the process, so the numbers reflect orchestration, storage and
+tokenization overhead on top of the simulated provider latency. Keep the fake
+latency settings fixed between runs to compare builds.
+
+Usage:
+    python tests/benchmarks/benchmark_pipeline.py --max-concurrency 32
+    python tests/benchmarks/benchmark_pipeline.py --mode api --concurrency 1,8,32 --json bench.json
+"""
+
+import os
+import sys
+import json
+import asyncio
+import argparse
+import tempfile
+import threading
+from typing import Any, Dict, List, Optional
+
+# Add the parent directory to the path to import agents modules
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+STAGES = ("research", "brief", "facts_prefetch", "facts", "content")
+
+
+def percentile(values: List[float], q: float) -> Optional[float]:
+    """Nearest-rank percentile (q in 0-100), or None for no values."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(int(-(-q * len(ordered) // 100)), 1)
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+def summarize(values: List[float]) -> Dict[str, Optional[float]]:
+    return {
+        "p50": percentile(values, 50),
+        "p95": percentile(values, 95),
+        "p99": percentile(values, 99),
+        "max": max(values) if values else None,
+    }
+
+
+def current_rss_bytes() -> int:
+    """Resident set size of this process (Linux /proc, falling back to the peak)."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def os_thread_count() -> int:
+    """OS threads of this process, including executor and client pool threads."""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("Threads:"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return threading.active_count()
+
+
+class ResourceSampler:
+    """Samples RSS and thread count in the background to record their peaks."""
+
+    def __init__(self, interval: float = 0.05):
+        self.interval = interval
+        self.peak_rss = 0
+        self.peak_threads = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="bench-sampler", daemon=True)
+
+    def _sample(self):
+        self.peak_rss = max(self.peak_rss, current_rss_bytes())
+        self.peak_threads = max(self.peak_threads, os_thread_count())
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._sample()
+            self._stop.wait(self.interval)
+
+    def __enter__(self):
+        self._sample()
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        self._sample()
+
+
+def configure_fake_provider(latency: float, distribution: str, error_rate: float, output_tokens: int,
+                            telemetry: bool = False):
+    """Point every model at the offline fake provider."""
+    # agno reports every agent run to its API by default; offline that call only
+    # stalls on connection timeouts, so it is off unless asked for
+    os.environ["AGNO_TELEMETRY"] = "true" if telemetry else "false"
+    os.environ["FAKE_LLM"] = "1"
+    os.environ["FAKE_LLM_LATENCY"] = str(latency)
+    os.environ["FAKE_LLM_LATENCY_DISTRIBUTION"] = distribution
+    os.environ["FAKE_LLM_ERROR_RATE"] = str(error_rate)
+    os.environ["FAKE_LLM_OUTPUT_TOKENS"] = str(output_tokens)
+
+
+async def run_pipeline_workflow(index: int, run_id: int, save_results: bool) -> Dict[str, Any]:
+    """Run one workflow through arun_content_pipeline and time its stages."""
+    from agents.content.pipeline import arun_content_pipeline
+
+    loop = asyncio.get_running_loop()
+    started_at = {}
+    stage_seconds = {}
+
+    def on_event(event):
+        if event.get("type") != "step":
+            return
+        if event["status"] == "running":
+            started_at[event["step"]] = loop.time()
+        elif event["status"] == "completed" and event["step"] in started_at:
+            stage_seconds[event["step"]] = loop.time() - started_at[event["step"]]
+
+    start = loop.time()
+    error = None
+    try:
+        # Distinct topics so requests are neither coalesced nor served from the cache
+        await arun_content_pipeline(
+            f"benchmark topic {run_id}-{index}",
+            save_results=save_results,
+            use_cache=False,
+            on_event=on_event
+        )
+    except Exception as e:
+        error = str(e)
+    return {"seconds": loop.time() - start, "stages": stage_seconds, "error": error}
+
+
+async def run_api_workflow(client, index: int, run_id: int) -> Dict[str, Any]:
+    """Create one workflow through the API and wait for it to finish."""
+    loop = asyncio.get_running_loop()
+    start = loop.time()
+    error = None
+    stages = {}
+    try:
+        # Similar benchmark topics must not reuse each other's research
+        response = await client.post("/api/v1/content", json={"topic": f"benchmark topic {run_id}-{index}",
+                                                              "topic_reuse_threshold": None})
+        response.raise_for_status()
+        workflow_id = response.json()["workflow_id"]
+        while True:
+            status = (await client.get(f"/api/v1/workflows/{workflow_id}")).json()
+            if status["status"] in ("completed", "failed"):
+                break
+            await asyncio.sleep(0.01)
+        if status["status"] == "failed":
+            error = status.get("error")
+        stages = {
+            name: step["timing"]["duration"]
+            for name, step in (status.get("steps") or {}).items()
+            if "timing" in step
+        }
+    except Exception as e:
+        error = str(e)
+    return {"seconds": loop.time() - start, "stages": stages, "error": error}
+
+
+async def run_level(mode: str, concurrency: int, workflows: int, save_results: bool, run_id: int) -> Dict[str, Any]:
+    """Run `workflows` workflows with at most `concurrency` in flight."""
+    semaphore = asyncio.Semaphore(concurrency)
+    client = None
+    if mode == "api":
+        import httpx
+        from api.base import app
+        client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench")
+
+    async def one(index):
+        async with semaphore:
+            if mode == "api":
+                return await run_api_workflow(client, index, run_id)
+            return await run_pipeline_workflow(index, run_id, save_results)
+
+    loop = asyncio.get_running_loop()
+    try:
+        with ResourceSampler() as sampler:
+            start = loop.time()
+            runs = await asyncio.gather(*[one(i) for i in range(workflows)])
+            elapsed = loop.time() - start
+    finally:
+        if client is not None:
+            await client.aclose()
+
+    ok = [run for run in runs if run["error"] is None]
+    return {
+        "concurrency": concurrency,
+        "workflows": workflows,
+        "errors": len(runs) - len(ok),
+        "elapsed_seconds": elapsed,
+        "workflows_per_second": len(ok) / elapsed if elapsed > 0 else None,
+        "latency": summarize([run["seconds"] for run in ok]),
+        "stage_latency": {
+            stage: summarize([run["stages"][stage] for run in ok if stage in run["stages"]])
+            for stage in STAGES
+            if any(stage in run["stages"] for run in ok)
+        },
+        "peak_rss_mb": sampler.peak_rss / (1024 * 1024),
+        "peak_threads": sampler.peak_threads,
+    }
+
+
+def run_benchmark(mode: str = "pipeline",
+                  levels: Optional[List[int]] = None,
+                  workflows_per_level: Optional[int] = None,
+                  latency: float = 0.2,
+                  distribution: str = "lognormal",
+                  error_rate: float = 0.0,
+                  output_tokens: int = 300,
+                  save_results: bool = True,
+                  approx_tokens: bool = False,
+                  provider_rate_limits: bool = False,
+                  telemetry: bool = False,
+                  workdir: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Run the concurrency sweep.
+
+    Args:
+        mode: "pipeline" to call arun_content_pipeline, "api" to go through the FastAPI app
+        levels: Concurrency levels to sweep
+        workflows_per_level: Workflows per level; defaults to 4x the concurrency (at least 8)
+        latency: Mean fake provider latency in seconds
+        distribution: Fake latency distribution (fixed, uniform, lognormal)
+        error_rate: Fraction of fake provider calls that fail
+        output_tokens: Approximate tokens per fake answer
+        save_results: Write pipeline results to disk like production does
+        approx_tokens: Count tokens as len(text) // 4 instead of with tiktoken
+        provider_rate_limits: Keep the production RPM/TPM limits; by default they are
+            lifted, since they would measure the quota rather than the code
+        telemetry: Leave agno's per-run telemetry call enabled
+        workdir: Directory for storage writes; a temporary directory by default
+
+    Returns:
+        Dict with the settings and one result per concurrency level
+    """
+    levels = levels or [1, 2, 4, 8]
+    configure_fake_provider(latency, distribution, error_rate, output_tokens, telemetry)
+
+    from agents.content import pipeline
+    from agents.utils.stage_cache import StageCache
+    from agents.utils.result_log import ResultLog
+    from agents.utils.rate_limiter import DEFAULT_RATE_LIMITS, ProviderRateLimiter
+
+    if approx_tokens:
+        pipeline.TokenTracker.estimate_tokens = lambda self, text, model_name="gpt-3.5-turbo": len(text or "") // 4
+
+    previous_cwd = os.getcwd()
+    temporary = None
+    if workdir is None:
+        temporary = tempfile.TemporaryDirectory(prefix="content-bench-")
+        workdir = temporary.name
+    os.makedirs(workdir, exist_ok=True)
+    os.chdir(workdir)
+
+    # Keep benchmark output away from real caches and agents built without the fake
+    previous_cache, previous_limiter = pipeline.stage_cache, pipeline.rate_limiter
+    previous_log, previous_storage = pipeline.result_log, pipeline._content_storage
+    pipeline.stage_cache = StageCache(directory=os.path.join(workdir, "stage_cache"))
+    pipeline.result_log = ResultLog(directory=os.path.join(workdir, "storage", "results"))
+    pipeline._content_storage = None
+    previous_storage_dir = os.environ.get("CONTENT_STORAGE_DIR")
+    os.environ["CONTENT_STORAGE_DIR"] = os.path.join(workdir, "content_storage")
+    pipeline.agent_pool.clear()
+    if not provider_rate_limits:
+        pipeline.rate_limiter = ProviderRateLimiter({
+            provider: {"rpm": 1e9, "tpm": 1e12} for provider in DEFAULT_RATE_LIMITS
+        })
+
+    results = []
+    try:
+        for run_id, concurrency in enumerate(levels):
+            count = workflows_per_level or max(concurrency * 4, 8)
+            level = asyncio.run(run_level(mode, concurrency, count, save_results, run_id))
+            results.append(level)
+            print_level(level)
+    finally:
+        pipeline.agent_pool.clear()
+        pipeline.result_log.close()
+        pipeline.stage_cache, pipeline.rate_limiter = previous_cache, previous_limiter
+        pipeline.result_log, pipeline._content_storage = previous_log, previous_storage
+        if previous_storage_dir is None:
+            os.environ.pop("CONTENT_STORAGE_DIR", None)
+        else:
+            os.environ["CONTENT_STORAGE_DIR"] = previous_storage_dir
+        os.chdir(previous_cwd)
+        if temporary is not None:
+            temporary.cleanup()
+
+    return {
+        "mode": mode,
+        "settings": {
+            "latency": latency,
+            "distribution": distribution,
+            "error_rate": error_rate,
+            "output_tokens": output_tokens,
+            "save_results": save_results,
+            "approx_tokens": approx_tokens,
+            "provider_rate_limits": provider_rate_limits,
+            "telemetry": telemetry,
+        },
+        "levels": results,
+    }
+
+
+def _ms(value: Optional[float]) -> str:
+    return "-" if value is None else f"{value * 1000:.0f}"
+
+
+def print_level(level: Dict[str, Any]):
+    latency = level["latency"]
+    print(
+        f"concurrency={level['concurrency']:<4} workflows={level['workflows']:<5} "
+        f"errors={level['errors']:<3} wf/s={level['workflows_per_second'] or 0:.2f} "
+        f"e2e p50/p95/p99={_ms(latency['p50'])}/{_ms(latency['p95'])}/{_ms(latency['p99'])}ms "
+        f"rss={level['peak_rss_mb']:.0f}MB threads={level['peak_threads']}"
+    )
+    for stage, stats in level["stage_latency"].items():
+        print(f"    {stage:<15} p50/p95/p99={_ms(stats['p50'])}/{_ms(stats['p95'])}/{_ms(stats['p99'])}ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark content pipeline throughput against the fake LLM provider")
+    parser.add_argument("--mode", choices=("pipeline", "api"), default="pipeline")
+    parser.add_argument("--concurrency", help="Comma-separated concurrency levels, e.g. 1,4,16")
+    parser.add_argument("--max-concurrency", type=int, default=16, help="Sweep powers of two up to this level")
+    parser.add_argument("--workflows", type=int, help="Workflows per level (default: 4x concurrency, at least 8)")
+    parser.add_argument("--latency", type=float, default=0.2, help="Mean fake provider latency in seconds")
+    parser.add_argument("--distribution", choices=("fixed", "uniform", "lognormal"), default="lognormal")
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--output-tokens", type=int, default=300)
+    parser.add_argument("--no-save", action="store_true", help="Skip writing results to disk")
+    parser.add_argument("--approx-tokens", action="store_true", help="Skip tiktoken (e.g. when it can't be downloaded)")
+    parser.add_argument("--rate-limits", action="store_true", help="Keep the production provider RPM/TPM limits")
+    parser.add_argument("--telemetry", action="store_true", help="Keep agno's per-run telemetry call enabled")
+    parser.add_argument("--log-level", default="WARNING", help="Log level while benchmarking (default: WARNING)")
+    parser.add_argument("--workdir", help="Directory for storage writes (default: a temporary directory)")
+    parser.add_argument("--json", dest="json_path", help="Also write the report to this JSON file")
+    args = parser.parse_args()
+
+    # Plain-text logs keep the report readable
+    from agents.utils.logging_config import configure_logging
+    configure_logging(level=args.log_level, fmt="text")
+
+    if args.concurrency:
+        levels = [int(value) for value in args.concurrency.split(",") if value.strip()]
+    else:
+        levels = []
+        level = 1
+        while level <= args.max_concurrency:
+            levels.append(level)
+            level *= 2
+
+    report = run_benchmark(
+        mode=args.mode,
+        levels=levels,
+        workflows_per_level=args.workflows,
+        latency=args.latency,
+        distribution=args.distribution,
+        error_rate=args.error_rate,
+        output_tokens=args.output_tokens,
+        save_results=not args.no_save,
+        approx_tokens=args.approx_tokens,
+        provider_rate_limits=args.rate_limits,
+        telemetry=args.telemetry,
+        workdir=args.workdir
+    )
+
+    if args.json_path:
+        with open(args.json_path, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Report written to {args.json_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+"""
+Smoke test for the throughput benchmark harness.
+"""
+
+import os
+import sys
+
+# Add the parent directory to the path to import agents modules
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+sys.path.insert(0, os.path.dirname(__file__))
+
+import benchmark_pipeline
+from agents.content import pipeline
+
+
+def test_percentile_uses_nearest_rank():
+    values = [float(i) for i in range(1, 101)]
+
+    assert benchmark_pipeline.percentile(values, 50) == 50.0
+    assert benchmark_pipeline.percentile(values, 99) == 99.0
+    assert benchmark_pipeline.percentile([3.0], 95) == 3.0
+    assert benchmark_pipeline.percentile([], 50) is None
+
+
+def test_benchmark_sweeps_levels_offline(monkeypatch, tmp_path):
+    # Registered so the harness's environment changes are undone after the test
+    for name in ("FAKE_LLM", "FAKE_LLM_LATENCY", "FAKE_LLM_LATENCY_DISTRIBUTION",
+                 "FAKE_LLM_ERROR_RATE", "FAKE_LLM_OUTPUT_TOKENS", "AGNO_TELEMETRY"):
+        monkeypatch.setenv(name, "")
+    monkeypatch.setattr(pipeline, "hedge_policies", {})
+    # tiktoken downloads its encodings on first use, which needs network access
+    monkeypatch.setattr(pipeline.TokenTracker, "estimate_tokens",
+                        lambda self, text, model_name="gpt-3.5-turbo": len(text or "") // 4)
+
+    report = benchmark_pipeline.run_benchmark(
+        levels=[1, 2], workflows_per_level=2, latency=0.01, workdir=str(tmp_path)
+    )
+
+    assert [level["concurrency"] for level in report["levels"]] == [1, 2]
+    for level in report["levels"]:
+        assert level["errors"] == 0
+        assert level["workflows_per_second"] > 0
+        assert level["latency"]["p50"] > 0
+        assert set(level["stage_latency"]) >= {"research", "brief", "facts", "content"}
+        assert level["peak_threads"] >= 1
+        assert level["peak_rss_mb"] > 0
+    # Results were written under the work directory, not the current one
+    assert os.listdir(tmp_path / "storage" / "results")
@@ -0,0 +1,699 @@
+"""
+Offline tests for the async content pipeline.
+
+The agents are replaced with lightweight stand-ins so the orchestration can be
+exercised without API keys or network access.
+"""
+
+import os
+import sys
+import time
+import asyncio
+import threading
+
+import pytest
+
+# Add the parent directory to the path to import agents modules
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+from agents.content import pipeline
+from agents.utils.stage_cache import StageCache, make_cache_key
+from agents.utils.rate_limiter import DEFAULT_RATE_LIMITS, ProviderRateLimiter
+
+
+@pytest.fixture(autouse=True)
+def isolated_stage_cache(monkeypatch, tmp_path):
+    """Give every test an empty stage cache outside the repository"""
+    monkeypatch.setattr(pipeline, "stage_cache", StageCache(directory=str(tmp_path / "stage_cache")))
+
+
+@pytest.fixture(autouse=True)
+def isolated_content_storage(monkeypatch, tmp_path):
+    """Keep agent session files out of the repository's content_storage"""
+    monkeypatch.setenv("CONTENT_STORAGE_DIR", str(tmp_path / "content_storage"))
+    monkeypatch.setattr(pipeline, "_content_storage", None)
+
+
+@pytest.fixture(autouse=True)
+def isolated_rate_limiter(monkeypatch):
+    """Fresh limiter per test so budget used by one test doesn't throttle the next"""
+    limiter = ProviderRateLimiter({
+        provider: {"rpm": 100000, "tpm": 100000000} for provider in DEFAULT_RATE_LIMITS
+    })
+    monkeypatch.setattr(pipeline, "rate_limiter", limiter)
+    return limiter
+
+
+@pytest.fixture(autouse=True)
+def isolated_hedging(monkeypatch):
+    """No hedging or failover to real OpenRouter agents unless a test configures it"""
+    from agents.content.hedging import LatencyHistory
+
+    history = LatencyHistory()
+    monkeypatch.setattr(pipeline, "latency_history", history)
+    monkeypatch.setattr(pipeline, "hedge_policies", {})
+    return history
+
+
+class StubResponse:
+    def __init__(self, content):
+        self.content = content
+
+
+class StubAgent:
+    """Agent stand-in that answers after a short delay"""
+
+    def __init__(self, name, delay=0.05):
+        self.name = name
+        self.delay = delay
+        self.instructions = ""
+        self.prompts = []
+
+    async def arun(self, message, stream=False):
+        self.prompts.append(message)
+        await asyncio.sleep(self.delay)
+        if self.name == "brief":
+            return StubResponse("## Outline\n- Intro\n\n## Gap Analysis\nNobody covers cable management.")
+        return StubResponse(f"{self.name} output")
+
+
+def stub_team(brand_voice=None):
+    return tuple(StubAgent(name) for name in ("research", "brief", "facts", "content"))
+
+
+def offline_estimate(self, text, model_name="gpt-3.5-turbo"):
+    return len(text or "") // 4
+
+
+def test_arun_content_pipeline_steps(monkeypatch):
+    """The async pipeline produces the same result structure as the sync one"""
+    monkeypatch.setattr(pipeline, "create_content_team", stub_team)
+    monkeypatch.setattr(pipeline.TokenTracker, "estimate_tokens", offline_estimate)
+
+    results = asyncio.run(pipeline.arun_content_pipeline(
+        "desk organization tips", save_results=False, speculative_facts=False
+    ))
+
+    assert set(results["steps"]) == {"research", "brief", "facts", "content"}
+    assert results["steps"]["brief"]["extracted_gap_analysis"] == "Nobody covers cable management."
+    assert results["steps"]["content"]["output"] == "content output"
+    assert results["token_usage"]["usage"]["total"]["calls"] == 4
+
+
+def test_steps_report_timing_breakdown(monkeypatch):
+    """Each step records its start, end and where the time went"""
+    from agents.utils.timing import timed_call
+
+    class SearchingAgent(StubAgent):
+        async def arun(self, message, stream=False):
+            # Tool calls run in a worker thread inside the model call, as agno does
+            await asyncio.to_thread(timed_call("tool", time.sleep), 0.05)
+            return await super().arun(message, stream)
+
+    def team(brand_voice=None):
+        return (SearchingAgent("research", delay=0.05),) + stub_team()[1:]
+
+    monkeypatch.setattr(pipeline, "create_content_team", team)
+    monkeypatch.setattr(pipeline.TokenTracker, "estimate_tokens", offline_estimate)
+    pipeline.agent_pool.clear()
+
+    results = asyncio.run(pipeline.arun_content_pipeline(
+        "desk organization tips", save_results=False, speculative_facts=False
+    ))
+    pipeline.agent_pool.clear()
+
+    timing = results["steps"]["research"]["timing"]
+    breakdown = timing["breakdown"]
+    assert timing["started_at"] < timing["finished_at"]
+    assert timing["duration"] >= 0.1
+    # The search is tool time, not provider time
+    assert 0.05 <= breakdown["tool"] < 0.09
+    assert 0.05 <= breakdown["provider"] < 0.09
+    assert breakdown["storage"] > 0
+    assert results["steps"]["brief"]["timing"]["breakdown"]["tool"] == 0
+    assert results["timing"]["duration"] >= timing["duration"]
+
+
+class FactsAgent(StubAgent):
+    """Facts stand-in answering with a queue of canned replies"""
+
+    def __init__(self, replies):
+        super().__init__("facts", delay=0.01)
+        self.replies = list(replies)
+
+    async def arun(self, message, stream=False):
+        self.prompts.append(message)
+        return StubResponse(self.replies.pop(0))
+
+
+def run_with_facts_agent(monkeypatch, facts_agent):
+    def team(brand_voice=None):
+        research, brief, _, content = stub_team()
+        return research, brief, facts_agent, content
+
+    monkeypatch.setattr(pipeline, "create_content_team", team)
+    monkeypatch.setattr(pipeline.TokenTracker, "estimate_tokens", offline_estimate)
+    pipeline.agent_pool.clear()
+    try:
+        return asyncio.run(pipeline.arun_content_pipeline(
+            "desk organization tips", save_results=False, speculative_facts=False
+        ))
+    finally:
+        pipeline.agent_pool.clear()
+
+
+def test_facts_json_is_repaired_locally_and_passed_on_compactly(monkeypatch):
+    """Defective JSON is repaired without another model call; content gets one line per record"""
+    facts = FactsAgent([
+        "Here you go:\n{'stats': [{'fact': '40% of desks are cluttered', 'source': 'Desk Survey', 'date': 2024},], "
+        "'social_insights': [], 'summary': None, "
+    ])
+
+    results = run_with_facts_agent(monkeypatch, facts)
+
+    step = results["steps"]["facts"]
+    assert step["structured"]["repaired"] is True
+    assert step["structured"]["stats"][0] == {"fact": "40% of desks are cluttered", "source": "Desk Survey", "date": "2024"}
+    assert "fix_requested" not in step
+    assert len(facts.prompts) == 1
+    assert "- 40% of desks are cluttered (Desk Survey, 2024)" in results["steps"]["content"]["prompt"]
+    assert "'stats'" not in results["steps"]["content"]["prompt"]
+
+
+def test_unrepairable_facts_json_gets_one_targeted_fix(monkeypatch):
+    facts = FactsAgent([
+        '{"stats": [{"fact": "40% of desks" "source": "Desk Survey"}]}',
+        '```json\n{"stats": [{"fact": "40% of desks are cluttered", "source": "Desk Survey"}], "summary": "Tidy up"}\n```',
+    ])
+
+    results = run_with_facts_agent(monkeypatch, facts)
+
+    step = results["steps"]["facts"]
+    assert step["fix_requested"] is True
+    assert step["structured"]["summary"] == "Tidy up"
+    assert "could not be parsed as JSON" in facts.prompts[1]
+    assert "facts_fix" in results["token_usage"]["step_usage"]
+
+
+def test_prose_facts_are_used_as_text_without_a_fix(monkeypatch):
+    facts = FactsAgent(["Desks are cluttered. 40% of people agree."])
+
+    results = run_with_facts_agent(monkeypatch, facts)
+
+    assert "structured" not in results["steps"]["facts"]
+    assert len(facts.prompts) == 1
+    assert "40% of people agree." in results["steps"]["content"]["prompt"]
+
+
+def test_speculative_facts_prefetch_and_topup(monkeypatch):
+    """Facts are pre-fetched for the topic and topped up with the gap analysis"""
+    monkeypatch.setattr(pipeline, "create_content_team", stub_team)
+    monkeypatch.setattr(pipeline.TokenTracker, "estimate_tokens", offline_estimate)
+
+    results = asyncio.run(pipeline.arun_content_pipeline("desk organization tips", save_results=False))
+
+    assert set(results["steps"]) == {"research", "brief", "facts_prefetch", "facts", "content"}
+    topup_prompt = results["steps"]["facts"]["prompt"]
+    assert "facts output" in topup_prompt
+    assert "Nobody covers cable management." in topup_prompt
+    assert results["token_usage"]["usage"]["total"]["calls"] == 5
+
+
+def test_arun_content_pipeline_runs_concurrently(monkeypatch):
+    """Many workflows can be in flight on one event loop"""
+    monkeypatch.setattr(pipeline, "create_content_team", stub_team)
+    monkeypatch.setattr(pipeline.TokenTracker, "estimate_tokens", offline_estimate)
+
+    async def run_many():
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        await asyncio.gather(*[
+            pipeline.arun_content_pipeline(f"topic {i}", save_results=False) for i in range(20)
+        ])
+        return loop.time() - start
+
+    elapsed = asyncio.run(run_many())
+
+    # Four sequential 50ms steps; twenty serial runs would take at least 4 seconds
+    assert elapsed < 2.0
+
+
+def test_identical_in_flight_requests_are_coalesced(monkeypatch):
+    """Duplicate requests attach to the running pipeline instead of calling the models again"""
+    monkeypatch.setattr(pipeline, "create_content_team", stub_team)
+    monkeypatch.setattr(pipeline.TokenTracker, "estimate_tokens", offline_estimate)
+
+    async def run_duplicates():
+        return await asyncio.gather(
+            pipeline.arun_content_pipeline("Desk organization tips", save_results=False, use_cache=False),
+            pipeline.arun_content_pipeline("desk  organization tips ", save_results=False, use_cache=False),
+            pipeline.arun_content_pipeline("desk organization tips", word_count=800, save_results=False, use_cache=False),
+            pipeline.arun_content_pipeline("desk organization tips", save_results=False, use_cache=False, deadline=30),
+            pipeline.arun_content_pipeline("desk organization tips", save_results=True, use_cache=False),
+            pipeline.arun_content_pipeline("desk organization tips", save_results=False, use_cache=False,
+                                           tracker=own_tracker),
+        )
+
+    own_tracker = pipeline.TokenTracker()
+    saved = []
+    monkeypatch.setattr(pipeline, "save_pipeline_results", lambda results, tracker: saved.append(results) or "id")
+    first, duplicate, other, with_deadline, saving, tracked = asyncio.run(run_duplicates())
+
+    assert "coalesced" not in first
+    assert duplicate["coalesced"] is True
+    assert duplicate["steps"] == first["steps"]
+    assert "coalesced" not in other
+    # A deadline is never left waiting on a run without one
+    assert "coalesced" not in with_deadline
+    assert with_deadline["deadline"]["seconds"] == 30
+    # Only three pipelines actually ran: 5 calls each
+    assert first["token_usage"]["usage"]["total"]["calls"] == 5
+    assert other["token_usage"]["usage"]["total"]["calls"] == 5
+    assert with_deadline["token_usage"]["usage"]["total"]["calls"] == 5
+    # A run whose results must be saved doesn't attach to one that won't save them
+    assert "coalesced" not in saving
+    assert saved and saved[0]["topic"] == "desk organization tips"
+    # A caller's own tracker records the calls of its own run
+    assert "coalesced" not in tracked
+    assert own_tracker.get_usage_report()["usage"]["total"]["calls"] == 5
+
+
+def test_slow_facts_call_is_hedged_through_openrouter(monkeypatch):
+    """A facts call slower than its usual latency is answered by the hedge secondary"""
+    from agents.content.hedging import HedgePolicy
+
+    def slow_facts_team(brand_voice=None):
+        research, brief, _, content = stub_team()
+        return research, brief, StubAgent("facts", delay=5.0), content
+
+    hedge_agents = []
+
+    def hedge_factory(agent, model_id):
+        hedge_agents.append(model_id)
+        return StubAgent("hedged facts", delay=0.01)
+
+    monkeypatch.setattr(pipeline, "create_content_team", slow_facts_team)
+    monkeypatch.setattr(pipeline.TokenTracker, "estimate_tokens", offline_estimate)
+    monkeypatch.setattr(pipeline, "hedge_agent_factory", hedge_factory)
+    monkeypatch.setattr(pipeline, "hedge_policies", {
+        "facts": HedgePolicy("x-ai/grok-2-1212", percentile=95, min_samples=1, min_delay=0.0)
+    })
+    pipeline.agent_pool.clear()
+    pipeline.latency_history.record("facts", 0.05)
+
+    results = asyncio.run(pipeline.arun_content_pipeline(
+        "desk organization tips", save_results=False, speculative_facts=False, use_cache=False
+    ))
+    pipeline.agent_pool.clear()
+
+    assert hedge_agents == ["x-ai/grok-2-1212"]
+    assert results["steps"]["facts"]["output"] == "hedged facts output"
+    assert results["steps"]["facts"].get("hedged") is True
+    assert "hedged" not in results["steps"]["research"]
+
+    usage = results["token_usage"]
+    assert usage["hedge_usage"]["calls"] == 1
+    calls = {call["provider"]: call for call in usage["step_usage"]["facts"]}
+    assert calls["openrouter"]["hedge"] is True
+    # The cancelled primary is only charged for its prompt
+    assert "hedge" not in calls["xai"] and calls["xai"]["output_tokens"] == 0
+
+
+def test_deadline_degrades_slow_facts_to_prefetched_facts(monkeypatch):
+    """A facts top-up that would miss the deadline is dropped in favour of the pre-fetch"""
+
+    class SlowTopupAgent(StubAgent):
+        async def arun(self, message, stream=False):
+            if "GAP ANALYSIS" in message:
+                await asyncio.sleep(5)
+            return await super().arun(message, stream)
+
+    def slow_topup_team(brand_voice=None):
+        research, brief, _, content = stub_team()
+        return research, brief, SlowTopupAgent("facts"), content
+
+    monkeypatch.setattr(pipeline, "create_content_team", slow_topup_team)
+    monkeypatch.setattr(pipeline.TokenTracker, "estimate_tokens", offline_estimate)
+    pipeline.agent_pool.clear()
+
+    results = asyncio.run(pipeline.arun_content_pipeline(
+        "desk organization tips", save_results=False, use_cache=False, deadline=1.0
+    ))
+    pipeline.agent_pool.clear()
+
+    assert results["degraded"] == ["facts"]
+    assert results["steps"]["facts"]["degraded"] == "prefetched_facts"
+    assert results["steps"]["facts"]["output"] == results["steps"]["facts_prefetch"]["output"]
+    assert results["steps"]["content"]["output"] == "content output"
+    assert results["deadline"]["met"] is True
+
+
+def test_failed_research_falls_back_to_stale_cache(monkeypatch):
+    """Expired research for the same prompt is used when the research call fails"""
+
+    class FailingResearchAgent(StubAgent):
+        async def arun(self, message, stream=False):
+            raise RuntimeError("openrouter unavailable")
+
+    def failing_team(brand_voice=None):
+        _, brief, facts, content = stub_team()
+        return FailingResearchAgent("research"), brief, facts, content
+
+    monkeypatch.setattr(pipeline, "create_content_team", failing_team)
+    monkeypatch.setattr(pipeline.TokenTracker, "estimate_tokens", offline_estimate)
+    pipeline.agent_pool.clear()
+
+    key = make_cache_key("research", "o3-mini", pipeline.create_research_prompt("desk organization tips"), "")
+    pipeline.stage_cache.set("research", key, "last week's research", ttl=0.01)
+    time.sleep(0.02)
+
+    results = asyncio.run(pipeline.arun_content_pipeline(
+        "desk organization tips", save_results=False, speculative_facts=False
+    ))
+    pipeline.agent_pool.clear()
+
+    assert results["steps"]["research"]["output"] == "last week's research"
+    assert results["steps"]["research"]["degraded"] == "stale_cache"
+    assert results["degraded"] == ["research"]
+
+
+def test_real_team_runs_offline_with_fake_llm(monkeypatch, tmp_path):
+    """FAKE_LLM swaps every provider model for the offline fake"""
+    from agno.storage.json import JsonStorage
+    from agents.utils.fake_llm import FakeLLM
+
+    for key in ("OPENROUTER_API_KEY", "ANTHROPIC_API_KEY", "DEEPSEEK_API_KEY", "XAI_API_KEY"):
+        monkeypatch.delenv(key, raising=False)
+    monkeypatch.setenv("FAKE_LLM", "1")
+    monkeypatch.setenv("FAKE_LLM_LATENCY", "0.01")
+    monkeypatch.setattr(pipeline, "get_content_storage", lambda: JsonStorage(dir_path=str(tmp_path / "storage")))
+    monkeypatch.setattr(pipeline.TokenTracker, "estimate_tokens", offline_estimate)
+    pipeline.agent_pool.clear()
+
+    results = asyncio.run(pipeline.arun_content_pipeline(
+        "desk organization tips", save_results=False, use_cache=False
+    ))
+    team = pipeline.create_content_team()
+    pipeline.agent_pool.clear()
+
+    assert all(isinstance(agent.model, FakeLLM) for agent in team)
+    assert [agent.model.id for agent in team] == ["openai/o3-mini", "deepseek-chat", "grok-beta", "claude-3-sonnet-20240229"]
+    assert "budget options" in results["steps"]["brief"]["extracted_gap_analysis"]
+    assert results["steps"]["content"]["output"]
+    assert len(results["steps"]["facts"]["structured"]["stats"]) == 3
+    assert results["token_usage"]["usage"]["total"]["calls"] == 5
+
+
+def test_agent_building_and_session_writes_run_off_the_event_loop(monkeypatch, tmp_path):
+    """A pool miss and agno's session writes don't block other workflows on the loop"""
+    from agents.content.providers import TimedJsonStorage
+
+    for key in ("OPENROUTER_API_KEY", "ANTHROPIC_API_KEY", "DEEPSEEK_API_KEY", "XAI_API_KEY"):
+        monkeypatch.delenv(key, raising=False)
+    monkeypatch.setenv("FAKE_LLM", "1")
+    monkeypatch.setenv("FAKE_LLM_LATENCY", "0.01")
+    monkeypatch.setattr(pipeline.TokenTracker, "estimate_tokens", offline_estimate)
+    pipeline.agent_pool.clear()
+
+    threads = {"build": set(), "write": set()}
+    original_team, original_write = pipeline.create_content_team, TimedJsonStorage._write_pending
+
+    def recording_team(brand_voice=None):
+        threads["build"].add(threading.get_ident())
+        return original_team(brand_voice)
+
+    def recording_write(self, session_id):
+        threads["write"].add(threading.get_ident())
+        return original_write(self, session_id)
+
+    monkeypatch.setattr(pipeline, "create_content_team", recording_team)
+    monkeypatch.setattr(TimedJsonStorage, "_write_pending", recording_write)
+
+    async def run():
+        loop_thread = threading.get_ident()
+        await pipeline.arun_content_pipeline("desk organization tips", save_results=False, use_cache=False)
+        await pipeline.get_content_storage().flush()
+        return loop_thread
+
+    loop_thread = asyncio.run(run())
+    pipeline.agent_pool.clear()
+
+    assert threads["build"] and loop_thread not in threads["build"]
+    assert threads["write"] and loop_thread not in threads["write"]
+    assert len(os.listdir(tmp_path / "content_storage")) == 4
+
+
+def test_closing_batch_generator_cancels_remaining_topics(monkeypatch):
+    """Topics stop being started as soon as the caller closes the generator"""
+    from agents.content.batch import run_content_pipeline_batch
+
+    started = []
+    original = pipeline.arun_content_pipeline
+
+    async def recording_run(topic, **kwargs):
+        started.append(topic)
+        return await original(topic, **kwargs)
+
+    monkeypatch.setattr(pipeline, "create_content_team", stub_team)
+    monkeypatch.setattr(pipeline.TokenTracker, "estimate_tokens", offline_estimate)
+    monkeypatch.setattr("agents.content.batch.arun_content_pipeline", recording_run)
+
+    topics = [f"unrelated subject {i}" for i in range(20)]
+    batch = run_content_pipeline_batch(topics, save_results=False, use_cache=False, max_in_flight=2,
+                                       reuse_threshold=None)
+    next(batch)
+    batch.close()
+    count = len(started)
+    time.sleep(0.3)
+
+    # Only the topics in flight when the first one finished were started, and no more after closing
+    assert count <= 4
+    assert len(started) == count
+
+
+def test_closing_batch_generator_stops_running_pipelines(monkeypatch):
+    """No model call is left running once the batch is closed, even while its loop keeps going"""
+    from agents.content.batch import arun_content_pipeline_batch, run_content_pipeline_batch
+
+    calls = {"active": 0, "cancelled": 0}
+
+    class HangingAgent(StubAgent):
+        async def arun(self, message, stream=False):
+            calls["active"] += 1
+            try:
+                await asyncio.sleep(30 if "slow subject" in message else 0.01)
+                return await super().arun(message, stream)
+            except asyncio.CancelledError:
+                calls["cancelled"] += 1
+                raise
+            finally:
+                calls["active"] -= 1
+
+    def hanging_team(brand_voice=None):
+        return tuple(HangingAgent(name, delay=0) for name in ("research", "brief", "facts", "content"))
+
+    monkeypatch.setattr(pipeline, "create_content_team", hanging_team)
+    monkeypatch.setattr(pipeline.TokenTracker, "estimate_tokens", offline_estimate)
+    pipeline.agent_pool.clear()
+    topics = ["quick subject", "slow subject one", "slow subject two"]
+
+    async def close_async_batch():
+        batch = arun_content_pipeline_batch(topics, save_results=False, use_cache=False, reuse_threshold=None)
+        first = await batch.__anext__()
+        await batch.aclose()
+        # Let anything that survived the close get scheduled before checking
+        await asyncio.sleep(0.05)
+        return first, calls["active"]
+
+    first, active = asyncio.run(close_async_batch())
+    assert first["topic"] == "quick subject"
+    assert active == 0
+    cancelled = calls["cancelled"]
+    assert cancelled >= 2
+
+    batch = run_content_pipeline_batch(topics, save_results=False, use_cache=False, reuse_threshold=None)
+    assert next(batch)["topic"] == "quick subject"
+    started = time.monotonic()
+    batch.close()
+    pipeline.agent_pool.clear()
+
+    assert time.monotonic() - started < 5
+    assert calls["active"] == 0
+    assert calls["cancelled"] >= 2 * cancelled
+
+
+def test_batch_respects_provider_limits_and_streams_results(monkeypatch):
+    """Batch results arrive per topic and no provider exceeds its cap"""
+    from agents.content.batch import ProviderConcurrency, run_content_pipeline_batch
+
+    monkeypatch.setattr(pipeline, "create_content_team", stub_team)
+    monkeypatch.setattr(pipeline.TokenTracker, "estimate_tokens", offline_estimate)
+
+    created = []
+    original_init = ProviderConcurrency.__init__
+
+    def recording_init(self, limits=None):
+        original_init(self, limits)
+        created.append(self)
+
+    monkeypatch.setattr(ProviderConcurrency, "__init__", recording_init)
+
+    topics = [f"topic {i}" for i in range(12)]
+    limits = {"openrouter": 2, "deepseek": 2, "xai": 1, "anthropic": 3}
+    results = list(run_content_pipeline_batch(topics, save_results=False, provider_limits=limits))
+
+    assert sorted(result["topic"] for result in results) == sorted(topics)
+    assert all("error" not in result for result in results)
+    peaks = created[0].peak_in_flight
+    for provider, limit in limits.items():
+        assert 0 < peaks[provider] <= limit
+    # Every topic starts with research, so the OpenRouter cap is saturated
+    assert peaks["openrouter"] == 2
+
+
+def test_repeated_topic_reuses_cached_stages(monkeypatch):
+    """A rerun with a different word count only pays for the content step"""
+    monkeypatch.setattr(pipeline, "create_content_team", stub_team)
+    monkeypatch.setattr(pipeline.TokenTracker, "estimate_tokens", offline_estimate)
+
+    asyncio.run(pipeline.arun_content_pipeline("desk organization tips", word_count=500, save_results=False))
+    results = asyncio.run(pipeline.arun_content_pipeline("desk organization tips", word_count=800, save_results=False))
+
+    cached = {name for name, step in results["steps"].items() if step.get("cached")}
+    assert cached == {"research", "brief", "facts_prefetch", "facts"}
+    assert results["token_usage"]["usage"]["total"]["calls"] == 1
+
+
+def test_similar_topic_reuses_cached_research_and_brief(monkeypatch):
+    """A paraphrased topic reuses the research, and with it the brief, of the first topic"""
+    monkeypatch.setattr(pipeline, "create_content_team", stub_team)
+    monkeypatch.setattr(pipeline.TokenTracker, "estimate_tokens", offline_estimate)
+
+    asyncio.run(pipeline.arun_content_pipeline("desk organization tips", save_results=False))
+    results = asyncio.run(pipeline.arun_content_pipeline("Tips for organizing your desk", save_results=False))
+
+    research = results["steps"]["research"]
+    assert research["reused_from"] == {"topic": "desk organization tips", "score": 1.0}
+    assert research["cached"] is True
+    assert results["steps"]["brief"]["cached"] is True
+    assert results["topic_matches"] == [{"topic": "desk organization tips", "score": 1.0}]
+    calls = results["token_usage"]["usage"]["total"]["calls"]
+    assert calls == 3  # facts_prefetch, facts and content are topic-specific
+
+
+def test_topic_reuse_threshold_is_respected(monkeypatch):
+    monkeypatch.setattr(pipeline, "create_content_team", stub_team)
+    monkeypatch.setattr(pipeline.TokenTracker, "estimate_tokens", offline_estimate)
+
+    asyncio.run(pipeline.arun_content_pipeline("desk organization tips", save_results=False))
+    below = asyncio.run(pipeline.arun_content_pipeline("desk organization mistakes", save_results=False))
+    disabled = asyncio.run(pipeline.arun_content_pipeline("tips for organizing your desk", save_results=False,
+                                                          reuse_threshold=None))
+
+    assert "reused_from" not in below["steps"]["research"]
+    assert 0 < below["topic_matches"][0]["score"] < 0.85
+    assert "topic_matches" not in disabled
+    assert "cached" not in disabled["steps"]["research"]
+
+
+def test_batch_runs_research_and_brief_once_per_cluster(monkeypatch):
+    """Paraphrases in one batch share their representative's research and brief"""
+    from agents.content.batch import run_content_pipeline_batch
+
+    calls = {"research": 0, "brief": 0}
+
+    class CountingAgent(StubAgent):
+        async def arun(self, message, stream=False):
+            calls[self.name] += 1
+            return await super().arun(message, stream)
+
+    def counting_team(brand_voice=None):
+        _, _, facts, content = stub_team()
+        return (CountingAgent("research"), CountingAgent("brief"), facts, content)
+
+    monkeypatch.setattr(pipeline, "create_content_team", counting_team)
+    monkeypatch.setattr(pipeline.TokenTracker, "estimate_tokens", offline_estimate)
+    pipeline.agent_pool.clear()
+
+    topics = ["desk organization tips", "standing desk setup", "tips for organizing your desk",
+              "Desk Organization Tips", "setup for standing desks"]
+    results = {result["topic"]: result for result in run_content_pipeline_batch(topics, save_results=False,
+                                                                                use_cache=False)}
+
+    assert set(results) == set(topics)
+    assert calls == {"research": 2, "brief": 2}
+    member = results["tips for organizing your desk"]
+    assert member["cluster"] == {"representative": "desk organization tips", "score": 1.0}
+    assert member["steps"]["brief"]["reused_from"] == {"topic": "desk organization tips"}
+    assert "facts_prefetch" not in member["steps"]
+    assert member["steps"]["content"]["output"] == "content output"
+    assert "cluster" not in results["standing desk setup"]
+    pipeline.agent_pool.clear()
+
+
+def test_batch_passes_an_explicit_zero_reuse_threshold_to_clustering(monkeypatch):
+    """reuse_threshold=0.0 is a real threshold, not a request for the default"""
+    from agents.content import clustering
+    from agents.content.batch import run_content_pipeline_batch
+
+    thresholds = []
+    original = clustering.cluster_keywords
+
+    def recording_cluster(keywords, threshold, n_clusters=None):
+        thresholds.append(threshold)
+        return original(keywords, threshold=threshold, n_clusters=n_clusters)
+
+    monkeypatch.setattr(pipeline, "create_content_team", stub_team)
+    monkeypatch.setattr(pipeline.TokenTracker, "estimate_tokens", offline_estimate)
+    monkeypatch.setattr(clustering, "cluster_keywords", recording_cluster)
+
+    topics = ["desk organization tips", "standing desk setup"]
+    results = list(run_content_pipeline_batch(topics, save_results=False, use_cache=False, reuse_threshold=0.0))
+
+    assert thresholds == [0.0]
+    assert len(results) == 2
+    pipeline.agent_pool.clear()
+
+
+def test_resume_from_checkpoints_after_failure(monkeypatch, tmp_path):
+    """A failed facts step keeps the paid-for upstream stages for the resumed run"""
+    from agents.content.checkpoints import CheckpointStore
+
+    store = CheckpointStore(directory=str(tmp_path / "checkpoints"))
+    monkeypatch.setattr(pipeline.TokenTracker, "estimate_tokens", offline_estimate)
+
+    class FailingFactsAgent(StubAgent):
+        async def arun(self, message, stream=False):
+            if "GAP ANALYSIS" in message:
+                raise TimeoutError("facts step timed out")
+            return await super().arun(message, stream)
+
+    def failing_team(brand_voice=None):
+        research, brief, _, content = stub_team()
+        return (research, brief, FailingFactsAgent("facts"), content)
+
+    monkeypatch.setattr(pipeline, "create_content_team", failing_team)
+    pipeline.agent_pool.clear()
+
+    with pytest.raises(TimeoutError):
+        asyncio.run(pipeline.arun_content_pipeline(
+            "desk organization tips", save_results=False, use_cache=False,
+            workflow_id="wf-1", checkpoint_store=store
+        ))
+    assert set(store.load_stages("wf-1")) == {"research", "brief", "facts_prefetch"}
+
+    monkeypatch.setattr(pipeline, "create_content_team", stub_team)
+    pipeline.agent_pool.clear()
+
+    results = asyncio.run(pipeline.arun_content_pipeline(
+        "desk organization tips", save_results=False, use_cache=False,
+        workflow_id="wf-1", checkpoint_store=store, resume=True
+    ))
+
+    resumed = {name for name, step in results["steps"].items() if step.get("resumed")}
+    assert resumed == {"research", "brief", "facts_prefetch"}
+    assert results["steps"]["brief"]["extracted_gap_analysis"] == "Nobody covers cable management."
+    assert results["token_usage"]["usage"]["total"]["calls"] == 2
+    # Checkpoints are dropped once the workflow completes
+    assert store.load_stages("wf-1") == {}
+    pipeline.agent_pool.clear()
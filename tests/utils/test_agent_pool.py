@@ -0,0 +1,89 @@
+"""
+Tests for the process-level content agent pool.
+
+Agents are built with placeholder API keys; nothing is sent to a provider.
+"""
+
+import os
+import sys
+from types import SimpleNamespace
+
+# Add the parent directory to the path to import agents modules
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+from agents.content.agent_pool import AgentPool, brand_voice_fingerprint
+from agents.content.pipeline import create_content_team
+
+PLACEHOLDER_KEYS = ["OPENROUTER_API_KEY", "ANTHROPIC_API_KEY", "DEEPSEEK_API_KEY", "XAI_API_KEY"]
+
+
+def set_placeholder_keys(monkeypatch):
+    for key in PLACEHOLDER_KEYS:
+        monkeypatch.setenv(key, "test-key")
+
+
+def test_brand_voice_fingerprint_is_order_independent():
+    first = {"tone": "friendly", "style": "direct"}
+    second = {"style": "direct", "tone": "friendly"}
+
+    assert brand_voice_fingerprint(first) == brand_voice_fingerprint(second)
+    assert brand_voice_fingerprint(first) != brand_voice_fingerprint({"tone": "formal"})
+    assert brand_voice_fingerprint(None) == brand_voice_fingerprint({})
+
+
+def test_pool_reuses_agent_sets_per_brand_voice(monkeypatch):
+    set_placeholder_keys(monkeypatch)
+    pool = AgentPool(create_content_team)
+    voice = {"tone": "friendly"}
+
+    with pool.checkout(voice) as agents:
+        first_models = [id(agent.model) for agent in agents]
+
+    with pool.checkout(voice) as agents:
+        # Same model objects means the HTTP clients they cache are reused too
+        assert [id(agent.model) for agent in agents] == first_models
+
+    with pool.checkout(None) as agents:
+        assert [id(agent.model) for agent in agents] != first_models
+
+    assert pool.stats["created"] == 2
+    assert pool.stats["reused"] == 1
+
+
+def test_released_agents_are_reset(monkeypatch):
+    set_placeholder_keys(monkeypatch)
+    pool = AgentPool(create_content_team)
+
+    agents = pool.acquire()
+    agents[0].session_id = "workflow-1"
+    agents[3].stream = True
+    pool.release(agents)
+
+    assert agents[0].session_id is None
+    assert agents[3].stream is None
+
+
+def test_warm_and_idle_limit(monkeypatch):
+    set_placeholder_keys(monkeypatch)
+    pool = AgentPool(create_content_team, max_idle_per_voice=2)
+
+    assert pool.warm(count=3) == 2
+    assert pool.idle_count() == 2
+
+
+def test_acquire_idle_never_builds():
+    built = []
+
+    def factory(brand_voice):
+        built.append(brand_voice)
+        return (SimpleNamespace(memory=None),)
+
+    pool = AgentPool(factory)
+    assert pool.acquire_idle() is None
+    assert built == []
+
+    agents = pool.acquire()
+    pool.release(agents)
+    assert pool.acquire_idle() is agents
+    assert pool.acquire_idle() is None
+    assert pool.stats == {"created": 1, "reused": 1, "discarded": 0}
@@ -0,0 +1,64 @@
+"""
+Tests for keyword clustering.
+"""
+
+import os
+import sys
+
+import numpy as np
+
+# Add the parent directory to the path to import agents modules
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+from agents.content.clustering import cluster_keywords, keyword_matrix
+from agents.utils.topic_index import topic_similarity
+
+KEYWORDS = [
+    "desk organization tips",
+    "sourdough starter",
+    "tips for organizing your desk",
+    "standing desk setup",
+    "Sourdough starters",
+    "setup for standing desks",
+    "python web frameworks",
+]
+
+
+def test_keyword_matrix_rows_are_unit_vectors_close_to_exact_similarity():
+    matrix = keyword_matrix(KEYWORDS)
+
+    assert matrix.shape == (len(KEYWORDS), 2048)
+    assert np.allclose(np.linalg.norm(matrix, axis=1), 1.0)
+    folded = float(matrix[0] @ matrix[3])
+    assert abs(folded - topic_similarity(KEYWORDS[0], KEYWORDS[3])) < 0.05
+
+
+def test_threshold_clusters_group_paraphrases_around_a_representative():
+    clusters = cluster_keywords(KEYWORDS)
+
+    groups = {frozenset(cluster.keywords) for cluster in clusters}
+    assert groups == {
+        frozenset({"desk organization tips", "tips for organizing your desk"}),
+        frozenset({"sourdough starter", "Sourdough starters"}),
+        frozenset({"standing desk setup", "setup for standing desks"}),
+        frozenset({"python web frameworks"}),
+    }
+    for cluster in clusters:
+        assert cluster.keywords[0] == cluster.representative
+        assert [KEYWORDS[index] for index in cluster.indices] == cluster.keywords
+        assert all(score >= 0.85 for score in cluster.scores)
+    assert len(clusters[-1].keywords) == 1
+
+
+def test_higher_threshold_splits_clusters():
+    assert len(cluster_keywords(KEYWORDS, threshold=1.01)) == len(KEYWORDS)
+    assert len(cluster_keywords(KEYWORDS, threshold=0.0)) == 1
+
+
+def test_kmeans_uses_the_requested_number_of_clusters():
+    clusters = cluster_keywords(KEYWORDS, n_clusters=3, seed=1)
+
+    assert len(clusters) == 3
+    assert sorted(index for cluster in clusters for index in cluster.indices) == list(range(len(KEYWORDS)))
+    assert cluster_keywords(KEYWORDS, n_clusters=3, seed=1) == clusters
+    assert cluster_keywords([]) == []
@@ -0,0 +1,86 @@
+"""
+Tests for token-budgeted assembly of the Content Creator context.
+"""
+
+import os
+import sys
+
+# Add the parent directory to the path to import agents modules
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+from agents.content.context import TRUNCATION_MARKER, assemble_content_context, split_brief
+from agents.utils.token_tracker import TokenTracker
+
+
+class WordTracker(TokenTracker):
+    """Counts one token per word so budgets are easy to reason about offline"""
+
+    def estimate_tokens(self, text, model_name="gpt-3.5-turbo"):
+        return len((text or "").split())
+
+
+BRIEF = """## Outline
+- Intro to cable trays
+- Monitor arms
+
+## Gap Analysis
+Nobody covers cable management under standing desks.
+
+## Notes
+Keep it practical."""
+
+FACTS = """Desk clutter is a common complaint.
+73% of remote workers report clutter.
+Cable trays cost about 20 dollars.
+Minimalism is popular."""
+
+RESEARCH = "\n".join(f"research line {i} with some extra words" for i in range(50))
+
+
+def test_split_brief_separates_gap_analysis():
+    outline, gap = split_brief(BRIEF)
+
+    assert gap.startswith("## Gap Analysis")
+    assert "standing desks" in gap
+    assert "Gap Analysis" not in outline
+    assert "Monitor arms" in outline and "Keep it practical." in outline
+
+
+def test_context_within_budget_is_unchanged():
+    context = assemble_content_context("short research", BRIEF, FACTS, "claude-3-sonnet-20240229",
+                                       tracker=WordTracker(), budget=10000)
+
+    assert context["research"] == "short research"
+    assert context["brief"] == BRIEF
+    assert context["facts"] == FACTS
+    assert context["stats"]["trimmed"] is False
+
+
+def test_trimming_keeps_priority_sections_and_is_deterministic():
+    tracker = WordTracker()
+    budget = 60
+
+    context = assemble_content_context(RESEARCH, BRIEF, FACTS, "claude-3-sonnet-20240229",
+                                       tracker=tracker, budget=budget)
+    again = assemble_content_context(RESEARCH, BRIEF, FACTS, "claude-3-sonnet-20240229",
+                                     tracker=tracker, budget=budget)
+
+    assert context == again
+    assert context["stats"]["trimmed"] is True
+    assert context["stats"]["tokens"] <= budget
+    # Outline, gap analysis and every fact fit; research is cut short
+    assert "Monitor arms" in context["brief"]
+    assert "standing desks" in context["brief"]
+    assert context["facts"] == FACTS
+    assert context["research"].startswith("research line 0 ")
+    assert context["research"].endswith(TRUNCATION_MARKER)
+
+
+def test_statistics_outrank_other_facts():
+    context = assemble_content_context(RESEARCH, BRIEF, FACTS, "claude-3-sonnet-20240229",
+                                       tracker=WordTracker(), budget=40)
+
+    assert "73% of remote workers report clutter." in context["facts"]
+    assert "Cable trays cost about 20 dollars." in context["facts"]
+    assert "Desk clutter is a common complaint." not in context["facts"]
+    assert context["research"] == TRUNCATION_MARKER
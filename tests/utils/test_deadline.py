@@ -0,0 +1,51 @@
+"""
+Tests for splitting a workflow deadline into per-stage time budgets.
+"""
+
+import os
+import sys
+
+import pytest
+
+# Add the parent directory to the path to import agents modules
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+from agents.content.deadline import DEFAULT_STAGE_TIMEOUT, Deadline
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_budget_is_split_by_remaining_critical_path():
+    clock = FakeClock()
+    deadline = Deadline(100, clock=clock)
+
+    # research gets 0.25 of research + brief + facts + content (1.0)
+    assert deadline.stage_timeout("research") == pytest.approx(25.0)
+
+    # Research finished early: the time it saved flows to the later stages
+    clock.now += 10
+    assert deadline.stage_timeout("brief") == pytest.approx(90 * 0.15 / 0.75)
+
+    # Brief ran late: facts and content share what is left
+    clock.now += 50
+    assert deadline.stage_timeout("facts") == pytest.approx(40 * 0.2 / 0.6)
+    assert deadline.stage_timeout("content") == pytest.approx(40.0)
+
+
+def test_expired_deadline_and_default_cap():
+    clock = FakeClock()
+    deadline = Deadline(10, clock=clock)
+    clock.now += 12
+
+    assert deadline.remaining() == 0.0
+    assert deadline.stage_timeout("content") == 0.0
+    assert deadline.report()["met"] is False
+
+    assert Deadline(None).stage_timeout("content") == DEFAULT_STAGE_TIMEOUT
+    assert Deadline(None).report()["met"] is None
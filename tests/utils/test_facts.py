@@ -0,0 +1,90 @@
+"""
+Tests for extracting, repairing and validating the facts JSON.
+"""
+
+import os
+import sys
+import json
+
+import pytest
+
+# Add the parent directory to the path to import agents modules
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+from agents.content.facts import (
+    FactsParseError, FactsReport, extract_json_block, parse_facts, repair_json, validate_facts
+)
+
+
+def test_extracts_fenced_or_first_balanced_object():
+    fenced = 'Intro {not this}\n```json\n{"summary": "a"}\n```\nBye'
+    assert extract_json_block(fenced) == '{"summary": "a"}'
+
+    prose = 'Sure! {"summary": "braces } in strings", "stats": [{"fact": "x"}]} Hope that helps {ok}'
+    assert json.loads(extract_json_block(prose))["summary"] == "braces } in strings"
+
+    assert extract_json_block('Cut off: {"stats": [{"fact": "x"') == '{"stats": [{"fact": "x"'
+    assert extract_json_block("No JSON here.") is None
+
+
+@pytest.mark.parametrize("broken, expected", [
+    ("{'summary': 'single quotes'}", {"summary": "single quotes"}),
+    ('{summary: "unquoted key", ok: True, missing: None}', {"summary": "unquoted key", "ok": True, "missing": None}),
+    ('{"stats": [1, 2,], "summary": "x",}', {"stats": [1, 2], "summary": "x"}),
+    ('{“summary”: “smart quotes”}', {"summary": "smart quotes"}),
+    ('{"summary": "x", // a comment\n "stats": []}', {"summary": "x", "stats": []}),
+    ("{'summary': 'say \"hi\"'}", {"summary": 'say "hi"'}),
+    ('{"stats": [{"fact": "truncat', {"stats": [{"fact": "truncat"}]}),
+    ('{"stats": [{"fact": "x", "source":', {"stats": [{"fact": "x", "source": None}]}),
+])
+def test_repairs_common_defects(broken, expected):
+    assert json.loads(repair_json(broken)) == expected
+
+
+def test_validation_accepts_common_variants_and_drops_empty_records():
+    report = validate_facts({
+        "stats": ["Plain string fact", {"statistic": "70% agree", "source": "Poll", "date": 2024}, {"source": "orphan"}],
+        "social_insights": {"insight": "Desk tours", "platform": "YouTube", "examples": "one video"},
+        "summary": "  Useful  ",
+    })
+
+    assert [stat.fact for stat in report.stats] == ["Plain string fact", "70% agree"]
+    assert report.stats[1].date == "2024"
+    assert report.social_insights[0].trend == "Desk tours"
+    assert report.social_insights[0].examples == ["one video"]
+    assert report.summary == "Useful"
+    assert FactsReport.from_dict(report.to_dict()) == report
+
+    with pytest.raises(FactsParseError):
+        validate_facts(["not", "an", "object"])
+    with pytest.raises(FactsParseError):
+        validate_facts({"stats": [], "summary": ""})
+    with pytest.raises(FactsParseError):
+        validate_facts({"stats": 42})
+
+
+def test_parse_facts_reports_repairs_and_failures():
+    clean = parse_facts('{"stats": [{"fact": "x"}]}')
+    assert clean.repaired is False
+    assert parse_facts("{'stats': [{'fact': 'x'}],}").repaired is True
+
+    with pytest.raises(FactsParseError):
+        parse_facts("Only prose.")
+    with pytest.raises(FactsParseError):
+        parse_facts('{"stats": [{"fact": "a" "source": "b"}]}')
+
+
+def test_compact_prompt_has_one_line_per_record():
+    report = validate_facts({
+        "stats": [{"fact": "62% want checklists", "source": "Survey", "date": "2024"}, {"fact": "No source"}],
+        "social_insights": [{"trend": "Desk tours", "platform": "TikTok", "sentiment": "positive",
+                             "examples": ["a", "b", "c"]}],
+        "summary": "Keep it practical.",
+    })
+
+    assert report.to_prompt().splitlines() == [
+        "- 62% want checklists (Survey, 2024)",
+        "- No source",
+        "- Trend: Desk tours [TikTok, positive] e.g. a; b",
+        "Summary: Keep it practical.",
+    ]
@@ -0,0 +1,80 @@
+"""
+Tests for the offline fake LLM provider.
+"""
+
+import os
+import sys
+import asyncio
+
+import pytest
+
+# Add the parent directory to the path to import agents modules
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+from agno.agent import Agent
+from agno.models.openai import OpenAIChat
+
+from agents.utils.fake_llm import FakeLLM, FakeProviderError, maybe_fake
+from agents.utils.rate_limiter import is_rate_limit_error
+
+
+def test_outputs_are_canned_padded_and_deterministic():
+    agent = Agent(model=FakeLLM(role="brief", output_tokens=120))
+
+    first = agent.run("desk organization tips").content
+    second = agent.run("desk organization tips").content
+
+    assert first == second
+    assert first.startswith("## Outline\n- Introduction to desk organization tips")
+    assert "## Gap Analysis" in first
+    assert 100 <= len(first.split()) * 4 // 3 <= 120
+
+
+def test_latency_distribution_is_seeded_per_prompt():
+    model = FakeLLM(latency=0.5, latency_distribution="lognormal", seed=7)
+    samples = [model._sample_latency(model._rng(f"prompt {i}")) for i in range(200)]
+
+    assert samples == [model._sample_latency(model._rng(f"prompt {i}")) for i in range(200)]
+    assert 0.35 < sum(samples) / len(samples) < 0.65
+    assert max(samples) > 2 * min(samples)
+
+    uniform = FakeLLM(latency=1.0, latency_distribution="uniform", jitter=0.2)
+    assert all(0.8 <= uniform._sample_latency(uniform._rng(str(i))) <= 1.2 for i in range(50))
+
+    with pytest.raises(ValueError):
+        FakeLLM(latency_distribution="pareto")
+
+
+def test_injected_errors_look_like_provider_errors():
+    agent = Agent(model=FakeLLM(error_rate=1.0, error_status_code=429))
+
+    with pytest.raises(FakeProviderError) as error:
+        agent.run("desk organization tips")
+
+    assert is_rate_limit_error(error.value)
+
+
+def test_async_streaming_reports_chunks_and_usage():
+    agent = Agent(model=FakeLLM(role="content", latency=0.02, chunk_words=4))
+
+    async def collect():
+        chunks = [chunk.content async for chunk in await agent.arun("desk organization tips", stream=True)]
+        return chunks, agent.run_response
+
+    chunks, response = asyncio.run(collect())
+
+    assert len(chunks) > 1
+    assert "".join(chunks).startswith("# desk organization tips")
+    assert response.metrics["output_tokens"][0] > 0
+
+
+def test_maybe_fake_follows_env_switch(monkeypatch):
+    real = OpenAIChat(id="gpt-4o")
+
+    monkeypatch.delenv("FAKE_LLM", raising=False)
+    assert maybe_fake(real) is real
+
+    monkeypatch.setenv("FAKE_LLM", "1")
+    fake = maybe_fake(real, role="facts")
+    assert isinstance(fake, FakeLLM)
+    assert fake.id == "gpt-4o" and fake.role == "facts"
@@ -0,0 +1,119 @@
+"""
+Tests for hedged requests and failover.
+"""
+
+import os
+import sys
+import asyncio
+
+import pytest
+
+# Add the parent directory to the path to import agents modules
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+from agents.content.hedging import (
+    HedgePolicy, LatencyHistory, failover_worthwhile, hedge_delay, hedge_policies_from_env, race_with_hedge
+)
+
+
+def test_latency_percentile_and_hedge_delay():
+    history = LatencyHistory(window=100)
+    for i in range(1, 101):
+        history.record("facts", i / 100)
+
+    assert history.percentile("facts", 50) == 0.5
+    assert history.percentile("facts", 95) == 0.95
+    assert history.percentile("other", 95) is None
+
+    policy = HedgePolicy("x-ai/grok-2-1212", percentile=95, min_samples=20, min_delay=0.0)
+    assert hedge_delay(history, "facts", policy) == 0.95
+    assert hedge_delay(history, "facts", None) is None
+    # Not enough history yet
+    assert hedge_delay(history, "other", policy) is None
+    # Never hedge sooner than min_delay
+    assert hedge_delay(history, "facts", HedgePolicy("m", min_delay=2.0)) == 2.0
+
+
+def answer(value, delay, log=None):
+    async def run():
+        try:
+            await asyncio.sleep(delay)
+        except asyncio.CancelledError:
+            if log is not None:
+                log.append(value)
+            raise
+        if isinstance(value, Exception):
+            raise value
+        return value
+    return run
+
+
+def test_fast_primary_is_not_hedged():
+    started = []
+
+    def secondary():
+        started.append(True)
+        return answer("secondary", 0)()
+
+    result = asyncio.run(race_with_hedge(answer("primary", 0.01)(), secondary, delay=0.2))
+
+    assert result == ("primary", False)
+    assert started == []
+
+
+def test_slow_primary_loses_to_secondary_and_is_cancelled():
+    cancelled = []
+
+    result = asyncio.run(race_with_hedge(
+        answer("primary", 1.0, cancelled)(), answer("secondary", 0.01), delay=0.02
+    ))
+
+    assert result == ("secondary", True)
+    assert cancelled == ["primary"]
+
+
+class ProviderError(Exception):
+    def __init__(self, message, status_code):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+def test_failed_primary_fails_over_to_secondary_when_enabled():
+    result = asyncio.run(race_with_hedge(
+        answer(RuntimeError("xai unavailable"), 0)(), answer("secondary", 0), delay=None, failover=True
+    ))
+
+    assert result == ("secondary", True)
+
+
+def test_failover_is_off_by_default_and_skips_errors_it_cannot_help():
+    started = []
+
+    def secondary():
+        started.append(True)
+        return answer("secondary", 0)()
+
+    with pytest.raises(RuntimeError, match="xai unavailable"):
+        asyncio.run(race_with_hedge(answer(RuntimeError("xai unavailable"), 0)(), secondary, delay=None))
+    for error in (ProviderError("rate limited", 429), ProviderError("context too long", 400)):
+        with pytest.raises(ProviderError):
+            asyncio.run(race_with_hedge(answer(error, 0)(), secondary, delay=None, failover=True))
+    assert started == []
+
+    assert failover_worthwhile(ProviderError("bad gateway", 502))
+    assert failover_worthwhile(ProviderError("timeout", 408))
+    assert not failover_worthwhile(ProviderError("rate limited", 429))
+
+
+def test_failover_policy_from_environment(monkeypatch):
+    monkeypatch.delenv("HEDGE_FAILOVER", raising=False)
+    assert not any(policy.failover for policy in hedge_policies_from_env().values())
+    monkeypatch.setenv("HEDGE_FAILOVER", "1")
+    assert all(policy.failover for policy in hedge_policies_from_env().values())
+
+
+def test_primary_error_raised_when_every_call_fails():
+    with pytest.raises(RuntimeError, match="xai unavailable"):
+        asyncio.run(race_with_hedge(
+            answer(RuntimeError("xai unavailable"), 0.05)(), answer(ValueError("openrouter down"), 0), delay=0.01
+        ))
@@ -0,0 +1,140 @@
+"""
+Tests for the queue-based logging setup.
+"""
+
+import io
+import os
+import sys
+import json
+import logging
+import threading
+
+import pytest
+
+# Add the parent directory to the path to import agents modules
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+from agents.utils import logging_config
+from agents.utils.logging_config import configure_logging, shutdown_logging
+from agents.utils.tracing import tracer
+
+
+@pytest.fixture(autouse=True)
+def restore_root_logger():
+    root = logging.getLogger()
+    handlers, level = list(root.handlers), root.level
+    yield
+    shutdown_logging()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    for handler in handlers:
+        root.addHandler(handler)
+    root.setLevel(level)
+
+
+def records(stream):
+    shutdown_logging()
+    return [json.loads(line) for line in stream.getvalue().splitlines()]
+
+
+def test_records_are_written_as_json_by_the_background_writer():
+    stream = io.StringIO()
+    listener = configure_logging(level="INFO", fmt="json", stream=stream, debug_sample_rate=1.0)
+    assert listener._thread is not None and listener._thread is not threading.current_thread()
+
+    logging.getLogger("content_creation").info("Stage %s done", "research", extra={"workflow_id": "wf-1"})
+    try:
+        raise ValueError("boom")
+    except ValueError:
+        logging.getLogger("content_creation").exception("Stage failed")
+
+    info, error = records(stream)
+    assert info["level"] == "INFO"
+    assert info["logger"] == "content_creation"
+    assert info["message"] == "Stage research done"
+    assert info["workflow_id"] == "wf-1"
+    assert error["level"] == "ERROR"
+    assert "ValueError: boom" in error["exception"]
+
+
+def test_debug_records_are_sampled(monkeypatch):
+    stream = io.StringIO()
+    configure_logging(level="DEBUG", fmt="json", stream=stream, debug_sample_rate=0.25)
+    draws = iter([0.1, 0.9, 0.2, 0.3])
+    monkeypatch.setattr(logging_config.random, "random", lambda: next(draws))
+
+    logger = logging.getLogger("content_creation")
+    for index in range(4):
+        logger.debug("payload %d", index)
+    logger.warning("kept regardless of sampling")
+
+    assert [record["message"] for record in records(stream)] == [
+        "payload 0", "payload 2", "kept regardless of sampling"
+    ]
+
+
+def test_records_carry_the_current_trace_id():
+    stream = io.StringIO()
+    configure_logging(level="INFO", fmt="json", stream=stream)
+
+    with tracer.span("workflow") as span:
+        logging.getLogger("content_creation").info("inside")
+    logging.getLogger("content_creation").info("outside")
+
+    inside, outside = records(stream)
+    assert inside["trace_id"] == span.trace_id
+    assert "trace_id" not in outside
+
+
+def test_text_format_and_log_file_from_environment(monkeypatch, tmp_path):
+    log_file = tmp_path / "logs" / "app.log"
+    monkeypatch.setenv("LOG_LEVEL", "WARNING")
+    monkeypatch.setenv("LOG_FORMAT", "text")
+    monkeypatch.setenv("LOG_FILE", str(log_file))
+    stream = io.StringIO()
+    configure_logging(stream=stream)
+
+    logging.getLogger("api").info("dropped by level")
+    logging.getLogger("api").warning("written")
+    shutdown_logging()
+
+    assert stream.getvalue().strip().endswith("api - WARNING - written")
+    assert log_file.read_text() == stream.getvalue()
+
+
+def test_reconfiguring_replaces_the_writer():
+    first, second = io.StringIO(), io.StringIO()
+    configure_logging(level="INFO", stream=first)
+    configure_logging(level="INFO", stream=second)
+    logging.getLogger("api").info("once")
+    shutdown_logging()
+
+    assert first.getvalue() == ""
+    assert len(second.getvalue().splitlines()) == 1
+    assert sum(isinstance(h, logging.handlers.QueueHandler) for h in logging.getLogger().handlers) == 0
+
+
+@pytest.mark.parametrize("rate", ["", "often", "2"])
+def test_bad_sample_rate_falls_back_to_default_with_a_warning(monkeypatch, rate):
+    monkeypatch.setenv("LOG_DEBUG_SAMPLE_RATE", rate)
+    stream = io.StringIO()
+    configure_logging(level="INFO", fmt="json", stream=stream)
+
+    assert logging.getLogger().handlers[0].filters[0].rate == logging_config.DEFAULT_DEBUG_SAMPLE_RATE
+    warnings = [record for record in records(stream) if record["level"] == "WARNING"]
+    if rate.strip():
+        assert len(warnings) == 1 and "LOG_DEBUG_SAMPLE_RATE" in warnings[0]["message"]
+    else:
+        assert warnings == []
+
+
+def test_unknown_log_level_falls_back_to_info(monkeypatch):
+    monkeypatch.setenv("LOG_LEVEL", "LOUD")
+    stream = io.StringIO()
+    configure_logging(fmt="json", stream=stream)
+    logging.getLogger("api").info("still written")
+
+    messages = [record["message"] for record in records(stream)]
+    assert logging.getLogger().level == logging.INFO
+    assert "still written" in messages
+    assert any("LOUD" in message for message in messages)
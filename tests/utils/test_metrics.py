@@ -0,0 +1,72 @@
+"""
+Tests for the in-process metrics registry and its Prometheus text output.
+"""
+
+import os
+import sys
+
+import pytest
+
+# Add the parent directory to the path to import agents modules
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+from agents.utils.metrics import MetricsRegistry
+from agents.utils.token_tracker import TokenTracker
+from agents.utils import metrics as metrics_module
+
+
+def test_counters_and_gauges_render_in_text_format():
+    registry = MetricsRegistry()
+    calls = registry.counter("calls_total", "Model calls", ("provider", "outcome"))
+    calls.inc(provider="xai", outcome="ok")
+    calls.inc(2, provider="xai", outcome="error")
+    registry.gauge("in_flight", "Running workflows", callback=lambda: {(): 3})
+    queue = registry.gauge("queue", "Queued items", ("name",))
+    queue.set(4, name='say "hi"')
+
+    text = registry.render()
+
+    assert "# TYPE calls_total counter" in text
+    assert 'calls_total{provider="xai",outcome="error"} 2' in text
+    assert 'calls_total{provider="xai",outcome="ok"} 1' in text
+    assert "# TYPE in_flight gauge\nin_flight 3" in text
+    assert 'queue{name="say \\"hi\\""} 4' in text
+    assert text.endswith("\n")
+
+    with pytest.raises(ValueError):
+        calls.inc(-1, provider="xai", outcome="ok")
+    with pytest.raises(ValueError):
+        calls.inc(provider="xai")
+
+
+def test_histogram_buckets_are_cumulative():
+    registry = MetricsRegistry()
+    latency = registry.histogram("stage_seconds", "Stage latency", ("stage",), buckets=(0.5, 1.0))
+    for value in (0.2, 0.7, 0.9, 3.0):
+        latency.observe(value, stage="facts")
+
+    lines = registry.render().splitlines()
+
+    assert 'stage_seconds_bucket{stage="facts",le="0.5"} 1' in lines
+    assert 'stage_seconds_bucket{stage="facts",le="1"} 3' in lines
+    assert 'stage_seconds_bucket{stage="facts",le="+Inf"} 4' in lines
+    assert 'stage_seconds_sum{stage="facts"} 4.8' in lines
+    assert 'stage_seconds_count{stage="facts"} 4' in lines
+
+
+def test_registering_twice_returns_the_same_metric():
+    registry = MetricsRegistry()
+    assert registry.counter("jobs_total", "Jobs") is registry.counter("jobs_total", "Jobs")
+    with pytest.raises(ValueError):
+        registry.gauge("jobs_total", "Jobs")
+
+
+def test_token_tracker_feeds_process_counters(monkeypatch):
+    monkeypatch.setattr(TokenTracker, "estimate_tokens", lambda self, text, model_name="": len(text or "") // 4)
+    before_tokens = metrics_module.tokens_total.value(provider="deepseek", direction="output")
+    before_cost = metrics_module.cost_total.value(provider="deepseek")
+
+    TokenTracker().track_step("brief", "deepseek", "deepseek-chat", "x" * 400, "y" * 800)
+
+    assert metrics_module.tokens_total.value(provider="deepseek", direction="output") == before_tokens + 200
+    assert metrics_module.cost_total.value(provider="deepseek") > before_cost
@@ -0,0 +1,67 @@
+"""
+Tests for the compiled prompt templates and memoised brand voice instructions.
+"""
+
+import os
+import sys
+
+import pytest
+
+# Add the parent directory to the path to import agents modules
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+from agents.content import prompts as prompts_module
+from agents.content.prompts import PromptTemplate, content_instructions, facts_prompt, prompts
+
+
+def test_template_substitutes_slots_and_keeps_literal_braces():
+    template = PromptTemplate("t", """
+        Topic: {topic}
+        JSON looks like {{"stats": []}}
+    """)
+
+    assert template.slots == ("topic",)
+    assert template.render(topic="desks") == '\nTopic: desks\nJSON looks like {"stats": []}\n'
+    with pytest.raises(KeyError):
+        template.render()
+    with pytest.raises(ValueError):
+        PromptTemplate("bad", "{count:>5}")
+
+
+def test_static_template_renders_its_compiled_text():
+    assert prompts.render("content_instructions") is prompts.get("content_instructions").text
+
+
+def test_facts_prompt_includes_gap_analysis_only_when_given():
+    plain = facts_prompt("standing desks")
+    with_gaps = facts_prompt("standing desks", "Nobody covers cables.")
+
+    assert "'standing desks'" in plain and "GAP ANALYSIS" not in plain
+    assert "---BEGIN GAP ANALYSIS---\nNobody covers cables.\n---END GAP ANALYSIS---" in with_gaps
+    assert plain.endswith("2-3 social insights at most.")
+    assert with_gaps.startswith(plain.split("Return the response")[0])
+
+
+def test_brand_voice_instructions_are_memoised_by_fingerprint(monkeypatch):
+    monkeypatch.setattr(prompts_module, "_content_instructions", prompts_module.OrderedDict())
+    voice = {"tone": "Warm", "taboo_words": ["very", "really"]}
+
+    first = content_instructions(voice)
+    assert content_instructions(dict(voice)) is first
+    assert "Tone: Warm" in first
+    assert "Taboo Words/Phrases: very, really" in first
+    assert "Style: Clear, concise, and engaging" in first
+
+    default = content_instructions()
+    assert "BRAND VOICE" not in default
+    assert content_instructions({"tone": "Dry"}) != first
+
+
+def test_brand_voice_cache_is_bounded(monkeypatch):
+    monkeypatch.setattr(prompts_module, "_content_instructions", prompts_module.OrderedDict())
+    monkeypatch.setattr(prompts_module, "BRAND_VOICE_CACHE_SIZE", 2)
+
+    for tone in ("A", "B", "C"):
+        content_instructions({"tone": tone})
+
+    assert len(prompts_module._content_instructions) == 2
@@ -0,0 +1,73 @@
+"""
+Tests for the per-provider token-bucket rate limiter.
+"""
+
+import os
+import sys
+import asyncio
+
+# Add the parent directory to the path to import agents modules
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+from agents.utils.rate_limiter import ProviderRateLimiter, TokenBucket, is_rate_limit_error
+
+
+def test_bucket_refills_over_time():
+    bucket = TokenBucket(capacity=10, refill_per_second=5)
+    bucket.take(10)
+
+    assert bucket.wait_time(5, bucket.updated) == 1.0
+    assert bucket.wait_time(5, bucket.updated + 1.0) == 0.0
+
+
+def test_requests_per_minute_are_enforced():
+    # 600 rpm with a burst of 600: the 601st request has to wait ~0.1s
+    limiter = ProviderRateLimiter({"xai": {"rpm": 600, "tpm": 10 ** 9}})
+    limiter._buckets("xai")[0].level = 2
+
+    async def run():
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        for _ in range(3):
+            await limiter.acquire("xai", tokens=10)
+        return loop.time() - start
+
+    elapsed = asyncio.run(run())
+
+    assert 0.08 <= elapsed < 0.5
+    assert limiter.stats["xai"]["requests"] == 3
+    assert limiter.stats["xai"]["waited_seconds"] > 0
+
+
+def test_tokens_per_minute_are_enforced_and_settled():
+    limiter = ProviderRateLimiter({"anthropic": {"rpm": 10 ** 6, "tpm": 6000}})
+
+    asyncio.run(limiter.acquire("anthropic", tokens=6000))
+    token_bucket = limiter._buckets("anthropic")[1]
+    assert token_bucket.level < 1
+
+    # The call used far fewer tokens than reserved, so the budget is returned
+    limiter.settle("anthropic", reserved_tokens=6000, actual_tokens=1000)
+    assert token_bucket.wait_time(4000, token_bucket.updated) == 0.0
+
+
+def test_throttle_pauses_provider():
+    limiter = ProviderRateLimiter()
+    limiter.throttle("deepseek", retry_after=0.1)
+
+    async def run():
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        await limiter.acquire("deepseek", tokens=1)
+        return loop.time() - start
+
+    assert asyncio.run(run()) >= 0.09
+    assert limiter.stats["deepseek"]["throttled"] == 1
+
+
+def test_rate_limit_error_detection():
+    class ProviderError(Exception):
+        status_code = 429
+
+    assert is_rate_limit_error(ProviderError())
+    assert not is_rate_limit_error(ValueError())
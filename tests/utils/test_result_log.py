@@ -0,0 +1,115 @@
+"""
+Tests for the append-only result log.
+"""
+
+import os
+import sys
+import json
+import threading
+
+# Add the parent directory to the path to import agents modules
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+from agents.utils.result_log import INDEX_SUFFIX, SEGMENT_SUFFIX, ResultLog
+
+
+def files(directory, suffix):
+    return sorted(name for name in os.listdir(directory) if name.endswith(suffix))
+
+
+def test_append_and_look_up_by_id_and_key(tmp_path):
+    log = ResultLog(str(tmp_path))
+    first = log.append({"topic": "desk organization tips", "steps": {}}, key="wf-1")
+    second = log.append({"topic": "standing desks", "steps": {}}, key="wf-2")
+    again = log.append({"topic": "desk organization tips", "attempt": 2}, key="wf-1")
+
+    assert len({first, second, again}) == 3
+    assert log.get(second)["data"]["topic"] == "standing desks"
+    assert log.find("wf-1")["id"] == again
+    assert log.find("wf-1")["data"]["attempt"] == 2
+    assert log.find("missing") is None
+    assert log.get("missing") is None
+    assert [record["id"] for record in log.scan()] == [first, second, again]
+    log.close()
+
+
+def test_records_are_compressed_and_survive_reopening(tmp_path):
+    log = ResultLog(str(tmp_path))
+    output = "Organize cables with clips. " * 500
+    record_id = log.append({"steps": {"content": {"output": output}}}, key="wf-1")
+    log.close()
+
+    segment = os.path.join(tmp_path, files(tmp_path, SEGMENT_SUFFIX)[0])
+    assert os.path.getsize(segment) < len(output) // 10
+
+    reopened = ResultLog(str(tmp_path))
+    assert reopened.find("wf-1")["data"]["steps"]["content"]["output"] == output
+    assert reopened.get(record_id)["key"] == "wf-1"
+    # A restarted writer appends to a new segment rather than after old data
+    reopened.append({"steps": {}}, key="wf-2")
+    assert len(files(tmp_path, SEGMENT_SUFFIX)) == 2
+    assert len(reopened) == 2
+    reopened.close()
+
+
+def test_segments_roll_over_by_size_and_age(tmp_path, monkeypatch):
+    log = ResultLog(str(tmp_path / "by_size"), segment_bytes=200)
+    for index in range(6):
+        log.append({"index": index, "padding": os.urandom(64).hex()}, key=f"wf-{index}")
+    assert len(files(log.directory, SEGMENT_SUFFIX)) >= 3
+    assert [record["data"]["index"] for record in log.scan()] == list(range(6))
+    log.close()
+
+    clock = [1000.0]
+    monkeypatch.setattr("agents.utils.result_log.time.time", lambda: clock[0])
+    log = ResultLog(str(tmp_path / "by_age"), segment_seconds=60)
+    log.append({"index": 0})
+    clock[0] += 30
+    log.append({"index": 1})
+    clock[0] += 31
+    log.append({"index": 2})
+    assert len(files(log.directory, SEGMENT_SUFFIX)) == 2
+    log.close()
+
+
+def test_unindexed_records_are_recovered_and_damaged_tail_ignored(tmp_path):
+    log = ResultLog(str(tmp_path))
+    log.append({"index": 0}, key="wf-0")
+    log.append({"index": 1}, key="wf-1")
+    log.close()
+
+    # Crash after writing the record but before its index line, then a half-written record
+    index_path = os.path.join(tmp_path, files(tmp_path, INDEX_SUFFIX)[0])
+    with open(index_path) as f:
+        lines = f.readlines()
+    with open(index_path, "w") as f:
+        f.write(lines[0] + lines[1][:10])
+    with open(os.path.join(tmp_path, files(tmp_path, SEGMENT_SUFFIX)[0]), "ab") as f:
+        f.write(b"\x00\x00\x01\x00garbage")
+
+    reopened = ResultLog(str(tmp_path))
+    assert reopened.find("wf-1")["data"] == {"index": 1}
+    assert len(reopened) == 2
+
+
+def test_concurrent_appends_get_distinct_offsets(tmp_path):
+    log = ResultLog(str(tmp_path))
+    ids = []
+
+    def write(worker):
+        for index in range(25):
+            ids.append(log.append({"worker": worker, "index": index}, key=f"wf-{worker}-{index}"))
+
+    threads = [threading.Thread(target=write, args=(worker,)) for worker in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    log.close()
+
+    reopened = ResultLog(str(tmp_path))
+    assert len(reopened) == 100
+    assert sorted(record["id"] for record in reopened.scan()) == sorted(ids)
+    assert reopened.find("wf-3-24")["data"] == {"worker": 3, "index": 24}
+    with open(os.path.join(tmp_path, files(tmp_path, INDEX_SUFFIX)[0])) as f:
+        assert all(json.loads(line)["id"] in ids for line in f)
@@ -0,0 +1,86 @@
+"""
+Tests for the pipeline stage graph executor.
+"""
+
+import os
+import sys
+import asyncio
+
+import pytest
+
+# Add the parent directory to the path to import agents modules
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+from agents.content.scheduler import Stage, StageGraph
+
+
+def sleeper(value, delay):
+    async def run(inputs):
+        await asyncio.sleep(delay)
+        return value + sum(inputs.values())
+    return run
+
+
+def test_independent_stages_run_concurrently():
+    graph = StageGraph([
+        Stage("a", sleeper(1, 0.2)),
+        Stage("b", sleeper(2, 0.2)),
+        Stage("c", sleeper(3, 0.1), inputs=("a", "b")),
+    ])
+
+    async def run():
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        outputs = await graph.run()
+        return outputs, loop.time() - start
+
+    outputs, elapsed = asyncio.run(run())
+
+    assert outputs == {"a": 1, "b": 2, "c": 6}
+    # Critical path is a -> c (0.3s), not the 0.5s sum of all stages
+    assert elapsed < 0.45
+
+
+def test_completed_stages_are_skipped():
+    calls = []
+
+    async def record(inputs):
+        calls.append("b")
+        return inputs["a"] * 10
+
+    graph = StageGraph([Stage("a", sleeper(1, 0)), Stage("b", record, inputs=("a",))])
+    outputs = asyncio.run(graph.run(completed={"a": 5}))
+
+    assert outputs == {"a": 5, "b": 50}
+    assert calls == ["b"]
+
+
+def test_failure_cancels_running_stages():
+    cancelled = []
+
+    async def fail(inputs):
+        raise RuntimeError("provider down")
+
+    async def slow(inputs):
+        try:
+            await asyncio.sleep(5)
+        except asyncio.CancelledError:
+            cancelled.append("slow")
+            raise
+
+    graph = StageGraph([Stage("fail", fail), Stage("slow", slow)])
+
+    with pytest.raises(RuntimeError, match="provider down"):
+        asyncio.run(graph.run())
+    assert cancelled == ["slow"]
+
+
+def test_invalid_graphs_are_rejected():
+    with pytest.raises(ValueError, match="unknown"):
+        StageGraph([Stage("a", sleeper(1, 0), inputs=("missing",))])
+
+    with pytest.raises(ValueError, match="cycle"):
+        StageGraph([
+            Stage("a", sleeper(1, 0), inputs=("b",)),
+            Stage("b", sleeper(1, 0), inputs=("a",)),
+        ])
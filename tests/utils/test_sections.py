@@ -0,0 +1,99 @@
+"""
+Tests for the one-pass markdown section index.
+"""
+
+import os
+import sys
+
+# Add the parent directory to the path to import agents modules
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+from agents.content.pipeline import extract_gap_analysis
+from agents.content.sections import BOLD_HEADING_LEVEL, MarkdownIndex, index_markdown, parse_markdown
+
+
+BRIEF = """Intro before any heading.
+
+# Content Brief
+
+## 1. Outline
+- Cable trays
+- Monitor arms
+
+## Gap Analysis
+Nobody covers cables under standing desks.
+
+### Underserved questions
+How do you route power to a desk that moves?
+
+```markdown
+## Not a heading
+```
+
+**Keywords:**
+desk organization
+
+Audience: remote workers
+who share a desk.
+
+## Notes
+Keep it practical."""
+
+
+def test_heading_tree_and_offsets():
+    index = parse_markdown(BRIEF)
+
+    titles = [(section.title, section.level) for section in index.sections]
+    assert titles == [
+        ("Content Brief", 1), ("1. Outline", 2), ("Gap Analysis", 2),
+        ("Underserved questions", 3), ("Keywords:", BOLD_HEADING_LEVEL), ("Notes", 2)
+    ]
+
+    gap = index.find("gap analysis")
+    assert index.text[gap.start:].startswith("## Gap Analysis")
+    assert index.sections[gap.parent].title == "Content Brief"
+    assert [child.title for child in index.children(gap)] == ["Underserved questions"]
+    assert index.text[gap.end:].startswith("## Notes")
+
+    assert index.preamble() == "Intro before any heading."
+    assert index.get("Outline") == "- Cable trays\n- Monitor arms"
+
+
+def test_nested_and_own_section_text():
+    index = parse_markdown(BRIEF)
+    gap = index.find("Gap Analysis")
+
+    assert index.section_text(gap, nested=False) == "Nobody covers cables under standing desks."
+    nested = index.section_text(gap)
+    assert "route power" in nested and "## Not a heading" in nested
+    assert index.find("Not a heading") is None
+
+
+def test_labels_run_to_the_next_blank_line():
+    index = parse_markdown(BRIEF)
+
+    assert index.label("audience") == "remote workers\nwho share a desk."
+    assert index.label("Missing") is None
+
+
+def test_prefix_lookup_and_stored_offsets():
+    index = parse_markdown("## Gap Analysis and Opportunities\nVideo tutorials.\n")
+
+    assert index.find("Gap Analysis") is None
+    assert index.find("Gap Analysis", prefix=True).title == "Gap Analysis and Opportunities"
+
+    restored = MarkdownIndex.from_dict(index.text, index.to_dict())
+    assert restored.get("gap analysis and opportunities") == "Video tutorials."
+
+
+def test_index_is_cached_per_text():
+    assert index_markdown(BRIEF) is index_markdown(BRIEF)
+
+
+def test_extract_gap_analysis_uses_sections_then_labels_then_sentences():
+    assert extract_gap_analysis(BRIEF).startswith("Nobody covers cables under standing desks.")
+    assert extract_gap_analysis("Intro:\nHello.\n\nGap Analysis: Few guides cover cable trays.\n\nDone.") == \
+        "Few guides cover cable trays."
+    assert extract_gap_analysis("There is a gap in mobile coverage. Nothing else.") == \
+        "There is a gap in mobile coverage."
+    assert extract_gap_analysis("Nothing relevant here.").startswith("No specific gap analysis found")
@@ -0,0 +1,119 @@
+"""
+Tests for single-flight coalescing of identical in-flight calls.
+"""
+
+import os
+import sys
+import asyncio
+
+# Add the parent directory to the path to import agents modules
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+from agents.utils.single_flight import SingleFlight
+
+
+def test_identical_keys_share_one_call():
+    flights = SingleFlight()
+    calls = []
+
+    async def work(value):
+        calls.append(value)
+        await asyncio.sleep(0.02)
+        return value * 2
+
+    async def run():
+        return await asyncio.gather(
+            flights.do("a", lambda: work(1)),
+            flights.do("a", lambda: work(1)),
+            flights.do("b", lambda: work(5)),
+        )
+
+    results = asyncio.run(run())
+
+    assert results == [(2, False), (2, True), (10, False)]
+    assert calls == [1, 5]
+    assert flights.stats == {"started": 2, "coalesced": 1}
+    assert not flights.in_flight("a")
+
+
+def test_finished_call_is_not_reused():
+    flights = SingleFlight()
+    calls = []
+
+    async def work():
+        calls.append(1)
+        return len(calls)
+
+    async def run():
+        first = await flights.do("a", work)
+        second = await flights.do("a", work)
+        return first, second
+
+    assert asyncio.run(run()) == ((1, False), (2, False))
+
+
+def test_errors_reach_every_waiter_and_follower_cancel_is_isolated():
+    flights = SingleFlight()
+
+    async def failing():
+        await asyncio.sleep(0.02)
+        raise RuntimeError("provider down")
+
+    async def run():
+        owner = asyncio.ensure_future(flights.do("a", failing))
+        await asyncio.sleep(0)
+        follower = asyncio.ensure_future(flights.do("a", failing))
+        cancelled = asyncio.ensure_future(flights.do("a", failing))
+        await asyncio.sleep(0)
+        cancelled.cancel()
+        return await asyncio.gather(owner, follower, cancelled, return_exceptions=True)
+
+    owner, follower, cancelled = asyncio.run(run())
+
+    assert isinstance(owner, RuntimeError)
+    assert isinstance(follower, RuntimeError)
+    assert isinstance(cancelled, asyncio.CancelledError)
+
+
+def test_cancelling_the_last_waiter_cancels_the_shared_call():
+    flights = SingleFlight()
+    state = {}
+
+    async def work():
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            state["cancelled"] = True
+            raise
+
+    async def run():
+        only = asyncio.ensure_future(flights.do("a", work))
+        await asyncio.sleep(0.01)
+        only.cancel()
+        await asyncio.gather(only, return_exceptions=True)
+        await asyncio.sleep(0)
+        return flights.in_flight("a")
+
+    assert asyncio.run(run()) is False
+    assert state == {"cancelled": True}
+
+
+def test_shared_call_outlives_a_cancelled_owner_while_others_wait():
+    flights = SingleFlight()
+
+    async def work():
+        await asyncio.sleep(0.02)
+        return "done"
+
+    async def run():
+        owner = asyncio.ensure_future(flights.do("a", work))
+        await asyncio.sleep(0)
+        follower = asyncio.ensure_future(flights.do("a", work))
+        await asyncio.sleep(0)
+        owner.cancel()
+        return await asyncio.gather(owner, follower, return_exceptions=True)
+
+    owner, follower = asyncio.run(run())
+
+    assert isinstance(owner, asyncio.CancelledError)
+    assert follower == ("done", True)
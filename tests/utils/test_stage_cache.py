@@ -0,0 +1,91 @@
+"""
+Tests for the two-tier stage result cache.
+"""
+
+import os
+import sys
+import time
+
+# Add the parent directory to the path to import agents modules
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+from agents.utils.stage_cache import StageCache, make_cache_key
+
+
+def test_key_ignores_whitespace_and_case():
+    first = make_cache_key("research", "o3-mini", "Analyze  'Desk tips'\n", "Be brief")
+    second = make_cache_key("research", "o3-mini", "analyze 'desk tips'", "be   brief")
+
+    assert first == second
+    assert first != make_cache_key("brief", "o3-mini", "analyze 'desk tips'", "be brief")
+    assert first != make_cache_key("research", "gpt-4o", "analyze 'desk tips'", "be brief")
+
+
+def test_disk_tier_survives_new_instance(tmp_path):
+    key = make_cache_key("research", "o3-mini", "prompt")
+    StageCache(directory=str(tmp_path)).set("research", key, "research output")
+
+    cache = StageCache(directory=str(tmp_path))
+    assert cache.get("research", key) == "research output"
+    assert cache.stats["disk_hits"] == 1
+    assert cache.get("research", key) == "research output"
+    assert cache.stats["memory_hits"] == 1
+
+
+def test_expired_entries_are_misses(tmp_path):
+    cache = StageCache(directory=str(tmp_path), ttls={"facts": 0.01})
+    key = make_cache_key("facts", "grok-beta", "prompt")
+    cache.set("facts", key, "facts output")
+
+    cache._memory.clear()
+    time.sleep(0.02)
+
+    assert cache.get("facts", key) is None
+    assert not os.path.exists(cache._path(key))
+
+
+def test_zero_ttl_disables_caching(tmp_path):
+    cache = StageCache(directory=str(tmp_path), ttls={"content": 0})
+    key = make_cache_key("content", "claude", "prompt")
+    cache.set("content", key, "content output")
+
+    assert cache.get("content", key) is None
+
+
+def test_final_content_is_only_cached_when_opted_in(tmp_path):
+    key = make_cache_key("content", "claude", "prompt")
+    default = StageCache(directory=str(tmp_path / "default"))
+    default.set("content", key, "content output")
+    assert default.get("content", key) is None
+
+    opted_in = StageCache(directory=str(tmp_path / "opted_in"), ttls={"content": 60})
+    opted_in.set("content", key, "content output")
+    assert opted_in.get("content", key) == "content output"
+
+
+def test_memory_lru_and_disk_size_limits(tmp_path):
+    cache = StageCache(directory=str(tmp_path), max_memory_entries=2, max_disk_bytes=600)
+    keys = [make_cache_key("brief", "deepseek-chat", f"prompt {i}") for i in range(6)]
+    for key in keys:
+        cache.set("brief", key, "x" * 100)
+
+    assert len(cache._memory) == 2
+    remaining = [key for key in keys if os.path.exists(cache._path(key))]
+    assert 0 < len(remaining) < len(keys)
+    # The newest entry is never the one evicted
+    assert keys[-1] in remaining
+    assert cache.stats["evictions"] > 0
+
+
+def test_stale_entries_are_only_served_on_request(tmp_path):
+    cache = StageCache(directory=str(tmp_path), ttls={"research": 0.01}, stale_ttls={"research": 60})
+    key = make_cache_key("research", "o3-mini", "prompt")
+    cache.set("research", key, "research output")
+
+    time.sleep(0.02)
+
+    assert cache.get("research", key) is None
+    # Expired but within the stale TTL, so the file is kept for degraded runs
+    assert os.path.exists(cache._path(key))
+    assert cache.get("research", key, allow_stale=True) == "research output"
+    assert cache.stats["stale_hits"] == 1
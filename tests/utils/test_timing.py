@@ -0,0 +1,64 @@
+"""
+Tests for stage timing and its component breakdown.
+"""
+
+import os
+import sys
+import time
+import asyncio
+
+# Add the parent directory to the path to import agents modules
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+from agents.utils.timing import current_timer, stage_timer, timed, timed_call
+
+
+def test_nested_sections_are_charged_to_the_inner_component():
+    with stage_timer("research") as timer:
+        with timed("provider"):
+            time.sleep(0.02)
+            with timed("tool"):
+                time.sleep(0.03)
+    report = timer.report()
+
+    assert 0.02 <= report["breakdown"]["provider"] < 0.03
+    assert 0.03 <= report["breakdown"]["tool"] < 0.04
+    assert report["duration"] >= 0.05
+    assert report["finished_at"] is not None
+    assert report["breakdown"]["other"] >= 0
+
+
+def test_timed_outside_a_stage_does_nothing():
+    assert current_timer() is None
+    with timed("storage"):
+        pass
+    assert current_timer() is None
+
+
+def test_worker_threads_and_tasks_charge_their_stage():
+    async def stage(name, seconds):
+        with stage_timer(name) as timer:
+            with timed("provider"):
+                await asyncio.to_thread(timed_call("storage", time.sleep), seconds)
+        return timer.report()["breakdown"]
+
+    async def main():
+        return await asyncio.gather(stage("brief", 0.02), stage("facts", 0.04))
+
+    brief, facts = asyncio.run(main())
+
+    assert 0.02 <= brief["storage"] < 0.035
+    assert 0.04 <= facts["storage"] < 0.055
+    assert brief["provider"] < 0.01 and facts["provider"] < 0.01
+
+
+def test_timed_call_keeps_the_wrapped_signature():
+    def search(query: str, max_results: int = 5) -> str:
+        """Search for a query."""
+        return query
+
+    wrapped = timed_call("tool", search)
+
+    assert wrapped.__name__ == "search"
+    assert wrapped.__doc__ == "Search for a query."
+    assert wrapped("desk") == "desk"
@@ -0,0 +1,72 @@
+"""
+Tests for the topic similarity index.
+"""
+
+import os
+import sys
+import json
+
+# Add the parent directory to the path to import agents modules
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+from agents.utils.stage_cache import TOPIC_INDEX_FILE, StageCache
+from agents.utils.topic_index import TopicIndex, stem, topic_similarity, topic_terms
+
+
+def test_stemming_maps_inflections_together():
+    assert {stem(word) for word in ("organize", "organizing", "organization", "organisation")} == {"organ"}
+    assert stem("tips") == "tip"
+    assert stem("guides") == "guide"
+    assert stem("boxes") == "box"
+    assert stem("strategies") == "strategy"
+    assert stem("running") == "run"
+    assert stem("glass") == "glass"
+
+
+def test_paraphrases_score_high_and_different_intents_low():
+    assert topic_terms("Tips for organizing your desk") == ["tip", "organ", "desk"]
+    assert topic_similarity("desk organization tips", "tips for organizing your desk") == 1.0
+    assert topic_similarity("standing desks", "Standing desk") == 1.0
+    assert topic_similarity("desk organization tips", "desk organization mistakes") < 0.85
+    assert topic_similarity("python web frameworks", "python web scraping") < 0.85
+    assert topic_similarity("desk organization tips", "sourdough starter") == 0.0
+
+
+def test_search_ranks_candidates_sharing_a_word():
+    index = TopicIndex()
+    for topic in ("desk organization tips", "desk lamp reviews", "sourdough starter"):
+        index.add(topic)
+
+    matches = index.search("how to organize your desk", limit=5)
+
+    assert [match.topic for match in matches] == ["desk organization tips", "desk lamp reviews"]
+    assert matches[0].score > matches[1].score
+    assert index.search("quantum computing") == []
+
+
+def test_index_persists_and_expires(tmp_path):
+    path = str(tmp_path / "topics.jsonl")
+    index = TopicIndex(path, ttl=3600)
+    index.add("desk organization tips")
+    index.add("Desk Organization Tips")
+
+    reloaded = TopicIndex(path, ttl=3600)
+    assert len(reloaded) == 1
+    assert reloaded.search("desk organization tips")[0].topic == "Desk Organization Tips"
+
+    with open(path, "a") as f:
+        f.write(json.dumps({"topic": "old topic", "added_at": 0}) + "\n")
+    assert [match.topic for match in TopicIndex(path, ttl=3600).search("old topic")] == []
+
+
+def test_stage_cache_keeps_topic_index_out_of_its_disk_tier(tmp_path):
+    cache = StageCache(directory=str(tmp_path / "cache"))
+    cache.topics.add("desk organization tips")
+    cache.set("research", "ab" * 32, "research output")
+
+    assert os.path.exists(os.path.join(cache.directory, TOPIC_INDEX_FILE))
+    assert [os.path.basename(path) for path, _, _ in cache._scan_disk()] == [f"{'ab' * 32}.json"]
+
+    cache.clear()
+    assert len(cache.topics) == 0
+    assert not os.path.exists(os.path.join(cache.directory, TOPIC_INDEX_FILE))
@@ -0,0 +1,102 @@
+"""
+Tests for tracing spans and the JSONL span sink.
+"""
+
+import os
+import sys
+import asyncio
+
+import pytest
+
+# Add the parent directory to the path to import agents modules
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+from agents.utils.tracing import JsonlSpanExporter, Tracer, format_trace, load_spans, traced_call
+
+
+@pytest.fixture
+def exported(tmp_path):
+    path = str(tmp_path / "traces" / "spans.jsonl")
+    return Tracer(JsonlSpanExporter(path)), path
+
+
+def test_spans_nest_within_one_trace(exported):
+    tracer, path = exported
+
+    with tracer.span("workflow", workflow_id="wf-1") as root:
+        with tracer.span("stage.research") as stage:
+            with tracer.span("model_call", provider="openrouter"):
+                pass
+    with tracer.span("other request") as other:
+        pass
+
+    spans = {span["name"]: span for span in load_spans(path)}
+    assert spans["workflow"]["parentSpanId"] is None
+    assert spans["stage.research"]["parentSpanId"] == root.span_id
+    assert spans["model_call"]["parentSpanId"] == stage.span_id
+    assert spans["model_call"]["attributes"] == {"provider": "openrouter"}
+    assert {span["traceId"] for name, span in spans.items() if name != "other request"} == {root.trace_id}
+    assert other.trace_id != root.trace_id
+    assert len(load_spans(path, root.trace_id)) == 3
+
+
+def test_errors_and_cancellation_are_recorded(exported):
+    tracer, path = exported
+
+    with pytest.raises(ValueError):
+        with tracer.span("failing"):
+            raise ValueError("bad facts")
+
+    async def cancelled():
+        with tracer.span("hedged loser"):
+            await asyncio.sleep(10)
+
+    async def main():
+        task = asyncio.create_task(cancelled())
+        await asyncio.sleep(0)
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+
+    asyncio.run(main())
+
+    spans = {span["name"]: span for span in load_spans(path)}
+    assert spans["failing"]["status"] == {"code": "ERROR", "message": "bad facts"}
+    assert spans["hedged loser"]["status"]["code"] == "ERROR"
+
+
+def test_tasks_threads_and_explicit_parents_continue_the_trace(exported, monkeypatch):
+    tracer, path = exported
+    from agents.utils import tracing
+    monkeypatch.setattr(tracing, "tracer", tracer)
+
+    def search(query: str) -> str:
+        """Search the web."""
+        return query
+
+    async def stage():
+        with tracer.span("stage.facts"):
+            await asyncio.to_thread(traced_call("tool.search", search), "desk")
+
+    with tracer.span("create_content") as request:
+        context = request.context.to_dict()
+    # A background task picks the trace up from the stored context
+    with tracer.span("run_content_workflow", parent=context):
+        asyncio.run(stage())
+
+    spans = {span["name"]: span for span in load_spans(path)}
+    assert {span["traceId"] for span in spans.values()} == {request.trace_id}
+    assert spans["run_content_workflow"]["parentSpanId"] == request.span_id
+    assert spans["tool.search"]["parentSpanId"] == spans["stage.facts"]["spanId"]
+    assert traced_call("tool.search", search).__doc__ == "Search the web."
+
+    tree = format_trace(list(spans.values()))
+    assert tree.splitlines()[0] == f"trace {request.trace_id}"
+    assert "      tool.search" in tree
+
+
+def test_without_an_exporter_nothing_is_written(tmp_path):
+    tracer = Tracer()
+    with tracer.span("workflow") as span:
+        pass
+    assert len(span.trace_id) == 32 and len(span.span_id) == 16
+    assert span.end_ns >= span.start_ns